@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Mergeable partial aggregates for the Video Streaming Platform analysis
+Each state is computed on one shard, serialized, merged exactly with the
+states of other shards and finalized centrally
+"""
+
+import math
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from sketches import HyperLogLog
+
+STATE_TYPES = {}
+
+
+def register_state(cls):
+    """Class decorator: make a state type known to deserialize_state"""
+    STATE_TYPES[cls.kind] = cls
+    return cls
+
+
+class AggregateState:
+    """Base class: update from values, merge with a peer, serialize and finalize"""
+
+    kind = None
+
+    def update(self, values):
+        raise NotImplementedError
+
+    def merge(self, other):
+        raise NotImplementedError
+
+    def finalize(self):
+        raise NotImplementedError
+
+    def serialize(self):
+        return {'kind': self.kind, **self._payload()}
+
+    def _payload(self):
+        raise NotImplementedError
+
+    @classmethod
+    def deserialize(cls, data):
+        raise NotImplementedError
+
+
+@register_state
+class MomentsState(AggregateState):
+    """Count, sum and sum of squares of the non-null values"""
+
+    kind = 'moments'
+
+    def __init__(self, count=0, total=0.0, total_sq=0.0):
+        self.count = count
+        self.total = total
+        self.total_sq = total_sq
+
+    def update(self, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=float)
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1)"""
+        if self.count < 2:
+            return float('nan')
+        return max(self.total_sq - self.count * self.mean ** 2, 0.0) / (self.count - 1)
+
+    def finalize(self):
+        return {'count': self.count, 'sum': self.total, 'mean': self.mean,
+                'std': math.sqrt(self.variance) if self.count > 1 else float('nan')}
+
+    def _payload(self):
+        return {'count': self.count, 'total': self.total, 'total_sq': self.total_sq}
+
+    @classmethod
+    def deserialize(cls, data):
+        return cls(data['count'], data['total'], data['total_sq'])
+
+
+@register_state
+class MinMaxState(AggregateState):
+    """Minimum and maximum of the non-null values"""
+
+    kind = 'minmax'
+
+    def __init__(self, minimum=None, maximum=None):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def update(self, values):
+        values = pd.Series(values).dropna()
+        if len(values):
+            self.merge(MinMaxState(values.min(), values.max()))
+        return self
+
+    def merge(self, other):
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        return self
+
+    def finalize(self):
+        return {'min': self.minimum, 'max': self.maximum}
+
+    def _payload(self):
+        # Timestamps travel as ISO strings and come back as Timestamps
+        encode = lambda v: v.isoformat() if isinstance(v, pd.Timestamp) else v
+        return {'min': encode(self.minimum), 'max': encode(self.maximum),
+                'timestamp': isinstance(self.minimum, pd.Timestamp)}
+
+    @classmethod
+    def deserialize(cls, data):
+        decode = pd.Timestamp if data.get('timestamp') else (lambda v: v)
+        if data['min'] is None:
+            return cls()
+        return cls(decode(data['min']), decode(data['max']))
+
+
+@register_state
+class DistinctState(AggregateState):
+    """Approximate distinct count backed by a HyperLogLog sketch"""
+
+    kind = 'distinct'
+
+    def __init__(self, precision=14, sketch=None):
+        self.sketch = sketch or HyperLogLog(precision)
+
+    def update(self, values):
+        self.sketch.update(pd.Series(values).dropna().to_numpy())
+        return self
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        return self
+
+    def finalize(self):
+        return int(round(self.sketch.count()))
+
+    def _payload(self):
+        return {'precision': self.sketch.precision, 'registers': self.sketch.to_base64()}
+
+    @classmethod
+    def deserialize(cls, data):
+        return cls(sketch=HyperLogLog.from_base64(data['registers'], data['precision']))
+
+
+@register_state
+class QuantileState(AggregateState):
+    """Log-bucketed quantile sketch with a fixed relative accuracy (DDSketch)"""
+
+    kind = 'quantile'
+
+    def __init__(self, relative_accuracy=0.01, positive=None, negative=None, zero_count=0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.positive = positive or {}
+        self.negative = negative or {}
+        self.zero_count = zero_count
+
+    def _add_buckets(self, store, values):
+        keys = np.ceil(np.log(values) / math.log(self.gamma)).astype(np.int64)
+        uniques, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(uniques.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        values = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=float)
+        self._add_buckets(self.positive, values[values > 0])
+        self._add_buckets(self.negative, -values[values < 0])
+        self.zero_count += int((values == 0).sum())
+        return self
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge quantile sketches of different accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    @property
+    def count(self):
+        return sum(self.positive.values()) + sum(self.negative.values()) + self.zero_count
+
+    def quantile(self, q):
+        """Value at quantile q in [0, 1], within the relative accuracy"""
+        total = self.count
+        if total == 0:
+            return float('nan')
+        rank = q * (total - 1)
+        seen = 0
+        bucket_value = lambda key: 2 * self.gamma ** key / (self.gamma + 1)
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return bucket_value(key)
+        return bucket_value(max(self.positive))
+
+    def finalize(self):
+        return {'p25': self.quantile(0.25), 'p50': self.quantile(0.5), 'p75': self.quantile(0.75)}
+
+    def _payload(self):
+        # JSON object keys are strings
+        return {'relative_accuracy': self.relative_accuracy, 'zero_count': self.zero_count,
+                'positive': {str(k): v for k, v in self.positive.items()},
+                'negative': {str(k): v for k, v in self.negative.items()}}
+
+    @classmethod
+    def deserialize(cls, data):
+        return cls(data['relative_accuracy'],
+                   {int(k): v for k, v in data['positive'].items()},
+                   {int(k): v for k, v in data['negative'].items()},
+                   data['zero_count'])
+
+
+@register_state
+class TopKState(AggregateState):
+    """Frequent values; exact while there are at most `capacity` (None: unbounded) distinct values"""
+
+    kind = 'topk'
+
+    def __init__(self, capacity=1000, counts=None):
+        self.capacity = capacity
+        self.counts = counts or {}
+
+    def update(self, values):
+        for value, count in pd.Series(values).dropna().astype(str).value_counts().items():
+            self.counts[value] = self.counts.get(value, 0) + int(count)
+        self._prune()
+        return self
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._prune()
+        return self
+
+    def _prune(self):
+        # Misra-Gries reduction: bounded memory, counts under-estimated by at most the cut
+        if self.capacity is None or len(self.counts) <= self.capacity:
+            return
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {v: c - cut for v, c in self.counts.items() if c > cut}
+
+    def top(self, k=None):
+        """(value, count) pairs, most frequent first"""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:k] if k else ranked
+
+    def finalize(self):
+        return pd.Series(dict(self.top()), dtype='int64')
+
+    def _payload(self):
+        return {'capacity': self.capacity, 'counts': self.counts}
+
+    @classmethod
+    def deserialize(cls, data):
+        return cls(data['capacity'], dict(data['counts']))
+
+
+def deserialize_state(data):
+    """Rebuild a state (or a nested dict of states) from its serialized form"""
+    if 'kind' in data and data['kind'] in STATE_TYPES:
+        return STATE_TYPES[data['kind']].deserialize(data)
+    return {key: deserialize_state(value) for key, value in data.items()}
+
+
+def serialize_states(states):
+    """Serialize a state or a nested dict of states to JSON-compatible data"""
+    if isinstance(states, AggregateState):
+        return states.serialize()
+    return {key: serialize_states(value) for key, value in states.items()}
+
+
+def merge_states(target, other):
+    """Merge a state tree into another with the same shape; groups may differ"""
+    if isinstance(target, AggregateState):
+        return target.merge(other)
+    for key, value in other.items():
+        if key in target:
+            merge_states(target[key], value)
+        else:
+            target[key] = value
+    return target
+
+
+def grouped_moments(df, by, column):
+    """One MomentsState per group of `by`, computed in a single vectorized pass"""
+    values = pd.to_numeric(df[column], errors='coerce').astype(float)
+    frame = pd.DataFrame({'key': df[by].astype(str).where(df[by].notna()),
+                          'value': values, 'value_sq': values ** 2})
+    sums = frame.groupby('key').agg(count=('value', 'count'), total=('value', 'sum'),
+                                    total_sq=('value_sq', 'sum'))
+    return {key: MomentsState(int(row['count']), float(row['total']), float(row['total_sq']))
+            for key, row in sums.iterrows()}
+
+
+def anova_from_moments(groups):
+    """One-way ANOVA (as scipy.stats.f_oneway) from per-group moments"""
+    groups = [g for g in groups if g.count > 0]
+    n = sum(g.count for g in groups)
+    k = len(groups)
+    grand_mean = sum(g.total for g in groups) / n
+    between = sum(g.count * (g.mean - grand_mean) ** 2 for g in groups)
+    within = sum(g.total_sq - g.count * g.mean ** 2 for g in groups)
+    f_stat = (between / (k - 1)) / (within / (n - k))
+    return f_stat, stats.f.sf(f_stat, k - 1, n - k)
+
+
+def ttest_from_moments(a, b):
+    """Two-sample t-test with pooled variance (as scipy.stats.ttest_ind)"""
+    dof = a.count + b.count - 2
+    pooled = ((a.count - 1) * a.variance + (b.count - 1) * b.variance) / dof
+    t_stat = (a.mean - b.mean) / math.sqrt(pooled * (1 / a.count + 1 / b.count))
+    return t_stat, 2 * stats.t.sf(abs(t_stat), dof)
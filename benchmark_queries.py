@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the analytics query catalog
+Fills a scratch database with synthetic data of a chosen size, runs every query
+of complex_queries_backup.sql N times and records latency percentiles, buffer
+hits/reads and the EXPLAIN (ANALYZE, BUFFERS) plan. Results are compared with
+a stored baseline: a different plan shape or a slower p50 is flagged
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from content_genres import sync_content_genres
+from db import connect, pg_settings
+from index_advisor import QUERY_CATALOG, explain, load_query_catalog
+from metric_tables import rebuild_aggregates
+from migrate import migrate
+from partitions import ensure_partitions
+from table_maintenance import refresh_materialized_views
+
+BENCH_DATABASE_SUFFIX = '_bench'
+RESULTS_FILE = 'query_benchmark.json'
+BASELINE_FILE = 'query_benchmark_baseline.json'
+FIRST_WATCH_DATE = date(2023, 1, 1)
+
+# Plan node fields that define its shape; costs, row counts and timings are left out
+PLAN_SHAPE_FIELDS = ['Node Type', 'Parent Relationship', 'Join Type', 'Strategy', 'Relation Name',
+                     'Index Name', 'Scan Direction']
+
+COUNTRIES = ['Argentina', 'Mexico', 'Spain', 'Colombia', 'Chile', 'Peru', 'USA', 'Brazil']
+SUBSCRIPTIONS = ['Basic', 'Standard', 'Premium']
+GENRES = ['Action', 'Comedy', 'Drama', 'Horror', 'Sci-Fi', 'Romance', 'Thriller', 'Documentary', 'Crime',
+          'Animation']
+DEVICES = ['Smart TV', 'Mobile', 'Laptop', 'Tablet', 'Desktop']
+QUALITIES = ['SD', 'HD', '4K']
+
+
+def bench_database():
+    """Default scratch database: the configured one with a _bench suffix"""
+    return pg_settings()['database'] + BENCH_DATABASE_SUFFIX
+
+
+def create_database(database):
+    """Create the database if it does not exist; returns True when created"""
+    conn = connect(database='postgres')
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database,))
+    created = cursor.fetchone() is None
+    if created:
+        cursor.execute(f'CREATE DATABASE {database}')
+    cursor.close()
+    conn.close()
+    return created
+
+
+def populate(conn, users, content, sessions, days=365, seed=0.5):
+    """Replace the data with synthetic rows generated server-side; returns the row counts
+
+    Sessions are spread evenly over `days` in watch_date order, like the real
+    feed, and pick titles with a skew towards the first ones (a few hits, a
+    long tail). setseed() makes two runs with the same sizes identical.
+    """
+    cursor = conn.cursor()
+    cursor.execute("TRUNCATE users, content CASCADE")
+    cursor.execute("SELECT setseed(%s)", (seed,))
+
+    cursor.execute("""
+        INSERT INTO users (user_id, age, country, subscription_type, registration_date, total_watch_time_hours)
+        SELECT 'U' || lpad(i::text, 7, '0'), 18 + floor(random() * 53)::int,
+               (%(countries)s::text[])[1 + floor(random() * cardinality(%(countries)s::text[]))::int],
+               (%(subscriptions)s::text[])[1 + floor(random() * cardinality(%(subscriptions)s::text[]))::int],
+               DATE '2021-01-01' + floor(random() * 730)::int, round((random() * 300)::numeric, 1)
+        FROM generate_series(1, %(n)s) i
+    """, {'n': users, 'countries': COUNTRIES, 'subscriptions': SUBSCRIPTIONS})
+
+    # Two titles out of three are movies; each title gets 1-3 genres
+    cursor.execute("""
+        INSERT INTO content (content_id, title, genre, content_type, duration_minutes, release_year, rating,
+                             views_count, production_budget, seasons, episodes_per_season, avg_episode_duration)
+        SELECT id, 'Title ' || i,
+               (SELECT jsonb_agg(DISTINCT g) FROM (
+                    SELECT (%(genres)s::text[])[1 + floor(random() * cardinality(%(genres)s::text[]))::int] AS g
+                    FROM generate_series(1, 1 + i %% 3)) picked),
+               CASE WHEN movie THEN 'movie' ELSE 'series' END,
+               CASE WHEN movie THEN 80 + floor(random() * 100)::int ELSE 20 + floor(random() * 40)::int END,
+               CASE WHEN movie THEN 1990 + floor(random() * 35)::int END,
+               round((1 + random() * 4)::numeric, 1), floor(random() * 100000)::int,
+               floor(1e6 + random() * 2e8)::bigint,
+               CASE WHEN NOT movie THEN 1 + floor(random() * 8)::int END, NULL,
+               CASE WHEN NOT movie THEN 20 + floor(random() * 40)::int END
+        FROM (SELECT i, i %% 3 <> 0 AS movie,
+                     CASE WHEN i %% 3 <> 0 THEN 'M' ELSE 'S' END || lpad(i::text, 6, '0') AS id
+              FROM generate_series(1, %(n)s) i) titles
+    """, {'n': content, 'genres': GENRES})
+
+    start = pd.Timestamp(FIRST_WATCH_DATE)
+    ensure_partitions(cursor, 'viewing_sessions',
+                      list(pd.period_range(start, start + pd.Timedelta(days=days - 1), freq='M')))
+    cursor.execute("""
+        INSERT INTO viewing_sessions (session_id, user_id, content_id, watch_date, watch_duration_minutes,
+                                      completion_percentage, device_type, quality_level)
+        SELECT 'VS' || lpad(i::text, 9, '0'),
+               'U' || lpad((1 + floor(random() * %(users)s))::int::text, 7, '0'),
+               CASE WHEN k %% 3 <> 0 THEN 'M' ELSE 'S' END || lpad(k::text, 6, '0'),
+               %(start)s::date + ((i - 1)::bigint * %(days)s / %(n)s)::int,
+               1 + floor(random() * 180)::int, round((random() * 100)::numeric, 2),
+               (%(devices)s::text[])[1 + floor(random() * cardinality(%(devices)s::text[]))::int],
+               (%(qualities)s::text[])[1 + floor(random() * cardinality(%(qualities)s::text[]))::int]
+        -- OFFSET 0 keeps the subquery from being flattened, so each k is drawn once
+        FROM (SELECT i, 1 + floor(power(random(), 2) * %(content)s)::int AS k
+              FROM generate_series(1, %(n)s) i OFFSET 0) picks
+    """, {'n': sessions, 'users': users, 'content': content, 'start': FIRST_WATCH_DATE, 'days': days,
+          'devices': DEVICES, 'qualities': QUALITIES})
+
+    sync_content_genres(cursor)
+    rebuild_aggregates(cursor)
+    conn.commit()
+    cursor.close()
+    refresh_materialized_views(conn)
+
+    # VACUUM cannot run in a transaction; it also sets the visibility map index-only scans rely on
+    conn.autocommit = True
+    cursor = conn.cursor()
+    cursor.execute("VACUUM ANALYZE")
+    cursor.close()
+    conn.autocommit = False
+    return data_size(conn)
+
+
+def data_size(conn):
+    """{table: rows} of the tables the catalog reads"""
+    cursor = conn.cursor()
+    sizes = {}
+    for table in ['users', 'content', 'viewing_sessions']:
+        cursor.execute(f"SELECT count(*) FROM {table}")
+        sizes[table] = cursor.fetchone()[0]
+    conn.commit()
+    cursor.close()
+    return sizes
+
+
+def plan_shape(plan):
+    """Nested shape of a plan node: its PLAN_SHAPE_FIELDS and the shapes of its children"""
+    node = {field: plan[field] for field in PLAN_SHAPE_FIELDS if field in plan}
+    children = [plan_shape(child) for child in plan.get('Plans', [])]
+    if children:
+        node['Plans'] = children
+    return node
+
+
+def plan_hash(plan):
+    return hashlib.sha256(json.dumps(plan_shape(plan), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _latency_ms(seconds):
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    return {'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3),
+            'min': round(min(seconds) * 1000, 3), 'max': round(max(seconds) * 1000, 3),
+            'mean': round(float(np.mean(seconds)) * 1000, 3)}
+
+
+def benchmark_query(conn, sql, runs=10, warmup=1, statement_timeout='5min'):
+    """Latencies of `runs` executions (after `warmup` untimed ones) plus one EXPLAIN ANALYZE"""
+    cursor = conn.cursor()
+    cursor.execute("SET statement_timeout = %s", (statement_timeout,))
+    conn.commit()
+    seconds = []
+    rows = None
+    for run in range(warmup + runs):
+        started = time.perf_counter()
+        cursor.execute(sql)
+        rows = len(cursor.fetchall())
+        elapsed = time.perf_counter() - started
+        conn.rollback()
+        if run >= warmup:
+            seconds.append(elapsed)
+
+    top = explain(cursor, sql, analyze=True)
+    conn.rollback()
+    cursor.close()
+    plan = top['Plan']
+    return {
+        'rows': rows,
+        'latency_ms': _latency_ms(seconds),
+        'planning_ms': top.get('Planning Time'),
+        'execution_ms': top.get('Execution Time'),
+        'shared_hit_blocks': plan.get('Shared Hit Blocks'),
+        'shared_read_blocks': plan.get('Shared Read Blocks'),
+        'temp_read_blocks': plan.get('Temp Read Blocks'),
+        'temp_written_blocks': plan.get('Temp Written Blocks'),
+        'plan_hash': plan_hash(plan),
+        'plan': top,
+    }
+
+
+def run_benchmark(conn, queries, runs=10, warmup=1, statement_timeout='5min'):
+    """{query number: result} for the catalog; a failing query records its error"""
+    results = {}
+    for number, title, sql in queries:
+        print(f"⏱️  {number}. {title}...")
+        try:
+            result = benchmark_query(conn, sql, runs, warmup, statement_timeout)
+        except Exception as e:
+            conn.rollback()
+            result = {'error': str(e).strip()}
+            print(f"   ❌ {result['error']}")
+        else:
+            latency = result['latency_ms']
+            print(f"   p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+                  f"{result['shared_hit_blocks'] or 0:,} bloques en caché, {result['shared_read_blocks'] or 0:,} leídos")
+        results[str(number)] = dict(title=title, **result)
+    return results
+
+
+def compare_with_baseline(current, baseline, threshold=0.25, min_delta_ms=2.0):
+    """Findings [(query, kind, detail)] of a run against a baseline
+
+    A query regresses when its p50 is more than `threshold` (relative) and
+    `min_delta_ms` (absolute) slower, so sub-millisecond noise is ignored.
+    """
+    findings = []
+    if current['data'] != baseline.get('data'):
+        findings.append(('*', 'data', f"tamaño de datos distinto: {baseline.get('data')} -> {current['data']}"))
+    for key, result in current['queries'].items():
+        base = baseline.get('queries', {}).get(key)
+        if base is None:
+            findings.append((key, 'new', "sin referencia en la línea base"))
+            continue
+        if 'error' in result or 'error' in base:
+            if 'error' in result and 'error' not in base:
+                findings.append((key, 'error', result['error']))
+            continue
+        if result['plan_hash'] != base['plan_hash']:
+            findings.append((key, 'plan', f"plan {base['plan_hash']} -> {result['plan_hash']}"))
+        old, new = base['latency_ms']['p50'], result['latency_ms']['p50']
+        if new > old * (1 + threshold) and new - old > min_delta_ms:
+            findings.append((key, 'latency', f"p50 {old:.1f} ms -> {new:.1f} ms (+{(new / old - 1) * 100:.0f}%)"))
+    for key in baseline.get('queries', {}):
+        if key not in current['queries']:
+            findings.append((key, 'missing', "ya no está en el catálogo"))
+    return findings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las consultas de complex_queries_backup.sql")
+    parser.add_argument('--database', default=None,
+                        help=f"Base de datos del benchmark (por defecto PG_DB + '{BENCH_DATABASE_SUFFIX}')")
+    parser.add_argument('--populate', action='store_true',
+                        help="Crear la base de datos si falta, aplicar migraciones y generar datos sintéticos")
+    parser.add_argument('--users', type=int, default=10_000, help="Usuarios sintéticos (default: 10000)")
+    parser.add_argument('--content', type=int, default=500, help="Títulos sintéticos (default: 500)")
+    parser.add_argument('--sessions', type=int, default=1_000_000, help="Sesiones sintéticas (default: 1000000)")
+    parser.add_argument('--days', type=int, default=365, help="Días de sesiones desde 2023-01-01 (default: 365)")
+    parser.add_argument('--seed', type=float, default=0.5, help="Semilla de random() entre -1 y 1 (default: 0.5)")
+    parser.add_argument('--catalog', default=QUERY_CATALOG, help="Archivo SQL con las consultas numeradas")
+    parser.add_argument('--queries', default=None, help="Números de consulta separados por comas (default: todas)")
+    parser.add_argument('--runs', type=int, default=10, help="Ejecuciones medidas por consulta (default: 10)")
+    parser.add_argument('--warmup', type=int, default=1, help="Ejecuciones previas sin medir (default: 1)")
+    parser.add_argument('--statement-timeout', default='5min', help="Tiempo máximo por consulta")
+    parser.add_argument('--out', default=RESULTS_FILE, help=f"Resultados en JSON (default: {RESULTS_FILE})")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"Línea base (default: {BASELINE_FILE})")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar esta ejecución como línea base")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Aumento relativo del p50 que cuenta como regresión (default: 0.25)")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help="Aumento absoluto mínimo del p50 para marcar una regresión (default: 2.0)")
+    args = parser.parse_args()
+
+    database = args.database or bench_database()
+    queries = load_query_catalog(args.catalog)
+    if args.queries:
+        selected = {int(n) for n in args.queries.split(',')}
+        queries = [q for q in queries if q[0] in selected]
+    if not queries:
+        print(f"❌ No se encontraron consultas en {args.catalog}")
+        sys.exit(1)
+
+    if args.populate:
+        if database == pg_settings()['database']:
+            print(f"❌ --populate reemplaza todos los datos: usa una base distinta de '{database}'")
+            sys.exit(1)
+        if create_database(database):
+            print(f"✅ Base de datos '{database}' creada")
+
+    conn = connect(database=database)
+    try:
+        if args.populate:
+            for migration in migrate(conn):
+                print(f"✅ Migración {migration.version:04d}_{migration.name} aplicada")
+            print(f"🧪 Generando {args.users:,} usuarios, {args.content:,} títulos y {args.sessions:,} sesiones...")
+            started = time.perf_counter()
+            sizes = populate(conn, args.users, args.content, args.sessions, args.days, args.seed)
+            print(f"✅ Datos sintéticos listos en {time.perf_counter() - started:.1f}s")
+        else:
+            sizes = data_size(conn)
+        cursor = conn.cursor()
+        cursor.execute("SHOW server_version")
+        server_version = cursor.fetchone()[0]
+        cursor.close()
+        conn.commit()
+
+        print(f"\n📊 {len(queries)} consultas × {args.runs} ejecuciones en '{database}' {sizes}")
+        results = run_benchmark(conn, queries, args.runs, args.warmup, args.statement_timeout)
+    finally:
+        conn.close()
+
+    current = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'database': database,
+        'server_version': server_version,
+        'runs': args.runs,
+        'warmup': args.warmup,
+        'data': sizes,
+        'queries': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2, default=str)
+    print(f"\n📈 Resultados y planes guardados en {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, default=str)
+        print(f"✅ Línea base guardada en {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"ℹ️  Sin línea base ({args.baseline}); usa --save-baseline para crearla")
+        return
+
+    findings = compare_with_baseline(current, baseline, args.threshold, args.min_delta_ms)
+    print(f"\n🔍 COMPARACIÓN CON {args.baseline} ({baseline.get('created_at')})")
+    print("-" * 60)
+    for key, kind, detail in findings:
+        icon = '❌' if kind in ('latency', 'error') else '⚠️ '
+        print(f"{icon} {key}: {detail}")
+    if not findings:
+        print("✅ Mismos planes y sin regresiones de latencia")
+    if any(kind in ('latency', 'error') for _, kind, _ in findings):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+content_genre bridge table
+One (content_id, genre) row per genre of each title, derived from the JSONB
+content.genre array. Loaders sync it right after writing content, so genre
+analytics join an indexed table instead of unnesting the JSON on every query
+"""
+
+BRIDGE_TABLE = 'content_genre'
+
+
+def genre_rows_sql(content='content'):
+    """Distinct (content_id, genre) pairs of a content table; blank or non-array genres are skipped"""
+    return f"""
+        SELECT DISTINCT c.content_id, btrim(g.genre) AS genre
+        FROM {content} c
+        CROSS JOIN LATERAL jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(c.genre::jsonb) = 'array' THEN c.genre::jsonb ELSE '[]'::jsonb END) AS g(genre)
+        WHERE btrim(g.genre) <> ''
+    """
+
+
+def sync_content_genres(cursor, content='content', bridge=BRIDGE_TABLE):
+    """Bring the bridge table in line with the content table; returns (added, removed)
+
+    Only the differences are written, so re-syncing an unchanged catalog is
+    a read. Runs in the caller's transaction, next to the content writes.
+    """
+    cursor.execute(f"""
+        DELETE FROM {bridge} b
+        WHERE NOT EXISTS (SELECT 1 FROM ({genre_rows_sql(content)}) r
+                          WHERE r.content_id = b.content_id AND r.genre = b.genre)
+    """)
+    removed = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO {bridge} (content_id, genre)
+        SELECT content_id, genre FROM ({genre_rows_sql(content)}) r
+        ORDER BY content_id, genre
+        ON CONFLICT DO NOTHING
+    """)
+    return cursor.rowcount, removed
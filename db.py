@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Shared database access for the loaders, the analysis and the dashboard
+Connection settings come from the environment (and a .env file next to this
+module when python-dotenv is installed). Pools and clients are created lazily
+on first use, are thread-safe and are rebuilt after a fork
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+if load_dotenv is not None:
+    load_dotenv(os.path.join(BASE_DIR, '.env'))
+
+_lock = threading.Lock()
+_state = {'pid': None, 'pg_pool': None, 'engine': None, 'mongo': None}
+
+
+def pg_settings(database=None):
+    """psycopg2 connection parameters from PG_HOST, PG_PORT, PG_DB, PG_USER, PG_PASSWORD"""
+    return {
+        'host': os.getenv('PG_HOST', 'localhost'),
+        'port': int(os.getenv('PG_PORT', '5432')),
+        'database': database or os.getenv('PG_DB', 'video_streaming_platform'),
+        'user': os.getenv('PG_USER', 'postgres'),
+        'password': os.getenv('PG_PASSWORD', 'postgres'),
+    }
+
+
+def pg_url(database=None):
+    """SQLAlchemy URL for the same settings"""
+    s = pg_settings(database)
+    return f"postgresql+psycopg2://{s['user']}:{s['password']}@{s['host']}:{s['port']}/{s['database']}"
+
+
+def _resource(name, factory):
+    """Create a shared resource once per process"""
+    with _lock:
+        # Sockets inherited through fork cannot be shared with the parent
+        if _state['pid'] != os.getpid():
+            _state.update(pid=os.getpid(), pg_pool=None, engine=None, mongo=None)
+        if _state[name] is None:
+            _state[name] = factory()
+        return _state[name]
+
+
+def connect(database=None):
+    """A dedicated psycopg2 connection, outside the pool"""
+    import psycopg2
+    return psycopg2.connect(**pg_settings(database))
+
+
+def pg_pool():
+    """Process-wide ThreadedConnectionPool (PG_POOL_MIN..PG_POOL_MAX connections)"""
+    def factory():
+        from psycopg2.pool import ThreadedConnectionPool
+        return ThreadedConnectionPool(int(os.getenv('PG_POOL_MIN', '1')), int(os.getenv('PG_POOL_MAX', '10')),
+                                      **pg_settings())
+    return _resource('pg_pool', factory)
+
+
+@contextmanager
+def pg_connection():
+    """Borrow a pooled connection; any open transaction is rolled back on return"""
+    pool = pg_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        broken = bool(conn.closed)
+        raise
+    finally:
+        if not conn.closed:
+            conn.rollback()
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def sqlalchemy_engine():
+    """Process-wide SQLAlchemy engine; connections are checked before each checkout"""
+    def factory():
+        from sqlalchemy import create_engine
+        return create_engine(pg_url(), pool_pre_ping=True,
+                             pool_size=int(os.getenv('PG_POOL_MAX', '10')), max_overflow=0)
+    return _resource('engine', factory)
+
+
+def mongo_client():
+    """Process-wide MongoClient from MONGO_URI (pymongo pools internally)"""
+    def factory():
+        from pymongo import MongoClient
+        return MongoClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017'),
+                           serverSelectionTimeoutMS=int(os.getenv('MONGO_TIMEOUT_MS', '5000')))
+    return _resource('mongo', factory)
+
+
+def mongo_db():
+    """The MONGO_DB database of the shared client"""
+    return mongo_client()[os.getenv('MONGO_DB', 'video_streaming_platform')]
+
+
+def health_check(postgres=True, mongo=False):
+    """{'postgres': (ok, detail), 'mongo': (ok, detail)} with round-trip times"""
+    results = {}
+    if postgres:
+        try:
+            started = time.perf_counter()
+            with pg_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT version()')
+                version = cursor.fetchone()[0]
+                cursor.close()
+            results['postgres'] = (True, f"{version.split(',')[0]} ({(time.perf_counter() - started) * 1000:.1f} ms)")
+        except Exception as e:
+            results['postgres'] = (False, str(e))
+    if mongo:
+        try:
+            started = time.perf_counter()
+            mongo_client().admin.command('ping')
+            results['mongo'] = (True, f"ping ({(time.perf_counter() - started) * 1000:.1f} ms)")
+        except Exception as e:
+            results['mongo'] = (False, str(e))
+    return results
+
+
+def close_all():
+    """Close the pools and clients of this process"""
+    with _lock:
+        if _state['pid'] == os.getpid():
+            if _state['pg_pool'] is not None:
+                _state['pg_pool'].closeall()
+            if _state['engine'] is not None:
+                _state['engine'].dispose()
+            if _state['mongo'] is not None:
+                _state['mongo'].close()
+        _state.update(pid=None, pg_pool=None, engine=None, mongo=None)
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Index advisor for the analytics query catalog
+Runs every query of complex_queries_backup.sql under EXPLAIN (FORMAT JSON),
+collects the indexes each plan touches (partition indexes are mapped to their
+parent with pg_partition_root) and reports which indexes were used, which were
+not, and how much space each one takes
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+
+from db import connect
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUERY_CATALOG = os.path.join(BASE_DIR, 'video-streaming-analysis', 'database', 'sql', 'complex_queries_backup.sql')
+QUERY_TABLES = ['users', 'content', 'content_genre', 'viewing_sessions']
+QUERY_HEADER = re.compile(r'^--\s*(\d+)\.\s*(.+)$', re.MULTILINE)
+INDEX_NODE_TYPES = {'Index Scan', 'Index Only Scan', 'Bitmap Index Scan'}
+
+
+def load_query_catalog(path=QUERY_CATALOG):
+    """[(number, title, sql)] of the numbered queries of a SQL file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    queries = []
+    for statement in text.split(';'):
+        header = QUERY_HEADER.search(statement)
+        sql = '\n'.join(line for line in statement.splitlines() if not line.strip().startswith('--')).strip()
+        if header and sql:
+            queries.append((int(header.group(1)), header.group(2).strip(), sql))
+    return queries
+
+
+def plan_nodes(plan):
+    """Every node of an EXPLAIN JSON plan tree"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(cursor, sql, analyze=False):
+    """Top plan node of a query; with analyze the query runs (inside a rolled-back transaction)"""
+    options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+    cursor.execute(f"EXPLAIN ({options}) {sql}")
+    result = cursor.fetchone()[0]
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]
+
+
+def parent_index(cursor, name, cache):
+    """Index of the partitioned table a partition index belongs to (itself otherwise)"""
+    if name not in cache:
+        cursor.execute("SELECT coalesce(pg_partition_root(%s::regclass), %s::regclass)::text", (name, name))
+        cache[name] = cursor.fetchone()[0]
+    return cache[name]
+
+
+def table_indexes(cursor, tables=QUERY_TABLES):
+    """{index: {'table', 'definition', 'bytes', 'scans'}} of the tables, partitions summed up"""
+    cursor.execute("""
+        SELECT i.oid::regclass::text, t.relname, pg_get_indexdef(i.oid),
+               (SELECT sum(pg_relation_size(p.relid)) FROM pg_partition_tree(i.oid) p),
+               (SELECT coalesce(sum(s.idx_scan), 0) FROM pg_partition_tree(i.oid) p
+                JOIN pg_stat_user_indexes s ON s.indexrelid = p.relid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_class t ON t.oid = x.indrelid
+        WHERE t.relname = ANY(%s) AND NOT i.relispartition
+        ORDER BY t.relname, i.relname
+    """, (list(tables),))
+    return {name: {'table': table, 'definition': definition, 'bytes': int(size or 0), 'scans': int(scans)}
+            for name, table, definition, size, scans in cursor.fetchall()}
+
+
+def analyze_catalog(conn, queries, analyze=False, statement_timeout='5min'):
+    """Plan every query; returns (per-query results, index inventory with the queries using each)"""
+    cursor = conn.cursor()
+    indexes = table_indexes(cursor)
+    for info in indexes.values():
+        info['queries'] = []
+    conn.commit()
+
+    parents = {}
+    results = []
+    for number, title, sql in queries:
+        try:
+            cursor.execute("SET LOCAL statement_timeout = %s", (statement_timeout,))
+            top = explain(cursor, sql, analyze)
+        except Exception as e:
+            conn.rollback()
+            results.append({'number': number, 'title': title, 'error': str(e).strip()})
+            continue
+        used = {}
+        for node in plan_nodes(top['Plan']):
+            if node.get('Node Type') in INDEX_NODE_TYPES and 'Index Name' in node:
+                name = parent_index(cursor, node['Index Name'], parents)
+                used.setdefault(name, set()).add(node['Node Type'])
+        # EXPLAIN ANALYZE really ran the query: leave nothing behind
+        conn.rollback()
+        result = {'number': number, 'title': title, 'total_cost': top['Plan']['Total Cost'],
+                  'indexes': {name: sorted(types) for name, types in sorted(used.items())}}
+        if analyze:
+            result['execution_ms'] = top.get('Execution Time')
+            result['shared_hit_blocks'] = top['Plan'].get('Shared Hit Blocks')
+            result['shared_read_blocks'] = top['Plan'].get('Shared Read Blocks')
+        results.append(result)
+        for name in used:
+            if name in indexes:
+                indexes[name]['queries'].append(number)
+    cursor.close()
+    return results, indexes
+
+
+def _size(nbytes):
+    for unit in ['B', 'kB', 'MB', 'GB']:
+        if nbytes < 1024 or unit == 'GB':
+            return f"{nbytes:,.0f} {unit}" if unit == 'B' else f"{nbytes:,.1f} {unit}"
+        nbytes /= 1024
+
+
+def print_report(results, indexes):
+    print("\n🔎 CONSULTAS")
+    print("-" * 60)
+    for result in results:
+        if 'error' in result:
+            print(f"❌ {result['number']}. {result['title']}: {result['error']}")
+            continue
+        timing = f", {result['execution_ms']:.1f} ms" if result.get('execution_ms') is not None else ""
+        print(f"{result['number']}. {result['title']} (coste {result['total_cost']:,.0f}{timing})")
+        for name, types in result['indexes'].items():
+            print(f"     ✅ {name}: {', '.join(types)}")
+        if not result['indexes']:
+            print("     ⚠️  sin índices (solo escaneos secuenciales)")
+
+    used = {name: info for name, info in indexes.items() if info['queries']}
+    unused = {name: info for name, info in indexes.items() if not info['queries']}
+    print("\n📦 ÍNDICES USADOS")
+    print("-" * 60)
+    for name, info in used.items():
+        queries = ', '.join(str(q) for q in info['queries'])
+        print(f"   {name} ({info['table']}): {_size(info['bytes'])}, consultas {queries}, {info['scans']:,} escaneos")
+    print("\n🗑️  ÍNDICES SIN USO EN EL CATÁLOGO")
+    print("-" * 60)
+    for name, info in unused.items():
+        print(f"   {name} ({info['table']}): {_size(info['bytes'])}, {info['scans']:,} escaneos acumulados")
+    print(f"\n   Total sin uso: {_size(sum(info['bytes'] for info in unused.values()))} "
+          f"de {_size(sum(info['bytes'] for info in indexes.values()))}")
+    print("   (las claves primarias pueden no aparecer en el catálogo y aun así ser necesarias)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Informe de uso de índices del catálogo de consultas")
+    parser.add_argument('--catalog', default=QUERY_CATALOG, help="Archivo SQL con las consultas numeradas")
+    parser.add_argument('--analyze', action='store_true',
+                        help="EXPLAIN ANALYZE (ejecuta las consultas) en lugar de solo planificarlas")
+    parser.add_argument('--statement-timeout', default='5min', help="Tiempo máximo por consulta")
+    parser.add_argument('--json', dest='json_out', default=None, help="Guardar el informe también en JSON")
+    args = parser.parse_args()
+
+    queries = load_query_catalog(args.catalog)
+    if not queries:
+        print(f"❌ No se encontraron consultas numeradas en {args.catalog}")
+        sys.exit(1)
+    conn = connect()
+    try:
+        results, indexes = analyze_catalog(conn, queries, args.analyze, args.statement_timeout)
+    finally:
+        conn.close()
+    print_report(results, indexes)
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump({'queries': results, 'indexes': indexes}, f, indent=2)
+        print(f"\n📈 Informe guardado en {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,63 +5,278 @@ Video Streaming Platform
 """
 
 import os
+import io
+import csv
 import json
+import time
+import hashlib
+from collections import deque
+from itertools import islice
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extras import Json, execute_values
 import sys
 
-# Configuración de la base de datos
-DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'video_streaming_platform',
-    'user': 'postgres',
-    'password': 'postgres'
-}
+from content_genres import BRIDGE_TABLE, sync_content_genres
+from db import connect, pg_connection
+from migrate import migrate
+from memory_budget import ChunkSizer, memory_budget_bytes, read_csv_chunks
+from metric_tables import (add_session_batch, apply_server_deltas, changed_sessions_sql, clear_aggregates,
+                           rebuild_aggregates, table_sessions_sql)
+from partitions import (drop_partitions_before, ensure_default_partition,
+                        ensure_partitions, monthly_partitions, months_of, partition_name, partition_names,
+                        reload_partition, split_by_month)
+from pg_binary_copy import encode_binary_copy
+from reconciliation import PartitionDigest, compare_digests, server_digest
+from reference_check import ReferenceValidator, RejectWriter
+from telemetry import COMPLETED, SUMMARY_FILE, LoadTelemetry, estimate_csv_rows, write_summary
+from table_maintenance import (create_swap_table, finish_swap_tables, refresh_materialized_views,
+                               restore_table, suspend_table, swap_tables)
+
+# Columnas en el orden de las tablas destino
+USER_COLUMNS = ['user_id', 'age', 'country', 'subscription_type', 'registration_date', 'total_watch_time_hours']
+SESSION_COLUMNS = ['session_id', 'user_id', 'content_id', 'watch_date', 'watch_duration_minutes',
+                   'completion_percentage', 'device_type', 'quality_level']
+CONTENT_COLUMNS = ['content_id', 'title', 'genre', 'content_type', 'duration_minutes', 'release_year', 'rating',
+                   'views_count', 'production_budget', 'seasons', 'episodes_per_season', 'avg_episode_duration']
+
+# Tipos para COPY binario (DECIMAL(x,2) -> numeric(2))
+USER_COLUMN_TYPES = {'user_id': 'text', 'age': 'int4', 'country': 'text', 'subscription_type': 'text',
+                     'registration_date': 'date', 'total_watch_time_hours': 'numeric(2)'}
+SESSION_COLUMN_TYPES = {'session_id': 'text', 'user_id': 'text', 'content_id': 'text', 'watch_date': 'date',
+                        'watch_duration_minutes': 'int4', 'completion_percentage': 'numeric(2)',
+                        'device_type': 'text', 'quality_level': 'text'}
+COLUMN_TYPES = {'users': USER_COLUMN_TYPES, 'viewing_sessions': SESSION_COLUMN_TYPES}
+
+# Métodos de carga: INSERT con execute_values o COPY ... FROM STDIN
+LOAD_METHODS = ['copy', 'insert']
+COPY_FORMATS = ['csv', 'text', 'binary']
+
+# viewing_sessions está particionada por mes de watch_date: la clave incluye la fecha
+SESSION_KEY = ('session_id', 'watch_date')
+
+# Carga incremental: marca de agua por tabla (última fecha cargada)
+WATERMARK_COLUMNS = {'users': 'registration_date', 'viewing_sessions': 'watch_date'}
+
+# Bytes del inicio y del final del archivo que entran en su huella
+FINGERPRINT_BLOCK = 1024 * 1024
 
 def connect_db():
     """Conectar a la base de datos PostgreSQL"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = connect()
         print("✅ Conectado a la base de datos PostgreSQL")
         return conn
     except psycopg2.Error as e:
         print(f"❌ Error conectando a la base de datos: {e}")
         sys.exit(1)
 
-def create_schema(conn):
-    """Crear el esquema de la base de datos"""
+def apply_migrations(conn):
+    """Aplicar las migraciones pendientes del esquema; sin pendientes no se ejecuta DDL"""
     try:
-        cursor = conn.cursor()
-        
-        # Leer y ejecutar el schema
-        schema_file = 'video-streaming-analysis/database/sql/schema.sql'
-        if os.path.exists(schema_file):
-            with open(schema_file, 'r', encoding='utf-8') as f:
-                schema_sql = f.read()
-            cursor.execute(schema_sql)
-            conn.commit()
-            print("✅ Esquema de base de datos creado/actualizado")
-        else:
-            print("⚠️  Archivo schema.sql no encontrado, continuando...")
-        
-        cursor.close()
-    except psycopg2.Error as e:
-        print(f"❌ Error creando esquema: {e}")
+        applied = migrate(conn)
+    except (psycopg2.Error, ValueError) as e:
+        print(f"❌ Error aplicando migraciones: {e}")
         conn.rollback()
+        sys.exit(1)
+    for migration in applied:
+        print(f"✅ Migración {migration.version:04d}_{migration.name} aplicada")
+    if not applied:
+        print("✅ Esquema de base de datos al día")
+
+def get_watermark(cursor, table):
+    """Última fecha cargada de una tabla, o None si nunca se cargó"""
+    cursor.execute("SELECT watermark FROM etl_watermarks WHERE table_name = %s", (table,))
+    row = cursor.fetchone()
+    return pd.Timestamp(row[0]) if row and row[0] else None
+
+def set_watermark(cursor, table, watermark, rows_merged):
+    """Avanzar la marca de agua de una tabla (nunca hacia atrás)"""
+    cursor.execute("""
+        INSERT INTO etl_watermarks (table_name, column_name, watermark, rows_merged, updated_at)
+        VALUES (%s, %s, %s, %s, now())
+        ON CONFLICT (table_name) DO UPDATE SET
+            watermark = GREATEST(etl_watermarks.watermark, EXCLUDED.watermark),
+            rows_merged = etl_watermarks.rows_merged + EXCLUDED.rows_merged,
+            updated_at = now()
+    """, (table, WATERMARK_COLUMNS.get(table, ''), watermark, rows_merged))
+
+def file_fingerprint(path, block=FINGERPRINT_BLOCK):
+    """Huella barata de un archivo: tamaño y blake2b del primer y del último bloque"""
+    size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(block))
+        if size > block:
+            f.seek(max(size - block, block))
+            digest.update(f.read(block))
+    return f"{size}:{digest.hexdigest()}"
+
+def get_checkpoint(cursor, table):
+    """Punto de control de la última carga de una tabla, o None"""
+    cursor.execute("""
+        SELECT source_file, fingerprint, last_chunk, rows_read, rows_committed, rows_rejected, status,
+               source_digest
+        FROM etl_checkpoints WHERE table_name = %s
+    """, (table,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    keys = ['source_file', 'fingerprint', 'last_chunk', 'rows_read', 'rows_committed', 'rows_rejected', 'status',
+            'source_digest']
+    return dict(zip(keys, row))
+
+def save_checkpoint(cursor, table, checkpoint):
+    """Guardar el punto de control; se confirma en la misma transacción que el bloque"""
+    cursor.execute("""
+        INSERT INTO etl_checkpoints (table_name, source_file, fingerprint, last_chunk, rows_read,
+                                     rows_committed, rows_rejected, status, source_digest, updated_at)
+        VALUES (%(table)s, %(source_file)s, %(fingerprint)s, %(last_chunk)s, %(rows_read)s,
+                %(rows_committed)s, %(rows_rejected)s, %(status)s, %(source_digest)s, now())
+        ON CONFLICT (table_name) DO UPDATE SET
+            source_file = EXCLUDED.source_file, fingerprint = EXCLUDED.fingerprint,
+            last_chunk = EXCLUDED.last_chunk, rows_read = EXCLUDED.rows_read,
+            rows_committed = EXCLUDED.rows_committed, rows_rejected = EXCLUDED.rows_rejected,
+            status = EXCLUDED.status, source_digest = EXCLUDED.source_digest, updated_at = now()
+    """, {'table': table, **checkpoint, 'source_digest': Json(checkpoint.get('source_digest') or {})})
+
+def open_csv_at_row(csv_file, skip_rows=0):
+    """Abrir un CSV saltando la cabecera y `skip_rows` filas de datos; devuelve (archivo, columnas)"""
+    f = open(csv_file, 'r', encoding='utf-8', newline='')
+    header = next(csv.reader([f.readline()]))
+    # Las filas ya confirmadas no se vuelven a parsear: solo se recorren las líneas
+    deque(islice(f, skip_rows), maxlen=0)
+    return f, header
+
+def create_staging_table(cursor, table):
+    """Tabla temporal con la estructura de `table`, descartada al confirmar"""
+    staging = f"{table}_incoming"
+    cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+    return staging
 
-def insert_users(conn, csv_file):
+def merge_staging(cursor, staging, table, columns, key, distinct_on=None):
+    """Fusionar staging en la tabla: inserta filas nuevas y actualiza solo las que cambiaron
+    
+    `key` es la columna (o tupla de columnas) del conflicto; `distinct_on`, si la
+    identidad de la fila es más estrecha que la clave, elige una fila por identidad.
+    """
+    keys = [key] if isinstance(key, str) else list(key)
+    key = ', '.join(keys)
+    distinct_on = distinct_on or key
+    column_list = ', '.join(columns)
+    updates = [c for c in columns if c not in keys]
+    assignments = ', '.join(f"{c} = EXCLUDED.{c}" for c in updates)
+    current = ', '.join(f"{table}.{c}" for c in updates)
+    incoming = ', '.join(f"EXCLUDED.{c}" for c in updates)
+    # DISTINCT ON: una misma clave repetida en el origen no puede actualizarse dos veces
+    cursor.execute(f"""
+        INSERT INTO {table} ({column_list})
+        SELECT DISTINCT ON ({distinct_on}) {column_list} FROM {staging} ORDER BY {distinct_on}
+        ON CONFLICT ({key}) DO UPDATE SET {assignments}
+        WHERE ({current}) IS DISTINCT FROM ({incoming})
+    """)
+    return cursor.rowcount
+
+def _escape_copy_text(series):
+    """Escapar valores de texto para el formato text de COPY"""
+    return (series.str.replace('\\', '\\\\', regex=False)
+                  .str.replace('\t', '\\t', regex=False)
+                  .str.replace('\n', '\\n', regex=False)
+                  .str.replace('\r', '\\r', regex=False))
+
+def copy_rows(cursor, table, columns, df, copy_format='csv', column_types=None, telemetry=None):
+    """Enviar un DataFrame a una tabla con COPY ... FROM STDIN a través de un buffer en memoria"""
+    # Un bloque vacío no se envía: en formato text sería una línea vacía, que COPY lee como fila
+    if len(df) == 0:
+        return 0
+    buffer = io.StringIO()
+    frame = df[columns]
+    if copy_format == 'binary':
+        # Columnas tipadas codificadas directamente en el formato binario de PostgreSQL
+        column_types = column_types or COLUMN_TYPES[table]
+        buffer = io.BytesIO(encode_binary_copy(frame, {c: column_types[c] for c in columns}))
+        options = "FORMAT binary"
+    elif copy_format == 'text':
+        # Formato text: campos separados por tabuladores, \N para NULL
+        fields = [(_escape_copy_text(frame[c].astype(str)) if pd.api.types.is_string_dtype(frame[c])
+                   else frame[c].astype(str)).where(frame[c].notna(), '\\N') for c in columns]
+        lines = fields[0].str.cat(fields[1:], sep='\t')
+        buffer.write('\n'.join(lines))
+        buffer.write('\n')
+        options = "FORMAT text"
+    else:
+        # En CSV un campo vacío sin comillas es NULL
+        frame.to_csv(buffer, index=False, header=False)
+        options = "FORMAT csv"
+    buffer.seek(0)
+    started = time.perf_counter()
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH ({options})", buffer)
+    if telemetry is not None:
+        # Tras el COPY el buffer está al final: su posición es el tamaño enviado
+        telemetry.record_batch(len(frame), buffer.tell(), time.perf_counter() - started)
+    return len(frame)
+
+def add_session_partitions(cursor, table, sessions, partitions, unlogged=False):
+    """Crear las particiones mensuales que faltan para un bloque; `partitions` se actualiza"""
+    if partitions is None:
+        return
+    missing = [m for m in months_of(sessions['watch_date']) if partition_name(table, m) not in partitions]
+    if missing:
+        partitions.update(ensure_partitions(cursor, table, missing, unlogged))
+
+def copy_sessions(cursor, table, sessions, copy_format='csv', telemetry=None, partitions=None):
+    """COPY de un bloque de sesiones directamente a la partición de cada mes
+    
+    Sin enrutado fila a fila en el servidor y con bloqueos solo en las particiones
+    tocadas. Los meses sin partición van a la tabla padre (partición DEFAULT);
+    partitions=None para una tabla sin particionar.
+    """
+    if partitions is None:
+        return copy_rows(cursor, table, SESSION_COLUMNS, sessions, copy_format, SESSION_COLUMN_TYPES, telemetry)
+    inserted = 0
+    for month, rows in split_by_month(sessions, 'watch_date'):
+        name = partition_name(table, month)
+        target = name if name in partitions else table
+        inserted += copy_rows(cursor, target, SESSION_COLUMNS, rows, copy_format, SESSION_COLUMN_TYPES, telemetry)
+    return inserted
+
+def session_months(csv_file):
+    """Meses distintos de watch_date en el CSV de sesiones (lectura de una sola columna)"""
+    months = set()
+    for chunk in pd.read_csv(csv_file, usecols=['watch_date'], chunksize=1_000_000):
+        months.update(months_of(pd.to_datetime(chunk['watch_date'], errors='coerce')))
+    return sorted(months)
+
+def load_telemetry(label, cursor=None, total_rows=None, quiet=False):
+    """Telemetría de una carga; con cursor mide además el round-trip con SELECT 1 en cada informe"""
+    ping = (lambda: cursor.execute("SELECT 1")) if cursor is not None else None
+    return LoadTelemetry(label, total_rows=total_rows, ping=ping, quiet=quiet)
+
+def insert_users(conn, csv_file, method='copy', copy_format='csv'):
     """Insertar usuarios desde CSV"""
     try:
         print(f"📊 Cargando usuarios desde {csv_file}...")
         df = pd.read_csv(csv_file)
         
         cursor = conn.cursor()
+        telemetry = load_telemetry("Usuarios", cursor, len(df))
         
         # Limpiar tabla existente
         cursor.execute("TRUNCATE TABLE users CASCADE;")
         
+        if method == 'copy':
+            df['age'] = df['age'].astype(int)
+            df['total_watch_time_hours'] = df['total_watch_time_hours'].astype(float)
+            inserted = copy_rows(cursor, 'users', USER_COLUMNS, df, copy_format, telemetry=telemetry)
+            with telemetry.round_trip():
+                conn.commit()
+            cursor.close()
+            print(f"✅ {inserted} usuarios insertados correctamente (COPY {copy_format})")
+            telemetry.finish()
+            return
+        
         # Preparar datos para inserción
         users_data = []
         for _, row in df.iterrows():
@@ -80,11 +295,14 @@ def insert_users(conn, csv_file):
         VALUES %s
         """
         
-        execute_values(cursor, insert_query, users_data)
-        conn.commit()
+        with telemetry.batch(len(users_data)):
+            execute_values(cursor, insert_query, users_data)
+        with telemetry.round_trip():
+            conn.commit()
         cursor.close()
         
         print(f"✅ {len(users_data)} usuarios insertados correctamente")
+        telemetry.finish()
         
     except Exception as e:
         print(f"❌ Error insertando usuarios: {e}")
@@ -95,52 +313,13 @@ def insert_content(conn, json_file):
     try:
         print(f"🎬 Cargando contenido desde {json_file}...")
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            content_data = json.load(f)
+        content_data_list, movies, series = read_content_rows(json_file)
         
         cursor = conn.cursor()
         
         # Limpiar tabla existente
         cursor.execute("TRUNCATE TABLE content CASCADE;")
         
-        content_data_list = []
-        
-        # Procesar películas
-        movies = content_data.get('movies', [])
-        for movie in movies:
-            content_data_list.append((
-                movie['content_id'],
-                movie['title'],
-                json.dumps(movie['genre']),  # Convertir lista a JSON string
-                'movie',
-                movie['duration_minutes'],
-                movie['release_year'],
-                movie['rating'],
-                movie['views_count'],
-                movie['production_budget'],
-                None,  # seasons
-                None,  # episodes_per_season
-                None   # avg_episode_duration
-            ))
-        
-        # Procesar series
-        series = content_data.get('series', [])
-        for serie in series:
-            content_data_list.append((
-                serie['content_id'],
-                serie['title'],
-                json.dumps(serie['genre']),  # Convertir lista a JSON string
-                'series',
-                serie['avg_episode_duration'],
-                None,  # release_year (no disponible para series)
-                serie['rating'],
-                serie['total_views'],
-                serie['production_budget'],
-                serie['seasons'],
-                json.dumps(serie['episodes_per_season']),  # Convertir lista a JSON string
-                serie['avg_episode_duration']
-            ))
-        
         # Insertar datos
         insert_query = """
         INSERT INTO content (content_id, title, genre, content_type, duration_minutes, 
@@ -150,73 +329,617 @@ def insert_content(conn, json_file):
         """
         
         execute_values(cursor, insert_query, content_data_list)
+        # TRUNCATE ... CASCADE también vació content_genre
+        genres, _ = sync_content_genres(cursor)
         conn.commit()
         cursor.close()
         
         print(f"✅ {len(content_data_list)} elementos de contenido insertados correctamente")
         print(f"   - Películas: {len(movies)}")
         print(f"   - Series: {len(series)}")
+        print(f"   - Pares contenido-género: {genres}")
         
     except Exception as e:
         print(f"❌ Error insertando contenido: {e}")
         conn.rollback()
 
-def insert_sessions(conn, csv_file):
-    """Insertar sesiones de visualización desde CSV"""
+def read_content_rows(json_file):
+    """Filas de la tabla content (en el orden de CONTENT_COLUMNS) desde el JSON; devuelve (filas, películas, series)"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        content_data = json.load(f)
+    
+    content_data_list = []
+    
+    # Procesar películas
+    movies = content_data.get('movies', [])
+    for movie in movies:
+        content_data_list.append((
+            movie['content_id'],
+            movie['title'],
+            json.dumps(movie['genre']),  # Convertir lista a JSON string
+            'movie',
+            movie['duration_minutes'],
+            movie['release_year'],
+            movie['rating'],
+            movie['views_count'],
+            movie['production_budget'],
+            None,  # seasons
+            None,  # episodes_per_season
+            None   # avg_episode_duration
+        ))
+    
+    # Procesar series
+    series = content_data.get('series', [])
+    for serie in series:
+        content_data_list.append((
+            serie['content_id'],
+            serie['title'],
+            json.dumps(serie['genre']),  # Convertir lista a JSON string
+            'series',
+            serie['avg_episode_duration'],
+            None,  # release_year (no disponible para series)
+            serie['rating'],
+            serie['total_views'],
+            serie['production_budget'],
+            serie['seasons'],
+            json.dumps(serie['episodes_per_season']),  # Convertir lista a JSON string
+            serie['avg_episode_duration']
+        ))
+    
+    return content_data_list, movies, series
+
+def prepare_session_chunk(chunk):
+    """Validar y convertir los tipos de un bloque de sesiones; devuelve (válidas, rechazadas)"""
+    chunk['watch_date'] = pd.to_datetime(chunk['watch_date'], errors='coerce')
+    chunk['watch_duration_minutes'] = pd.to_numeric(chunk['watch_duration_minutes'], errors='coerce')
+    chunk['completion_percentage'] = pd.to_numeric(chunk['completion_percentage'], errors='coerce')
+    
+    valid = (chunk[['session_id', 'user_id', 'content_id', 'watch_date']].notna().all(axis=1)
+             & (chunk['watch_duration_minutes'] >= 0)
+             & chunk['completion_percentage'].between(0, 100))
+    
+    sessions = chunk.loc[valid, SESSION_COLUMNS].copy()
+    sessions['watch_duration_minutes'] = sessions['watch_duration_minutes'].astype('int64')
+    sessions['completion_percentage'] = sessions['completion_percentage'].round(2)
+    return sessions, chunk.loc[~valid]
+
+def read_session_chunks(csv_file, sizer=None, validator=None, **read_csv_kwargs):
+    """Leer el CSV (o un buffer) de sesiones por bloques acotados, validando cada uno
+    
+    Con un ReferenceValidator las sesiones con user_id o content_id desconocidos
+    pasan también a las rechazadas, antes de llegar a la base de datos.
+    """
+    sizer = sizer or ChunkSizer(min_rows=10_000, max_rows=500_000)
+    string_columns = {c: 'string' for c in ['session_id', 'user_id', 'content_id', 'device_type', 'quality_level']}
+    convert = prepare_session_chunk
+    if validator is not None:
+        convert = lambda chunk: validator.split(*prepare_session_chunk(chunk))
+    return read_csv_chunks(csv_file, sizer, convert=convert, dtype=string_columns, **read_csv_kwargs)
+
+def insert_sessions(conn, csv_file, method='copy', copy_format='csv', resume=False, validator=None, rejects=None):
+    """Insertar sesiones de visualización desde CSV en streaming, confirmando bloque a bloque
+    
+    Cada bloque se confirma junto con su punto de control en etl_checkpoints; con
+    resume=True la carga continúa tras el último bloque confirmado del mismo archivo.
+    Devuelve el resumen por mes (PartitionDigest) de todas las filas cargadas.
+    """
     try:
         print(f"📺 Cargando sesiones desde {csv_file}...")
-        df = pd.read_csv(csv_file)
+        cursor = conn.cursor()
+        
+        fingerprint = file_fingerprint(csv_file)
+        checkpoint = get_checkpoint(cursor, 'viewing_sessions') if resume else None
+        if resume:
+            if checkpoint is None or checkpoint['fingerprint'] != fingerprint:
+                print("❌ No hay un punto de control de este archivo para reanudar; ejecuta una carga completa")
+                return None
+            if checkpoint['status'] == 'done':
+                print(f"✅ La carga de {csv_file} ya estaba completa ({checkpoint['rows_committed']:,} sesiones)")
+                return PartitionDigest.from_dict(checkpoint['source_digest'])
+            print(f"↩️  Reanudando tras el bloque {checkpoint['last_chunk']} "
+                  f"({checkpoint['rows_read']:,} filas ya procesadas)")
+        else:
+            # Limpiar tabla existente (y sus agregados, que se vuelven a sumar bloque a bloque)
+            cursor.execute("TRUNCATE TABLE viewing_sessions CASCADE;")
+            clear_aggregates(cursor)
+            checkpoint = {'source_file': os.path.abspath(csv_file), 'fingerprint': fingerprint, 'last_chunk': 0,
+                          'rows_read': 0, 'rows_committed': 0, 'rows_rejected': 0, 'status': 'running',
+                          'source_digest': {}}
+            save_checkpoint(cursor, 'viewing_sessions', checkpoint)
+            conn.commit()
+        
+        insert_query = """
+        INSERT INTO viewing_sessions (session_id, user_id, content_id, watch_date, 
+                                    watch_duration_minutes, completion_percentage, 
+                                    device_type, quality_level)
+        VALUES %s
+        """
+        
+        # Cada bloque se valida y se escribe antes de leer el siguiente: memoria pico fija
+        sizer = ChunkSizer(min_rows=10_000, max_rows=500_000)
+        partitions = partition_names(cursor, 'viewing_sessions')
+        telemetry = load_telemetry("Sesiones", cursor, max(estimate_csv_rows(csv_file) - checkpoint['rows_read'], 0))
+        # El resumen para la reconciliación viaja en el punto de control y sobrevive a los reinicios
+        digest = PartitionDigest.from_dict(checkpoint['source_digest'])
+        source, header = open_csv_at_row(csv_file, checkpoint['rows_read'])
+        with source:
+            for sessions, rejected in read_session_chunks(source, sizer, validator, names=header, header=None):
+                # Las particiones nuevas se confirman junto con el bloque que las necesita
+                add_session_partitions(cursor, 'viewing_sessions', sessions, partitions)
+                if method == 'copy':
+                    copy_sessions(cursor, 'viewing_sessions', sessions, copy_format, telemetry, partitions)
+                else:
+                    with telemetry.batch(len(sessions)):
+                        execute_values(cursor, insert_query, list(sessions.itertuples(index=False, name=None)))
+                # Los agregados se confirman con el bloque: nunca cuentan filas no cargadas
+                add_session_batch(cursor, sessions)
+                checkpoint['last_chunk'] += 1
+                checkpoint['rows_read'] += len(sessions) + len(rejected)
+                checkpoint['rows_committed'] += len(sessions)
+                checkpoint['rows_rejected'] += len(rejected)
+                checkpoint['source_digest'] = digest.update(sessions).to_dict()
+                save_checkpoint(cursor, 'viewing_sessions', checkpoint)
+                with telemetry.round_trip():
+                    conn.commit()
+                if rejects is not None:
+                    rejects.write(rejected)
+        print(f"   Bloques: {sizer.describe()}")
+        
+        checkpoint['status'] = 'done'
+        save_checkpoint(cursor, 'viewing_sessions', checkpoint)
+        conn.commit()
+        cursor.close()
+        
+        print(f"✅ {checkpoint['rows_committed']} sesiones de visualización insertadas correctamente")
+        if checkpoint['rows_rejected']:
+            print(f"⚠️  {checkpoint['rows_rejected']} sesiones rechazadas por datos inválidos")
+        telemetry.finish()
+        return digest
         
+    except Exception as e:
+        print(f"❌ Error insertando sesiones: {e}")
+        print("   Los bloques confirmados se conservan: reanuda con --resume")
+        conn.rollback()
+        return None
+
+class _ByteRange(io.RawIOBase):
+    """Vista de solo lectura de un archivo que termina en un offset dado"""
+    
+    def __init__(self, f, end):
+        self.f = f
+        self.end = end
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        remaining = self.end - self.f.tell()
+        if remaining <= 0:
+            return 0
+        return self.f.readinto(memoryview(buffer)[:remaining])
+
+def split_byte_ranges(csv_file, parts):
+    """Dividir un CSV en `parts` rangos de bytes alineados a fin de línea; devuelve (cabecera, rangos)"""
+    size = os.path.getsize(csv_file)
+    with open(csv_file, 'rb') as f:
+        header = f.readline().decode('utf-8').strip().split(',')
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, parts):
+            f.seek(max(data_start + (size - data_start) * i // parts, bounds[-1]))
+            if f.tell() > data_start:
+                f.readline()  # avanzar hasta el inicio de la siguiente línea completa
+            bounds.append(min(f.tell(), size))
+        bounds.append(size)
+    ranges = [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+    return header, ranges
+
+def _load_session_range(args):
+    """Worker: cargar con COPY un rango de bytes del CSV de sesiones en su propia conexión
+    
+    La conexión sale del pool del proceso: un worker que recibe varios rangos la reutiliza.
+    """
+    csv_file, header, start, end, copy_format, budget_bytes, validator, rejects_part, partitions = args
+    rejects = RejectWriter(rejects_part) if rejects_part else None
+    with pg_connection() as conn:
         cursor = conn.cursor()
+        telemetry = LoadTelemetry("Rango", quiet=True)
+        sizer = ChunkSizer(budget_bytes=budget_bytes, min_rows=10_000, max_rows=500_000)
+        inserted = rejected = 0
+        digest = PartitionDigest()
+        with open(csv_file, 'rb') as f:
+            f.seek(start)
+            source = io.BufferedReader(_ByteRange(f, end))
+            for sessions, invalid in read_session_chunks(source, sizer, validator, names=header, header=None):
+                # Sin agregados por bloque: los workers se bloquearían en las mismas claves calientes
+                inserted += copy_sessions(cursor, 'viewing_sessions', sessions, copy_format, telemetry, partitions)
+                rejected += len(invalid)
+                digest.update(sessions)
+                if rejects is not None:
+                    rejects.write(invalid)
+        with telemetry.round_trip():
+            conn.commit()
+        cursor.close()
+        return inserted, rejected, digest.to_dict(), telemetry.state()
+
+def insert_sessions_parallel(conn, csv_file, workers, copy_format='csv', validator=None, rejects=None):
+    """Insertar sesiones con COPY en paralelo: un rango de bytes del CSV por conexión
+    
+    Devuelve el PartitionDigest, o None si algún rango falló (la tabla queda incompleta).
+    """
+    try:
+        print(f"📺 Cargando sesiones desde {csv_file} con {workers} conexiones...")
+        telemetry = load_telemetry("Sesiones", total_rows=estimate_csv_rows(csv_file))
         
-        # Limpiar tabla existente
+        # Vaciar la tabla antes de repartir: cada worker confirma su propio rango
+        cursor = conn.cursor()
         cursor.execute("TRUNCATE TABLE viewing_sessions CASCADE;")
+        clear_aggregates(cursor)
+        # Los rangos no se pueden reanudar: sin punto de control, --resume no confía en una carga a medias
+        cursor.execute("DELETE FROM etl_checkpoints WHERE table_name = 'viewing_sessions'")
+        # Crear una partición exige un bloqueo exclusivo de la tabla padre, que chocaría con
+        # los COPY abiertos de los demás workers: todas se crean antes de repartir
+        partitions = partition_names(cursor, 'viewing_sessions')
+        if partitions is not None:
+            partitions.update(ensure_partitions(cursor, 'viewing_sessions', session_months(csv_file)))
+        conn.commit()
+        cursor.close()
         
-        # Preparar datos para inserción
-        sessions_data = []
-        for _, row in df.iterrows():
-            sessions_data.append((
-                row['session_id'],
-                row['user_id'],
-                row['content_id'],
-                row['watch_date'],
-                int(row['watch_duration_minutes']),
-                float(row['completion_percentage']),
-                row['device_type'],
-                row['quality_level']
-            ))
+        header, ranges = split_byte_ranges(csv_file, workers)
+        # El presupuesto de memoria se reparte entre los procesos
+        budget_bytes = memory_budget_bytes() // max(len(ranges), 1)
+        # Cada worker escribe sus rechazos aparte; se juntan en orden al terminar
+        tasks = [(csv_file, header, start, end, copy_format, budget_bytes, validator,
+                  f"{rejects.path}.{start}" if rejects is not None else None, partitions) for start, end in ranges]
         
-        # Insertar datos en lotes para mejor rendimiento
-        batch_size = 1000
         total_inserted = 0
+        total_rejected = 0
+        digest = PartitionDigest()
+        failures = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_load_session_range, task): task for task in tasks}
+            for future in as_completed(futures):
+                _, _, start, end = futures[future][:4]
+                try:
+                    inserted, rejected, partitions, worker_telemetry = future.result()
+                except Exception as e:
+                    failures.append((start, end, e))
+                    continue
+                total_inserted += inserted
+                total_rejected += rejected
+                digest.merge(PartitionDigest.from_dict(partitions))
+                telemetry.merge(worker_telemetry)
+                print(f"   Rango {start:,}-{end:,}: {inserted:,} sesiones")
+        if rejects is not None:
+            for task in tasks:
+                rejects.absorb(task[7])
         
-        for i in range(0, len(sessions_data), batch_size):
-            batch = sessions_data[i:i + batch_size]
-            
-            insert_query = """
-            INSERT INTO viewing_sessions (session_id, user_id, content_id, watch_date, 
-                                        watch_duration_minutes, completion_percentage, 
-                                        device_type, quality_level)
-            VALUES %s
-            """
-            
-            execute_values(cursor, insert_query, batch)
-            total_inserted += len(batch)
-            
-            if i % 5000 == 0:  # Mostrar progreso cada 5000 registros
-                print(f"   Procesados {total_inserted}/{len(sessions_data)} sesiones...")
+        if failures:
+            for start, end, e in failures:
+                print(f"❌ Error cargando el rango {start:,}-{end:,}: {e}")
+            print(f"❌ Carga de sesiones incompleta: {len(failures)} de {len(ranges)} rangos fallaron "
+                  f"({total_inserted:,} sesiones confirmadas); repite la carga completa")
+            return None
         
+        # Los agregados se calculan una sola vez, con todos los rangos ya confirmados
+        cursor = conn.cursor()
+        rebuild_aggregates(cursor)
+        save_checkpoint(cursor, 'viewing_sessions', {
+            'source_file': os.path.abspath(csv_file), 'fingerprint': file_fingerprint(csv_file),
+            'last_chunk': len(ranges), 'rows_read': total_inserted + total_rejected,
+            'rows_committed': total_inserted, 'rows_rejected': total_rejected, 'status': 'done',
+            'source_digest': digest.to_dict()})
         conn.commit()
         cursor.close()
         
         print(f"✅ {total_inserted} sesiones de visualización insertadas correctamente")
+        if total_rejected:
+            print(f"⚠️  {total_rejected} sesiones rechazadas por datos inválidos")
+        telemetry.finish()
+        return digest
         
     except Exception as e:
         print(f"❌ Error insertando sesiones: {e}")
         conn.rollback()
+        return None
 
-def verify_data(conn):
-    """Verificar que los datos se insertaron correctamente"""
+def insert_users_incremental(conn, csv_file, copy_format='csv'):
+    """Fusionar usuarios registrados desde la marca de agua (sin TRUNCATE)"""
+    try:
+        print(f"📊 Cargando usuarios nuevos o modificados desde {csv_file}...")
+        cursor = conn.cursor()
+        telemetry = load_telemetry("Usuarios (incremental)", cursor)
+        
+        df = pd.read_csv(csv_file)
+        df['registration_date'] = pd.to_datetime(df['registration_date'], errors='coerce')
+        df['age'] = df['age'].astype(int)
+        df['total_watch_time_hours'] = df['total_watch_time_hours'].astype(float)
+        
+        # La marca de agua es inclusiva: el último día pudo cargarse a medias
+        watermark = get_watermark(cursor, 'users')
+        if watermark is not None:
+            df = df[df['registration_date'] >= watermark]
+        
+        staging = create_staging_table(cursor, 'users')
+        copy_rows(cursor, staging, USER_COLUMNS, df, copy_format, USER_COLUMN_TYPES, telemetry)
+        merged = merge_staging(cursor, staging, 'users', USER_COLUMNS, 'user_id')
+        if len(df):
+            set_watermark(cursor, 'users', df['registration_date'].max().date(), merged)
+        with telemetry.round_trip():
+            conn.commit()
+        cursor.close()
+        
+        print(f"✅ {merged} usuarios insertados o actualizados ({len(df)} leídos desde {watermark or 'el inicio'})")
+        telemetry.finish()
+        
+    except Exception as e:
+        print(f"❌ Error fusionando usuarios: {e}")
+        conn.rollback()
+
+def insert_content_incremental(conn, json_file):
+    """Fusionar el catálogo completo: solo se escriben los elementos nuevos o modificados"""
+    try:
+        print(f"🎬 Fusionando contenido desde {json_file}...")
+        content_data_list, _, _ = read_content_rows(json_file)
+        
+        cursor = conn.cursor()
+        staging = create_staging_table(cursor, 'content')
+        execute_values(cursor, f"INSERT INTO {staging} ({', '.join(CONTENT_COLUMNS)}) VALUES %s",
+                       content_data_list)
+        merged = merge_staging(cursor, staging, 'content', CONTENT_COLUMNS, 'content_id')
+        added, removed = sync_content_genres(cursor)
+        conn.commit()
+        cursor.close()
+        
+        print(f"✅ {merged} elementos de contenido insertados o actualizados de {len(content_data_list)}")
+        if added or removed:
+            print(f"   - Géneros: {added} pares añadidos, {removed} eliminados")
+        
+    except Exception as e:
+        print(f"❌ Error fusionando contenido: {e}")
+        conn.rollback()
+
+def insert_sessions_incremental(conn, csv_file, copy_format='csv', validator=None, rejects=None):
+    """Fusionar sesiones desde la marca de agua a través de una tabla de staging (sin TRUNCATE)"""
+    try:
+        print(f"📺 Cargando sesiones nuevas o modificadas desde {csv_file}...")
+        cursor = conn.cursor()
+        telemetry = load_telemetry("Sesiones (incremental)", cursor)
+        
+        watermark = get_watermark(cursor, 'viewing_sessions')
+        staging = create_staging_table(cursor, 'viewing_sessions')
+        partitions = partition_names(cursor, 'viewing_sessions')
+        
+        sizer = ChunkSizer(min_rows=10_000, max_rows=500_000)
+        total_staged = 0
+        total_rejected = 0
+        newest = None
+        for sessions, rejected in read_session_chunks(csv_file, sizer, validator):
+            if watermark is not None:
+                sessions = sessions[sessions['watch_date'] >= watermark]
+            total_rejected += len(rejected)
+            if rejects is not None:
+                rejects.write(rejected)
+            if len(sessions) == 0:
+                continue
+            copy_rows(cursor, staging, SESSION_COLUMNS, sessions, copy_format, SESSION_COLUMN_TYPES, telemetry)
+            add_session_partitions(cursor, 'viewing_sessions', sessions, partitions)
+            total_staged += len(sessions)
+            chunk_newest = sessions['watch_date'].max()
+            newest = chunk_newest if newest is None else max(newest, chunk_newest)
+        
+        # Fusión, marca de agua y staging en la misma transacción
+        # Una sola fila por sesión (la última del origen), igual para los agregados y la fusión
+        cursor.execute(f"""
+            DELETE FROM {staging} a USING {staging} b
+            WHERE a.session_id = b.session_id AND a.ctid < b.ctid
+        """)
+        # Agregados: se restan las versiones en vivo que cambian y se suman las nuevas
+        apply_server_deltas(cursor, changed_sessions_sql(staging))
+        # La clave incluye watch_date: una sesión que cambió de fecha se quita de su mes anterior
+        cursor.execute(f"""
+            DELETE FROM viewing_sessions v USING {staging} s
+            WHERE v.session_id = s.session_id AND v.watch_date <> s.watch_date
+        """)
+        merged = merge_staging(cursor, staging, 'viewing_sessions', SESSION_COLUMNS, SESSION_KEY, 'session_id')
+        if newest is not None:
+            set_watermark(cursor, 'viewing_sessions', newest.date(), merged)
+        with telemetry.round_trip():
+            conn.commit()
+        cursor.close()
+        
+        print(f"✅ {merged} sesiones insertadas o actualizadas "
+              f"({total_staged} leídas desde {watermark or 'el inicio'})")
+        if total_rejected:
+            print(f"⚠️  {total_rejected} sesiones rechazadas por datos inválidos")
+        telemetry.finish()
+        
+    except Exception as e:
+        print(f"❌ Error fusionando sesiones: {e}")
+        conn.rollback()
+
+def reload_sessions_month(conn, csv_file, month, copy_format='csv', validator=None, rejects=None):
+    """Recargar un mes de sesiones sustituyendo su partición, sin DELETE ni TRUNCATE
+    
+    El mes se carga en una tabla aparte con sus índices y se intercambia con la
+    partición en vivo (DROP + ATTACH) en una transacción corta.
+    """
+    try:
+        print(f"📺 Recargando las sesiones de {month} desde {csv_file}...")
+        telemetry = load_telemetry(f"Sesiones {month}")
+        rejected_rows = 0
+        
+        def load(cursor, target):
+            nonlocal rejected_rows
+            sizer = ChunkSizer(min_rows=10_000, max_rows=500_000)
+            inserted = 0
+            for sessions, rejected in read_session_chunks(csv_file, sizer, validator):
+                in_month = sessions[sessions['watch_date'].dt.to_period('M') == month]
+                inserted += copy_rows(cursor, target, SESSION_COLUMNS, in_month, copy_format, SESSION_COLUMN_TYPES,
+                                      telemetry)
+                rejected = rejected[rejected['watch_date'].dt.to_period('M') == month]
+                rejected_rows += len(rejected)
+                if rejects is not None:
+                    rejects.write(rejected)
+            return inserted
+        
+        def swap_aggregates(cursor, old, new):
+            # El mes reemplazado sale de los agregados y entra el recargado
+            if old is not None:
+                apply_server_deltas(cursor, table_sessions_sql(old, -1))
+            apply_server_deltas(cursor, table_sessions_sql(new, 1))
+        
+        rows = reload_partition(conn, 'viewing_sessions', month, load, swap_aggregates)
+        print(f"✅ {rows} sesiones de {month} cargadas en {partition_name('viewing_sessions', month)}")
+        if rejected_rows:
+            print(f"⚠️  {rejected_rows} sesiones rechazadas por datos inválidos")
+        telemetry.finish()
+        
+    except Exception as e:
+        print(f"❌ Error recargando las sesiones de {month}: {e}")
+        conn.rollback()
+
+def apply_retention(conn, months):
+    """Eliminar las particiones de sesiones anteriores a los últimos `months` meses cargados"""
+    cursor = conn.cursor()
+    partitions = monthly_partitions(cursor, 'viewing_sessions')
+    cursor.close()
+    if not partitions:
+        return
+    # Los datos son históricos: la ventana se cuenta desde el mes más reciente, no desde hoy
+    cutoff = max(partitions) - (months - 1)
+    # Las sesiones de cada partición se restan de los agregados antes de eliminarla
+    dropped = drop_partitions_before(conn, 'viewing_sessions', cutoff,
+                                     lambda cursor, name: apply_server_deltas(cursor, table_sessions_sql(name, -1)))
+    print(f"🗑️  Retención de {months} meses (desde {cutoff}): {len(dropped)} particiones eliminadas")
+
+def refresh_summaries(conn):
+    """Refrescar las vistas materializadas de resumen tras una carga"""
+    try:
+        for name, seconds, concurrently in refresh_materialized_views(conn):
+            mode = "CONCURRENTLY" if concurrently else "completo"
+            print(f"🔄 {name} refrescada ({mode}) en {seconds:.2f}s")
+    except psycopg2.Error as e:
+        print(f"❌ Error refrescando vistas materializadas: {e}")
+        conn.rollback()
+
+def load_swap(conn, copy_format='csv', parallel_builds=4, total_memory_mb=None, validator=None, rejects=None):
+    """Carga blue/green: COPY a tablas UNLOGGED de staging, índices allí y cambio atómico por renombrado
+    
+    Devuelve el PartitionDigest de las sesiones cargadas.
+    """
+    # content_genre después de content: su FK necesita la PK de la copia de content
+    tables = ['users', 'content', BRIDGE_TABLE, 'viewing_sessions']
+    staging = {table: create_swap_table(conn, table) for table in tables}
+    cursor = conn.cursor()
+    telemetry = load_telemetry("Staging", cursor)
+    
+    # Las tablas en vivo siguen intactas y legibles durante toda la carga
+    print(f"📊 Cargando usuarios en {staging['users']}...")
+    users = pd.read_csv('users.csv')
+    users['age'] = users['age'].astype(int)
+    users['total_watch_time_hours'] = users['total_watch_time_hours'].astype(float)
+    copy_rows(cursor, staging['users'], USER_COLUMNS, users, copy_format, USER_COLUMN_TYPES, telemetry)
+    
+    print(f"🎬 Cargando contenido en {staging['content']}...")
+    content_data_list, _, _ = read_content_rows('content.json')
+    with telemetry.batch(len(content_data_list)):
+        execute_values(cursor, f"INSERT INTO {staging['content']} ({', '.join(CONTENT_COLUMNS)}) VALUES %s",
+                       content_data_list)
+    sync_content_genres(cursor, staging['content'], staging[BRIDGE_TABLE])
+    
+    print(f"📺 Cargando sesiones en {staging['viewing_sessions']}...")
+    sizer = ChunkSizer(min_rows=10_000, max_rows=500_000)
+    partitions = partition_names(cursor, staging['viewing_sessions'])
+    if partitions is not None:
+        partitions.add(ensure_default_partition(cursor, staging['viewing_sessions'], unlogged=True))
+    total_inserted = 0
+    total_rejected = 0
+    digest = PartitionDigest()
+    for sessions, rejected in read_session_chunks('viewing_sessions.csv', sizer, validator):
+        add_session_partitions(cursor, staging['viewing_sessions'], sessions, partitions, unlogged=True)
+        total_inserted += copy_sessions(cursor, staging['viewing_sessions'], sessions, copy_format, telemetry,
+                                        partitions)
+        total_rejected += len(rejected)
+        digest.update(sessions)
+        if rejects is not None:
+            rejects.write(rejected)
+    conn.commit()
+    cursor.close()
+    if total_rejected:
+        print(f"⚠️  {total_rejected} sesiones rechazadas por datos inválidos")
+    telemetry.finish()
+    
+    # SET LOGGED, índices, PK y FK en las copias; las lecturas en vivo no se bloquean
+    print("🔧 Construyendo índices y restricciones en staging...")
+    # Con las referencias ya comprobadas en el cliente las FK se crean NOT VALID sin escanear
+    finish_swap_tables(conn, pg_connection, tables, parallel_builds, total_memory_mb,
+                       validate_foreign_keys=validator is None)
+    
+    swap_started = time.perf_counter()
+    swap_tables(conn, tables)
+    print(f"✅ Tablas intercambiadas en {(time.perf_counter() - swap_started) * 1000:.0f} ms")
+    
+    # Las tablas nuevas no tienen historia de deltas: los agregados se recalculan una vez
+    cursor = conn.cursor()
+    rebuild_aggregates(cursor)
+    conn.commit()
+    cursor.close()
+    return digest
+
+def verify_binary_copy(conn, users_file, sessions_file, sample_rows=50_000):
+    """Comprobar que COPY binario carga exactamente las mismas filas que COPY text"""
+    users = pd.read_csv(users_file, nrows=sample_rows)
+    sessions, _ = prepare_session_chunk(pd.read_csv(sessions_file, nrows=sample_rows))
+    checks = [('users', USER_COLUMNS, users), ('viewing_sessions', SESSION_COLUMNS, sessions)]
+    
+    cursor = conn.cursor()
+    ok = True
+    try:
+        for table, columns, df in checks:
+            cursor.execute(f"CREATE TEMP TABLE verify_text (LIKE {table}) ON COMMIT DROP")
+            cursor.execute(f"CREATE TEMP TABLE verify_binary (LIKE {table}) ON COMMIT DROP")
+            copy_rows(cursor, 'verify_text', columns, df, 'text')
+            copy_rows(cursor, 'verify_binary', columns, df, 'binary', COLUMN_TYPES[table])
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM (SELECT * FROM verify_text EXCEPT ALL SELECT * FROM verify_binary) a)
+                     + (SELECT COUNT(*) FROM (SELECT * FROM verify_binary EXCEPT ALL SELECT * FROM verify_text) b)
+            """)
+            mismatches = cursor.fetchone()[0]
+            if mismatches:
+                ok = False
+                print(f"❌ COPY binario de {table}: {mismatches} filas difieren del camino text")
+            else:
+                print(f"✅ COPY binario de {table}: {len(df):,} filas idénticas al camino text")
+            conn.rollback()
+    finally:
+        conn.rollback()
+        cursor.close()
+    return ok
+
+def reconcile_sessions(cursor, source_digest):
+    """Comparar conteos y hashes por mes del origen con los del servidor; devuelve True si coinciden"""
+    started = time.perf_counter()
+    server = server_digest(cursor)
+    mismatches = compare_digests(source_digest, server)
+    print(f"📺 Sesiones: {server.rows:,} en {len(server.partitions)} meses "
+          f"(reconciliadas en {time.perf_counter() - started:.2f}s)")
+    if not mismatches:
+        print("✅ Reconciliación origen/base de datos: OK")
+        return True
+    for month, source_rows, db_rows, hash_matches in mismatches:
+        detail = "" if source_rows != db_rows else " (mismo conteo, contenido distinto)"
+        print(f"⚠️  {month}: origen {source_rows:,} filas, base de datos {db_rows:,}{detail}")
+    return False
+
+def verify_data(conn, source_digest=None, check_orphans=True):
+    """Verificar que los datos se insertaron correctamente
+    
+    Con source_digest (modo reconciliación) las sesiones se comparan por mes con
+    el origen en una sola consulta agrupada, sin conteos ni anti-joins completos.
+    check_orphans=False omite los anti-joins cuando las referencias ya se
+    comprobaron en el cliente antes de la carga.
+    """
     try:
         cursor = conn.cursor()
         
@@ -237,11 +960,21 @@ def verify_data(conn):
             total_content += count
         print(f"📊 Total contenido: {total_content:,}")
         
+        if source_digest is not None:
+            reconcile_sessions(cursor, source_digest)
+            cursor.close()
+            return
+        
         # Contar sesiones
         cursor.execute("SELECT COUNT(*) FROM viewing_sessions;")
         session_count = cursor.fetchone()[0]
         print(f"📺 Sesiones: {session_count:,}")
         
+        if not check_orphans:
+            print("✅ Integridad referencial: comprobada en el cliente antes de la carga")
+            cursor.close()
+            return
+        
         # Verificar integridad referencial
         cursor.execute("""
             SELECT COUNT(*) FROM viewing_sessions vs 
@@ -270,6 +1003,41 @@ def verify_data(conn):
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Insertar datos en PostgreSQL")
+    parser.add_argument('--method', choices=LOAD_METHODS, default='copy',
+                        help="copy: COPY ... FROM STDIN (rápido); insert: INSERT con execute_values")
+    parser.add_argument('--copy-format', choices=COPY_FORMATS, default='csv',
+                        help="Formato de COPY cuando --method=copy")
+    parser.add_argument('--verify-binary', action='store_true',
+                        help="Solo comprobar que COPY binario y COPY text cargan las mismas filas")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Conexiones paralelas para cargar las sesiones con COPY")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Fusionar solo filas nuevas o modificadas desde la última carga (sin TRUNCATE)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reanudar la carga de sesiones tras el último bloque confirmado")
+    parser.add_argument('--reconcile', action='store_true',
+                        help="Verificar las sesiones por mes con conteos y hashes del origen en lugar de anti-joins")
+    parser.add_argument('--check-references', action='store_true',
+                        help="Comprobar user_id y content_id de cada sesión contra los archivos de origen antes de cargar")
+    parser.add_argument('--rejects-file', default='rejected_sessions.csv',
+                        help="CSV donde se escriben las sesiones rechazadas con --check-references")
+    parser.add_argument('--telemetry-out', default=SUMMARY_FILE,
+                        help="JSON con el resumen de rendimiento de cada carga")
+    parser.add_argument('--swap', action='store_true',
+                        help="Carga blue/green en tablas de staging e intercambio atómico con las tablas en vivo")
+    parser.add_argument('--bulk-reload', action='store_true',
+                        help="Quitar índices, PK y FK de viewing_sessions durante la carga y reconstruirlos al final")
+    parser.add_argument('--maintenance-work-mem', type=int, default=None,
+                        help="MB totales para reconstruir índices en paralelo (por defecto, según el servidor)")
+    parser.add_argument('--reload-month', type=lambda value: pd.Period(value, freq='M'), default=None,
+                        help="Recargar solo las sesiones de un mes (AAAA-MM) sustituyendo su partición")
+    parser.add_argument('--retain-months', type=int, default=None,
+                        help="Tras la carga, eliminar las particiones de sesiones fuera de los últimos N meses")
+    parser.add_argument('--no-refresh', action='store_true',
+                        help="No refrescar las vistas materializadas de resumen al terminar")
+    args = parser.parse_args()
+    
     print("🚀 INICIANDO INSERCIÓN DE DATOS")
     print("=" * 50)
     
@@ -286,16 +1054,108 @@ def main():
     conn = connect_db()
     
     try:
-        # Crear esquema
-        create_schema(conn)
+        # Migraciones pendientes del esquema (tablas de control del ETL incluidas)
+        apply_migrations(conn)
+        
+        if args.verify_binary:
+            if not verify_binary_copy(conn, 'users.csv', 'viewing_sessions.csv'):
+                sys.exit(1)
+            return
+        
+        # Validación de referencias en el cliente: sin huérfanas no hacen falta anti-joins ni VALIDATE
+        validator = rejects = None
+        if args.check_references:
+            validator = ReferenceValidator.from_sources('users.csv', 'content.json')
+            rejects = RejectWriter(args.rejects_file, append=args.resume)
+            print(f"🔑 Referencias cargadas: {validator.describe()}")
+        check_orphans = validator is None
+        
+        # Carga blue/green: los lectores nunca ven tablas vacías ni a medio cargar
+        if args.swap:
+            digest = load_swap(conn, args.copy_format, max(args.workers, 3), args.maintenance_work_mem,
+                               validator, rejects)
+            verify_data(conn, digest if args.reconcile else None, check_orphans)
+            # Las vistas materializadas se construyeron llenas sobre staging y el intercambio solo las renombró
+            if args.retain_months:
+                apply_retention(conn, args.retain_months)
+                if not args.no_refresh:
+                    refresh_summaries(conn)
+            print("\n🎉 CARGA CON INTERCAMBIO COMPLETADA!")
+            print("=" * 50)
+            return
+        
+        # Carga incremental: staging + INSERT ... ON CONFLICT, sin vaciar las tablas
+        if args.incremental:
+            insert_users_incremental(conn, 'users.csv', args.copy_format)
+            insert_content_incremental(conn, 'content.json')
+            insert_sessions_incremental(conn, 'viewing_sessions.csv', args.copy_format, validator, rejects)
+            verify_data(conn, check_orphans=check_orphans)
+            if args.retain_months:
+                apply_retention(conn, args.retain_months)
+            if not args.no_refresh:
+                refresh_summaries(conn)
+            print("\n🎉 CARGA INCREMENTAL COMPLETADA!")
+            print("=" * 50)
+            return
+        
+        # Recargar un mes: las demás particiones no se tocan
+        if args.reload_month is not None:
+            reload_sessions_month(conn, 'viewing_sessions.csv', args.reload_month, args.copy_format,
+                                  validator, rejects)
+            verify_data(conn, check_orphans=check_orphans)
+            if not args.no_refresh:
+                refresh_summaries(conn)
+            return
+        
+        # Reanudar: usuarios y contenido ya están cargados (recargarlos vaciaría las sesiones)
+        if args.resume:
+            digest = insert_sessions(conn, 'viewing_sessions.csv', args.method, args.copy_format, resume=True,
+                                     validator=validator, rejects=rejects)
+            if digest is None:
+                sys.exit(1)
+            verify_data(conn, digest if args.reconcile else None, check_orphans)
+            if not args.no_refresh:
+                refresh_summaries(conn)
+            return
         
         # Insertar datos
-        insert_users(conn, 'users.csv')
+        insert_users(conn, 'users.csv', args.method, args.copy_format)
         insert_content(conn, 'content.json')
-        insert_sessions(conn, 'viewing_sessions.csv')
+        # Carga masiva: sin índices secundarios, PK ni FK que mantener fila a fila
+        suspended = None
+        if args.bulk_reload:
+            suspended = suspend_table(conn, 'viewing_sessions')
+            print(f"🔧 Suspendidos en viewing_sessions: {suspended.describe()}")
+        
+        try:
+            # Usuarios y contenido ya están cargados: las sesiones pueden ir en paralelo sin violar las FK
+            if args.workers > 1 and args.method == 'copy':
+                digest = insert_sessions_parallel(conn, 'viewing_sessions.csv', args.workers, args.copy_format,
+                                                  validator, rejects)
+            else:
+                digest = insert_sessions(conn, 'viewing_sessions.csv', args.method, args.copy_format,
+                                         validator=validator, rejects=rejects)
+        finally:
+            if suspended:
+                started = time.perf_counter()
+                rebuilt = restore_table(conn, pg_connection, suspended,
+                                        parallel_builds=max(args.workers, 3),
+                                        total_memory_mb=args.maintenance_work_mem,
+                                        validate_foreign_keys=check_orphans)
+                print(f"✅ {rebuilt} índices reconstruidos, FK validadas y ANALYZE en "
+                      f"{time.perf_counter() - started:.2f}s")
+        # Una carga de sesiones fallida o incompleta no se verifica ni se publica
+        if digest is None:
+            sys.exit(1)
         
         # Verificar datos
-        verify_data(conn)
+        verify_data(conn, digest if args.reconcile else None, check_orphans)
+        if args.retain_months:
+            apply_retention(conn, args.retain_months)
+        if not args.no_refresh:
+            refresh_summaries(conn)
+        if rejects is not None and rejects.rows:
+            print(f"📝 {rejects.rows:,} sesiones rechazadas escritas en {rejects.path}")
         
         print("\n🎉 INSERCIÓN COMPLETADA EXITOSAMENTE!")
         print("=" * 50)
@@ -304,6 +1164,12 @@ def main():
         print(f"❌ Error durante la inserción: {e}")
         conn.rollback()
     finally:
+        if COMPLETED:
+            mode = ('swap' if args.swap else 'incremental' if args.incremental
+                    else 'reload_month' if args.reload_month is not None else 'full')
+            path = write_summary(args.telemetry_out, mode=mode, method=args.method,
+                                 copy_format=args.copy_format, workers=args.workers)
+            print(f"📈 Resumen de rendimiento guardado en {path}")
         conn.close()
         print("🔌 Conexión a base de datos cerrada")
 
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Memory-budget-aware chunk sizing shared by the loaders
+Reads the memory limit (cgroup limits included), measures bytes per row of a
+converted sample chunk and backs off when RSS gets close to the limit
+"""
+
+import os
+import sys
+import pandas as pd
+
+# Budget: MEMORY_BUDGET_MB (absolute) or MEMORY_BUDGET_FRACTION of available memory
+DEFAULT_BUDGET_FRACTION = 0.25
+# Parsing, copies and driver buffers cost a multiple of the final frame size
+DEFAULT_OVERHEAD = 3.0
+RSS_HIGH_WATER = 0.85
+RSS_LOW_WATER = 0.60
+
+_CGROUP_V2_DIR = '/sys/fs/cgroup'
+_CGROUP_V1_DIR = '/sys/fs/cgroup/memory'
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_UNLIMITED = 1 << 60
+
+
+def _read_int(path):
+    """Integer content of a sysfs/proc file, or None if missing or unlimited"""
+    try:
+        with open(path, 'r') as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    if not value.isdigit():
+        return None
+    value = int(value)
+    return value if value < _UNLIMITED else None
+
+
+def _meminfo(field):
+    """A field of /proc/meminfo in bytes, or None off Linux"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def cgroup_limit_bytes():
+    """Memory limit of this process's cgroup (v2 or v1), or None"""
+    return _read_int(os.path.join(_CGROUP_V2_DIR, 'memory.max')) or \
+        _read_int(os.path.join(_CGROUP_V1_DIR, 'memory.limit_in_bytes'))
+
+
+def cgroup_usage_bytes():
+    """Current memory usage charged to this process's cgroup, or None"""
+    return _read_int(os.path.join(_CGROUP_V2_DIR, 'memory.current')) or \
+        _read_int(os.path.join(_CGROUP_V1_DIR, 'memory.usage_in_bytes'))
+
+
+def memory_limit_bytes():
+    """Hard ceiling for this process: the cgroup limit or physical memory"""
+    candidates = [cgroup_limit_bytes(), _meminfo('MemTotal')]
+    if hasattr(os, 'sysconf') and 'SC_PHYS_PAGES' in os.sysconf_names:
+        candidates.append(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE'))
+    candidates = [c for c in candidates if c]
+    return min(candidates) if candidates else None
+
+
+def available_memory_bytes():
+    """Memory that can still be allocated, honoring cgroup limits"""
+    candidates = [_meminfo('MemAvailable')]
+    limit, usage = cgroup_limit_bytes(), cgroup_usage_bytes()
+    if limit and usage is not None:
+        candidates.append(max(limit - usage, 0))
+    candidates = [c for c in candidates if c is not None]
+    return min(candidates) if candidates else memory_limit_bytes()
+
+
+def current_rss_bytes():
+    """Resident set size of this process"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure_bytes_per_row(df):
+    """In-memory bytes per row of an already converted frame"""
+    if len(df) == 0:
+        return 0
+    return df.memory_usage(index=True, deep=True).sum() / len(df)
+
+
+def memory_budget_bytes(budget_bytes=None, budget_fraction=None):
+    """Resolve the budget from arguments, then environment, then the default fraction"""
+    if budget_bytes is None and os.getenv('MEMORY_BUDGET_MB'):
+        budget_bytes = int(float(os.environ['MEMORY_BUDGET_MB']) * 1024 * 1024)
+    if budget_bytes is not None:
+        return budget_bytes
+    if budget_fraction is None:
+        budget_fraction = float(os.getenv('MEMORY_BUDGET_FRACTION', DEFAULT_BUDGET_FRACTION))
+    available = available_memory_bytes() or 512 * 1024 * 1024
+    return int(available * budget_fraction)
+
+
+class ChunkSizer:
+    """Pick rows per chunk under a memory budget and adapt to RSS during a run"""
+
+    def __init__(self, budget_bytes=None, budget_fraction=None, min_rows=1_000,
+                 max_rows=2_000_000, overhead=DEFAULT_OVERHEAD):
+        self.budget_bytes = memory_budget_bytes(budget_bytes, budget_fraction)
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.overhead = overhead
+        self.limit_bytes = memory_limit_bytes()
+        self.bytes_per_row = None
+        self.target_rows = min_rows
+        self.rows = min_rows
+
+    def fit(self, sample_df):
+        """Size chunks from a converted sample chunk"""
+        self.bytes_per_row = max(measure_bytes_per_row(sample_df), 1.0)
+        rows = int(self.budget_bytes / (self.bytes_per_row * self.overhead))
+        self.target_rows = max(self.min_rows, min(self.max_rows, rows))
+        self.rows = self.target_rows
+        return self.rows
+
+    def next_size(self):
+        """Rows for the next chunk: halve near the RSS limit, recover when well below"""
+        if self.limit_bytes:
+            pressure = current_rss_bytes() / self.limit_bytes
+            if pressure > RSS_HIGH_WATER:
+                self.rows = max(self.min_rows, self.rows // 2)
+            elif pressure < RSS_LOW_WATER and self.rows < self.target_rows:
+                self.rows = min(self.target_rows, self.rows * 2)
+        return self.rows
+
+    def describe(self):
+        return (f"{self.rows:,} rows/chunk (~{self.bytes_per_row or 0:.0f} B/row, "
+                f"budget {self.budget_bytes / 1024 ** 2:,.0f} MB)")
+
+
+def read_csv_chunks(path, sizer=None, convert=None, sample_rows=10_000, **read_csv_kwargs):
+    """Yield converted chunks of a CSV whose sizes follow a ChunkSizer
+
+    `convert` receives each raw chunk and may return a frame or a tuple whose
+    first element is the frame.
+    """
+    sizer = sizer or ChunkSizer()
+    convert = convert or (lambda chunk: chunk)
+
+    reader = pd.read_csv(path, iterator=True, **read_csv_kwargs)
+    try:
+        first = convert(reader.get_chunk(sample_rows))
+        # convert may return (frame, extras); size from the converted frame
+        sizer.fit(first[0] if isinstance(first, tuple) else first)
+        yield first
+        while True:
+            try:
+                chunk = reader.get_chunk(sizer.next_size())
+            except StopIteration:
+                break
+            yield convert(chunk)
+    except StopIteration:
+        return
+    finally:
+        reader.close()
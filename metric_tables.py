@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained session aggregate tables
+agg_user_metrics, agg_content_metrics and agg_daily_dimension hold running
+count / sum / sum-of-squares columns. Loaders add each batch as deltas in the
+same transaction as its rows, so keeping them current costs O(batch)
+"""
+
+from decimal import Decimal
+import pandas as pd
+from psycopg2.extras import execute_values
+
+UNKNOWN_DIMENSION = 'unknown'
+MEASURES = ['session_count', 'duration_sum', 'duration_sumsq', 'completion_sum', 'completion_sumsq']
+
+# Aggregate table -> grouping key columns
+AGGREGATE_TABLES = {
+    'agg_user_metrics': ['user_id'],
+    'agg_content_metrics': ['content_id'],
+    'agg_daily_dimension': ['watch_date', 'device_type', 'quality_level'],
+}
+DIMENSION_COLUMNS = ['device_type', 'quality_level']
+
+
+def _upsert_sql(table, keys):
+    """Add EXCLUDED measures to the existing row of each key"""
+    columns = ', '.join(keys + MEASURES)
+    additions = ', '.join(f"{m} = {table}.{m} + EXCLUDED.{m}" for m in MEASURES)
+    return f"""
+        INSERT INTO {table} ({columns}) {{source}}
+        ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {additions}, updated_at = now()
+    """
+
+
+def _key_sql(column):
+    if column in DIMENSION_COLUMNS:
+        return f"coalesce({column}, '{UNKNOWN_DIMENSION}')"
+    return column
+
+
+def session_deltas(sessions, keys):
+    """Measures of a chunk of new sessions grouped by `keys`, as rows sorted by key
+
+    Completion is summed in integer hundredths and sent as Decimal, so the
+    NUMERIC sums stay exact whatever the number of batches.
+    """
+    frame = sessions[keys].copy()
+    for column in DIMENSION_COLUMNS:
+        if column in frame:
+            frame[column] = frame[column].astype(object).where(frame[column].notna(), UNKNOWN_DIMENSION)
+    if 'watch_date' in frame:
+        frame['watch_date'] = frame['watch_date'].dt.date
+    # Missing measures count as 0, like coalesce() in the server-side deltas
+    duration = pd.to_numeric(sessions['watch_duration_minutes']).fillna(0).astype('int64')
+    completion = (pd.to_numeric(sessions['completion_percentage']).fillna(0) * 100).round().astype('int64')
+    frame['duration'] = duration
+    frame['duration_sq'] = duration * duration
+    frame['completion'] = completion
+    frame['completion_sq'] = completion * completion
+
+    # Sorted keys: concurrent loaders lock the same rows in the same order, so they cannot deadlock
+    grouped = frame.groupby(keys, sort=True).agg(
+        session_count=('duration', 'size'), duration_sum=('duration', 'sum'),
+        duration_sumsq=('duration_sq', 'sum'), completion_sum=('completion', 'sum'),
+        completion_sumsq=('completion_sq', 'sum')).reset_index()
+    return [tuple(row[:len(keys)])
+            + (int(row[-5]), int(row[-4]), int(row[-3]),
+               Decimal(int(row[-2])).scaleb(-2), Decimal(int(row[-1])).scaleb(-4))
+            for row in grouped.itertuples(index=False, name=None)]
+
+
+def add_session_batch(cursor, sessions):
+    """Add a chunk of newly loaded sessions to every aggregate table"""
+    if len(sessions) == 0:
+        return
+    for table, keys in AGGREGATE_TABLES.items():
+        execute_values(cursor, _upsert_sql(table, keys).format(source='VALUES %s'),
+                       session_deltas(sessions, keys), page_size=10_000)
+
+
+def apply_server_deltas(cursor, changes_sql):
+    """Add signed deltas computed in the database
+
+    `changes_sql` yields session rows with a `sign` column: 1 for rows to add,
+    -1 for rows to take away. Keys whose count drops to zero are removed.
+    """
+    for table, keys in AGGREGATE_TABLES.items():
+        key_list = ', '.join(_key_sql(k) for k in keys)
+        # Sessions without the key cannot be attributed (client-side groupby drops them too)
+        present = ' AND '.join(f"{k} IS NOT NULL" for k in keys if k not in DIMENSION_COLUMNS)
+        source = f"""
+            SELECT {key_list}, SUM(sign), SUM(sign * coalesce(watch_duration_minutes, 0)),
+                   SUM(sign * coalesce(watch_duration_minutes, 0)::bigint * coalesce(watch_duration_minutes, 0)),
+                   SUM(sign * coalesce(completion_percentage, 0)),
+                   SUM(sign * coalesce(completion_percentage, 0) * coalesce(completion_percentage, 0))
+            FROM ({changes_sql}) changes
+            WHERE {present}
+            GROUP BY {key_list}
+            ORDER BY {key_list}
+        """
+        # Only keys touched by these changes can have dropped to zero
+        cursor.execute(f"""
+            WITH upserted AS ({_upsert_sql(table, keys).format(source=source)}
+                              RETURNING {', '.join(keys)}, session_count)
+            SELECT {', '.join(keys)} FROM upserted WHERE session_count = 0
+        """)
+        emptied = cursor.fetchall()
+        if emptied:
+            execute_values(cursor, f"DELETE FROM {table} WHERE ({', '.join(keys)}) IN (VALUES %s) "
+                                   f"AND session_count = 0", emptied)
+
+
+def changed_sessions_sql(staging, table='viewing_sessions'):
+    """Signed changes of merging a staging table keyed by session_id into `table`
+
+    Live rows that differ from their staged version are taken away (-1) and
+    new or changed staged rows are added (+1); identical rows cancel out.
+    """
+    columns = ['user_id', 'content_id', 'watch_date', 'watch_duration_minutes', 'completion_percentage',
+               'device_type', 'quality_level']
+    live = ', '.join(f"v.{c}" for c in columns)
+    staged = ', '.join(f"s.{c}" for c in columns)
+    return f"""
+        SELECT -1 AS sign, {live} FROM {table} v JOIN {staging} s USING (session_id)
+        WHERE ({live}) IS DISTINCT FROM ({staged})
+        UNION ALL
+        SELECT 1, {staged} FROM {staging} s LEFT JOIN {table} v USING (session_id)
+        WHERE v.session_id IS NULL OR ({live}) IS DISTINCT FROM ({staged})
+    """
+
+
+def table_sessions_sql(source, sign):
+    """Every row of a table (a partition, a staging table...) with a fixed sign"""
+    return f"SELECT {int(sign)} AS sign, * FROM {source}"
+
+
+def clear_aggregates(cursor):
+    """Empty the aggregate tables (before a full reload)"""
+    cursor.execute(f"TRUNCATE {', '.join(AGGREGATE_TABLES)}")
+
+
+def rebuild_aggregates(cursor, table='viewing_sessions'):
+    """Recompute the aggregates from scratch; DELETE keeps them readable meanwhile"""
+    for aggregate in AGGREGATE_TABLES:
+        cursor.execute(f"DELETE FROM {aggregate}")
+    apply_server_deltas(cursor, table_sessions_sql(table, 1))
+
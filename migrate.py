@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the PostgreSQL database
+Migrations are files NNNN_name.sql (run as one script) or NNNN_name.py (with an
+upgrade(conn) function) in video-streaming-analysis/database/migrations. Each
+applied migration is recorded in schema_version with a checksum; when nothing
+is pending a run only reads that table, so routine loads issue no DDL
+"""
+
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+import importlib.util
+from collections import namedtuple
+
+from db import connect
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, 'video-streaming-analysis', 'database', 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.(sql|py)$')
+
+# Advisory lock key: two loaders starting together apply each migration once
+MIGRATION_LOCK_ID = 720450001
+
+SCHEMA_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT now(),
+    execution_ms INTEGER NOT NULL
+)
+"""
+
+Migration = namedtuple('Migration', ['version', 'name', 'path', 'checksum'])
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Migration files of a directory, in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match is None:
+            continue
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            # Line endings are normalized so a checkout on Windows keeps the same checksum
+            checksum = hashlib.sha256(f.read().replace(b'\r\n', b'\n')).hexdigest()
+        migrations.append(Migration(int(match.group(1)), f"{match.group(2)}.{match.group(3)}", path, checksum))
+    versions = [m.version for m in migrations]
+    duplicates = sorted({v for v in versions if versions.count(v) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate migration versions: {duplicates}")
+    return migrations
+
+
+def applied_migrations(cursor):
+    """{version: (name, checksum)} recorded in schema_version (empty before the first run)"""
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return {}
+    cursor.execute("SELECT version, name, checksum FROM schema_version ORDER BY version")
+    return {version: (name, checksum) for version, name, checksum in cursor.fetchall()}
+
+
+def pending_migrations(migrations, applied):
+    """Migrations not applied yet; an applied file that changed since is an error"""
+    changed = [m for m in migrations if m.version in applied and applied[m.version][1] != m.checksum]
+    if changed:
+        names = ', '.join(f"{m.version:04d}_{m.name}" for m in changed)
+        raise ValueError(f"applied migrations were modified: {names} (add a new migration instead)")
+    return [m for m in migrations if m.version not in applied]
+
+
+def _apply(conn, migration):
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    if migration.path.endswith('.py'):
+        spec = importlib.util.spec_from_file_location(f"migration_{migration.version:04d}", migration.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(conn)
+    else:
+        with open(migration.path, 'r', encoding='utf-8') as f:
+            cursor.execute(f.read())
+    cursor.execute("""
+        INSERT INTO schema_version (version, name, checksum, execution_ms)
+        VALUES (%s, %s, %s, %s)
+    """, (migration.version, migration.name, migration.checksum,
+          round((time.perf_counter() - started) * 1000)))
+    conn.commit()
+    cursor.close()
+
+
+def migrate(conn, directory=MIGRATIONS_DIR):
+    """Apply the pending migrations in order; returns the ones applied
+
+    Each SQL migration commits together with its schema_version row. Python
+    migrations may commit on their own, so they must be safe to re-run.
+    """
+    migrations = discover_migrations(directory)
+    cursor = conn.cursor()
+    # Fast path: a read of schema_version, no locks beyond it
+    pending = pending_migrations(migrations, applied_migrations(cursor))
+    conn.commit()
+    if not pending:
+        cursor.close()
+        return []
+
+    cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        cursor.execute(SCHEMA_VERSION_SQL)
+        conn.commit()
+        # Another process may have applied some while we waited for the lock
+        pending = pending_migrations(migrations, applied_migrations(cursor))
+        conn.commit()
+        for migration in pending:
+            _apply(conn, migration)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        cursor.close()
+    return pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplicar las migraciones pendientes del esquema")
+    parser.add_argument('--status', action='store_true', help="Solo mostrar las migraciones aplicadas y pendientes")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        cursor = conn.cursor()
+        applied = applied_migrations(cursor)
+        cursor.close()
+        conn.commit()
+        if args.status:
+            for migration in discover_migrations():
+                state = "✅ aplicada" if migration.version in applied else "⏳ pendiente"
+                if migration.version in applied and applied[migration.version][1] != migration.checksum:
+                    state = "⚠️  modificada tras aplicarse"
+                print(f"{migration.version:04d}_{migration.name}: {state}")
+            return
+        done = migrate(conn)
+        for migration in done:
+            print(f"✅ Migración {migration.version:04d}_{migration.name} aplicada")
+        if not done:
+            print("ℹ️  Esquema al día: no hay migraciones pendientes")
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Parallel per-user aggregation for the Video Streaming Platform analysis
+Hash-partitions sessions by user across a process pool; workers read their
+shard from memory-mapped column files and the partial results are concatenated
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+USER_FEATURE_COLUMNS = ['user_id', 'total_sessions', 'total_watch_time',
+                        'avg_completion', 'unique_content', 'quality_preference', 'age']
+
+# Below this many sessions the pool start-up costs more than it saves
+MIN_PARALLEL_ROWS = 200_000
+
+
+def _shard_features(args):
+    """Worker: aggregate one contiguous shard of the memory-mapped columns"""
+    column_dir, start, end = args
+    columns = {}
+    for name in ('user_code', 'has_session', 'watch_duration_minutes',
+                 'completion_percentage', 'content_code', 'is_high_quality', 'age'):
+        values = np.load(os.path.join(column_dir, f'{name}.npy'), mmap_mode='r')
+        columns[name] = np.asarray(values[start:end])
+    shard = pd.DataFrame(columns)
+
+    return shard.groupby('user_code', sort=True).agg(
+        total_sessions=('has_session', 'sum'),
+        total_watch_time=('watch_duration_minutes', 'sum'),
+        avg_completion=('completion_percentage', 'mean'),
+        unique_content=('content_code', 'nunique'),
+        quality_preference=('is_high_quality', 'mean'),
+        age=('age', 'first'),
+    )
+
+
+def user_features_parallel(merged_df, n_workers=None):
+    """Build the per-user clustering features with a hash-partitioned process pool"""
+    n_workers = n_workers or os.cpu_count() or 1
+
+    # Integer-encode the keys so shards only carry fixed-width numeric columns
+    user_codes, user_ids = pd.factorize(merged_df['user_id'], sort=True)
+    content_codes, _ = pd.factorize(merged_df['content_id'])
+    keep = user_codes >= 0
+    user_codes = user_codes[keep]
+    if len(user_codes) == 0:
+        return pd.DataFrame(columns=USER_FEATURE_COLUMNS)
+
+    columns = {
+        'user_code': user_codes.astype(np.int64),
+        'has_session': merged_df['session_id'].notna().to_numpy()[keep],
+        'watch_duration_minutes': merged_df['watch_duration_minutes'].to_numpy()[keep],
+        'completion_percentage': merged_df['completion_percentage'].to_numpy(dtype=float)[keep],
+        'content_code': np.where(content_codes >= 0, content_codes, np.nan)[keep],
+        'is_high_quality': merged_df['is_high_quality'].to_numpy(dtype=float)[keep],
+        'age': merged_df['age'].to_numpy(dtype=float)[keep],
+    }
+
+    # Stable sort by shard keeps each user's rows in their original order ('first' age)
+    shard_ids = pd.util.hash_array(columns['user_code']) % np.uint64(n_workers)
+    order = np.argsort(shard_ids, kind='stable')
+    bounds = np.searchsorted(shard_ids[order], np.arange(n_workers + 1))
+
+    with tempfile.TemporaryDirectory(prefix='user_features_') as column_dir:
+        for name, values in columns.items():
+            np.save(os.path.join(column_dir, f'{name}.npy'), values[order])
+
+        tasks = [(column_dir, int(start), int(end))
+                 for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            shards = list(pool.map(_shard_features, tasks))
+
+    features = pd.concat(shards).sort_index()
+    features.insert(0, 'user_id', user_ids[features.index])
+    features['total_sessions'] = features['total_sessions'].astype(np.int64)
+    return features.reset_index(drop=True)[USER_FEATURE_COLUMNS]
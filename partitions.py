@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Monthly range partitions of PostgreSQL tables
+Creates the partitions a load needs (<table>_YYYY_MM plus a DEFAULT catch-all),
+splits chunks by month so COPY can target a partition directly, converts an
+existing plain table in place, and replaces or drops whole months through
+DETACH/ATTACH/DROP instead of DELETE
+"""
+
+import re
+import pandas as pd
+
+from table_maintenance import (child_partitions, create_view, dependent_views, drop_view, is_partitioned,
+                               secondary_indexes, table_constraints)
+
+DEFAULT_PARTITION_SUFFIX = '_default'
+LOAD_SUFFIX = '_load'
+
+
+def partition_name(table, month):
+    """Name of the partition of `table` holding one month (a pandas Period)"""
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+
+def month_bounds(month):
+    """[start, end) dates of a monthly partition"""
+    return month.start_time.date(), (month + 1).start_time.date()
+
+
+def months_of(dates):
+    """Sorted distinct months of a datetime Series"""
+    return sorted(dates.dropna().dt.to_period('M').unique())
+
+
+def split_by_month(df, column):
+    """(month, rows) groups of a chunk, in month order"""
+    return df.groupby(df[column].dt.to_period('M'), sort=True)
+
+
+def partition_column(cursor, table):
+    """Column of a single-column range partition key"""
+    cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", (table,))
+    match = re.match(r'RANGE \((\w+)\)$', cursor.fetchone()[0] or '')
+    if match is None:
+        raise ValueError(f"{table} is not range-partitioned on a single column")
+    return match.group(1)
+
+
+def monthly_partitions(cursor, table):
+    """{month: name} of the monthly partitions of a table"""
+    pattern = re.compile(rf'^{re.escape(table)}_(\d{{4}})_(\d{{2}})$')
+    partitions = {}
+    for name in child_partitions(cursor, table):
+        match = pattern.match(name)
+        if match:
+            partitions[pd.Period(year=int(match.group(1)), month=int(match.group(2)), freq='M')] = name
+    return partitions
+
+
+def partition_names(cursor, table):
+    """Set of partition names of a table, or None if it is not partitioned"""
+    if not is_partitioned(cursor, table):
+        return None
+    return set(child_partitions(cursor, table))
+
+
+def ensure_default_partition(cursor, table, unlogged=False):
+    """DEFAULT partition for rows outside every monthly range"""
+    name = table + DEFAULT_PARTITION_SUFFIX
+    cursor.execute(f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE IF NOT EXISTS {name} "
+                   f"PARTITION OF {table} DEFAULT")
+    return name
+
+
+def ensure_partitions(cursor, table, months, unlogged=False):
+    """Create the missing monthly partitions; runs in the caller's transaction
+
+    Rows of a month already sitting in the DEFAULT partition make the creation
+    fail, so partitions are created before the rows of their month are loaded.
+    """
+    existing = set(child_partitions(cursor, table))
+    created = []
+    for month in months:
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        start, end = month_bounds(month)
+        cursor.execute(f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE IF NOT EXISTS {name} "
+                       f"PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (start, end))
+        created.append(name)
+    return created
+
+
+def convert_to_partitioned(conn, table, column):
+    """Rebuild a plain table as a table partitioned by month on `column`, keeping its rows
+
+    The primary key gets the partition column appended (PostgreSQL requires
+    it); indexes, foreign keys and dependent views are recreated.
+    """
+    cursor = conn.cursor()
+    old = f"{table}_unpartitioned"
+    indexes = secondary_indexes(cursor, table)
+    keys = table_constraints(cursor, table, 'p')
+    foreign_keys = table_constraints(cursor, table, 'f')
+    views = dependent_views(cursor, [table])
+
+    for view in reversed(views):
+        drop_view(cursor, view)
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    # Free the index and constraint names for the new table
+    for name, _ in foreign_keys + keys:
+        cursor.execute(f"ALTER TABLE {old} DROP CONSTRAINT {name}")
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+
+    cursor.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})")
+    ensure_default_partition(cursor, table)
+    cursor.execute(f"SELECT DISTINCT date_trunc('month', {column})::date FROM {old} WHERE {column} IS NOT NULL")
+    ensure_partitions(cursor, table, sorted(pd.Period(month, freq='M') for month, in cursor.fetchall()))
+    cursor.execute(f"INSERT INTO {table} SELECT * FROM {old}")
+    rows = cursor.rowcount
+
+    for name, definition in keys:
+        columns = re.match(r'PRIMARY KEY \((.*)\)', definition).group(1)
+        if column not in [c.strip() for c in columns.split(',')]:
+            definition = f"PRIMARY KEY ({columns}, {column})"
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    for _, definition in indexes:
+        cursor.execute(definition)
+    for name, definition in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+    cursor.execute(f"DROP TABLE {old}")
+    for view in views:
+        create_view(cursor, view)
+    conn.commit()
+    cursor.close()
+    return rows
+
+
+def detach_partition(conn, table, month):
+    """Detach one month; its rows stay in a standalone table (returned) for archiving"""
+    name = partition_name(table, month)
+    cursor = conn.cursor()
+    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+    conn.commit()
+    cursor.close()
+    return name
+
+
+def drop_partitions_before(conn, table, month, on_drop=None):
+    """Retention: drop every monthly partition older than `month`; returns the dropped names
+
+    `on_drop(cursor, name)` runs in the same transaction, before each drop.
+    """
+    cursor = conn.cursor()
+    dropped = [name for partition_month, name in sorted(monthly_partitions(cursor, table).items())
+               if partition_month < month]
+    for name in dropped:
+        if on_drop is not None:
+            on_drop(cursor, name)
+        cursor.execute(f"DROP TABLE {name}")
+    conn.commit()
+    cursor.close()
+    return dropped
+
+
+def _match_parent(cursor, table, loading):
+    """Give a standalone table the parent's key, indexes and FKs, so ATTACH adopts them"""
+    for _, definition in table_constraints(cursor, table, 'p'):
+        cursor.execute(f"ALTER TABLE {loading} ADD {definition}")
+    for _, definition in secondary_indexes(cursor, table):
+        cursor.execute(re.sub(r'^CREATE (UNIQUE )?INDEX \S+ ON \S+ ',
+                              lambda m: f"CREATE {m.group(1) or ''}INDEX ON {loading} ", definition))
+    for _, definition in table_constraints(cursor, table, 'f'):
+        cursor.execute(f"ALTER TABLE {loading} ADD {definition}")
+
+
+def reload_partition(conn, table, month, load, on_swap=None, lock_timeout='5s'):
+    """Replace one month: load it into a standalone table, then swap it for the live partition
+
+    `load(cursor, target)` fills the target table and returns the number of
+    rows. Readers keep seeing the old month until the short final transaction
+    that drops it and attaches the new one; `on_swap(cursor, old, new)` runs
+    at its start. `old` is the replaced partition or, when the month had none,
+    a subquery over its rows in the DEFAULT partition (None if there are none);
+    those rows are deleted there, since ATTACH refuses a default holding them.
+    """
+    name = partition_name(table, month)
+    loading = name + LOAD_SUFFIX
+    start, end = month_bounds(month)
+    cursor = conn.cursor()
+    column = partition_column(cursor, table)
+    cursor.execute(f"DROP TABLE IF EXISTS {loading}")
+    cursor.execute(f"CREATE TABLE {loading} (LIKE {table} INCLUDING DEFAULTS)")
+    # A CHECK matching the bounds lets ATTACH PARTITION skip its validation scan
+    cursor.execute(f"ALTER TABLE {loading} ADD CONSTRAINT {loading}_bounds "
+                   f"CHECK ({column} IS NOT NULL AND {column} >= %s AND {column} < %s)", (start, end))
+    rows = load(cursor, loading)
+    conn.commit()
+
+    _match_parent(cursor, table, loading)
+    cursor.execute(f"ANALYZE {loading}")
+    conn.commit()
+
+    cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    old = name if cursor.fetchone()[0] else None
+    default = table + DEFAULT_PARTITION_SUFFIX
+    stranded = False
+    if old is None:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (default,))
+        if cursor.fetchone()[0]:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s)",
+                           (start, end))
+            stranded = cursor.fetchone()[0]
+    if stranded:
+        old = cursor.mogrify(f"(SELECT * FROM {default} WHERE {column} >= %s AND {column} < %s) stranded",
+                             (start, end)).decode()
+    if on_swap is not None:
+        on_swap(cursor, old, loading)
+    if stranded:
+        cursor.execute(f"DELETE FROM {default} WHERE {column} >= %s AND {column} < %s", (start, end))
+    cursor.execute(f"DROP TABLE IF EXISTS {name}")
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {loading} FOR VALUES FROM (%s) TO (%s)", (start, end))
+    cursor.execute(f"ALTER TABLE {loading} DROP CONSTRAINT {loading}_bounds")
+    cursor.execute(f"ALTER TABLE {loading} RENAME TO {name}")
+    conn.commit()
+    cursor.close()
+    return rows
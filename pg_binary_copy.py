@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL binary COPY encoder for typed DataFrame columns
+Writes int4/int8/float8/numeric/date/text columns straight into the
+COPY ... WITH (FORMAT binary) wire format, and decodes it back for checks
+"""
+
+import struct
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import chain, repeat
+import numpy as np
+import pandas as pd
+
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+COPY_TRAILER = struct.pack('>h', -1)
+NULL_FIELD = struct.pack('>i', -1)
+POSTGRES_EPOCH = np.datetime64('2000-01-01', 'D')
+
+# Fixed-width types: (big-endian NumPy dtype of the value)
+FIXED_WIDTH = {'int4': '>i4', 'int8': '>i8', 'float8': '>f8', 'date': '>i4'}
+
+# Numeric wire format: sign flags and base-10000 digits
+NUMERIC_POS = 0x0000
+NUMERIC_NEG = 0x4000
+NUMERIC_NAN = 0xC000
+
+
+def _fixed_fields(values, dtype):
+    """Length-prefixed fields for a fixed-width column without nulls"""
+    width = np.dtype(dtype).itemsize
+    fields = np.empty(len(values), dtype=[('length', '>i4'), ('value', dtype)])
+    fields['length'] = width
+    fields['value'] = values
+    raw = fields.tobytes()
+    step = 4 + width
+    return [raw[i:i + step] for i in range(0, len(raw), step)]
+
+
+def _encode_fixed(series, column_type):
+    """Fields of an int4/int8/float8/date column, NULLs included"""
+    nulls = series.isna().to_numpy()
+    present = series[~nulls]
+    if column_type == 'date':
+        days = pd.to_datetime(present).to_numpy().astype('datetime64[D]') - POSTGRES_EPOCH
+        values = days.astype(np.int64)
+    else:
+        values = present.to_numpy()
+    encoded = iter(_fixed_fields(values, FIXED_WIDTH[column_type]))
+    return [NULL_FIELD if is_null else next(encoded) for is_null in nulls]
+
+
+def _numeric_field(value, scale):
+    """One numeric field, rounded to `scale` the way Postgres parses the text form"""
+    if pd.isna(value):
+        return NULL_FIELD
+    number = Decimal(repr(float(value))).quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+    sign = NUMERIC_NEG if number < 0 else NUMERIC_POS
+    digits = ''.join(map(str, abs(number).as_tuple().digits))
+    digits = digits.rjust(scale + 1, '0')
+    integer, fraction = digits[:len(digits) - scale], digits[len(digits) - scale:]
+
+    # Base-10000 groups aligned on the decimal point
+    integer = integer.lstrip('0')
+    integer = integer.rjust(-(-len(integer) // 4) * 4, '0')
+    fraction = fraction.ljust(-(-len(fraction) // 4) * 4, '0')
+    groups = [int(integer[i:i + 4]) for i in range(0, len(integer), 4)]
+    weight = len(groups) - 1
+    groups += [int(fraction[i:i + 4]) for i in range(0, len(fraction), 4)]
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight, sign = 0, NUMERIC_POS
+
+    body = struct.pack(f'>hhHh{len(groups)}h', len(groups), weight, sign, scale, *groups)
+    return struct.pack('>i', len(body)) + body
+
+
+def _encode_numeric(series, scale):
+    """Fields of a numeric(p, scale) column from floats"""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+    if scale > 4:
+        return [_numeric_field(value, scale) for value in values]
+
+    # Vectorized rounding; exact .5 ties go through Decimal to match the text path
+    scaled = np.abs(values) * 10 ** scale
+    rounded = np.floor(scaled + 0.5)
+    nulls = np.isnan(values)
+    ties = ~nulls & (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+
+    fields = []
+    for value, is_null, is_tie, units in zip(values.tolist(), nulls.tolist(), ties.tolist(), rounded.tolist()):
+        if is_null:
+            fields.append(NULL_FIELD)
+            continue
+        if is_tie:
+            fields.append(_numeric_field(value, scale))
+            continue
+        integer, fraction = divmod(int(units), 10 ** scale)
+        groups = []
+        while integer:
+            integer, group = divmod(integer, 10000)
+            groups.insert(0, group)
+        weight = len(groups) - 1
+        groups.append(fraction * 10 ** (4 - scale))
+        while groups and groups[-1] == 0:
+            groups.pop()
+        sign = NUMERIC_NEG if value < 0 and groups else NUMERIC_POS
+        if not groups:
+            weight = 0
+        body = struct.pack(f'>hhHh{len(groups)}h', len(groups), weight, sign, scale, *groups)
+        fields.append(struct.pack('>i', len(body)) + body)
+    return fields
+
+
+def _encode_text(series):
+    """Fields of a text/varchar column (UTF-8)"""
+    fields = []
+    for value in series.tolist():
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NA:
+            fields.append(NULL_FIELD)
+        else:
+            data = str(value).encode('utf-8')
+            fields.append(struct.pack('>i', len(data)) + data)
+    return fields
+
+
+def _encode_distinct(series, encode):
+    """Encode each distinct value once and fan the fields back out by code"""
+    codes, uniques = pd.factorize(series)
+    encoded = encode(pd.Series(uniques)) + [NULL_FIELD]
+    return [encoded[code] for code in codes.tolist()]
+
+
+def encode_column(series, column_type):
+    """Binary COPY fields for one column; numeric types are 'numeric(<scale>)'"""
+    if column_type in FIXED_WIDTH:
+        return _encode_fixed(series, column_type)
+    if column_type.startswith('numeric'):
+        scale = int(column_type[len('numeric('):-1]) if '(' in column_type else 2
+        return _encode_distinct(series, lambda values: _encode_numeric(values, scale))
+    if column_type == 'text':
+        return _encode_distinct(series, _encode_text)
+    raise ValueError(f"unsupported binary COPY column type: {column_type}")
+
+
+def encode_rows(df, column_types):
+    """Encode the tuples of a frame (no header/trailer) in column_types order"""
+    columns = [encode_column(df[name], column_type) for name, column_type in column_types.items()]
+    field_count = struct.pack('>h', len(columns))
+    return b''.join(chain.from_iterable(zip(repeat(field_count, len(df)), *columns)))
+
+
+def encode_binary_copy(df, column_types):
+    """Complete COPY ... WITH (FORMAT binary) payload for a frame"""
+    return COPY_HEADER + encode_rows(df, column_types) + COPY_TRAILER
+
+
+def _decode_numeric(data):
+    ndigits, weight, sign, scale = struct.unpack_from('>hhHh', data)
+    groups = struct.unpack_from(f'>{ndigits}h', data, 8)
+    if sign == NUMERIC_NAN:
+        return Decimal('NaN')
+    value = sum((Decimal(group).scaleb(4 * (weight - i)) for i, group in enumerate(groups)), Decimal(0))
+    value = value.quantize(Decimal(1).scaleb(-scale))
+    return -value if sign == NUMERIC_NEG else value
+
+
+def decode_binary_copy(payload, column_types):
+    """Decode a binary COPY payload back into a list of row tuples"""
+    if not payload.startswith(COPY_HEADER[:11]):
+        raise ValueError("not a PostgreSQL binary COPY payload")
+    _, extension_length = struct.unpack_from('>ii', payload, 11)
+    offset = 19 + extension_length
+    types = list(column_types.values())
+    rows = []
+    while True:
+        (field_count,) = struct.unpack_from('>h', payload, offset)
+        offset += 2
+        if field_count == -1:
+            return rows
+        row = []
+        for column_type in types:
+            (length,) = struct.unpack_from('>i', payload, offset)
+            offset += 4
+            if length == -1:
+                row.append(None)
+                continue
+            data = payload[offset:offset + length]
+            offset += length
+            if column_type == 'date':
+                row.append((POSTGRES_EPOCH + np.timedelta64(struct.unpack('>i', data)[0], 'D')).astype(object))
+            elif column_type in FIXED_WIDTH:
+                row.append(np.frombuffer(data, dtype=FIXED_WIDTH[column_type])[0].item())
+            elif column_type.startswith('numeric'):
+                row.append(_decode_numeric(data))
+            else:
+                row.append(data.decode('utf-8'))
+        rows.append(tuple(row))
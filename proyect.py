@@ -6,6 +6,7 @@ Comprehensive analysis tool for streaming platform data
 
 import os
 import json
+import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -20,12 +21,109 @@ from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.cluster import KMeans
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
-from scipy import stats
+from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, silhouette_score
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from aggregates import (DistinctState, MinMaxState, MomentsState, QuantileState, TopKState,
+                        anova_from_moments, deserialize_state, grouped_moments, merge_states,
+                        serialize_states, ttest_from_moments)
+from parallel_agg import MIN_PARALLEL_ROWS, user_features_parallel
+from rollups import build_rollups, save_rollups
+from sampling import (SAMPLE_STRATA, stratified_mean, stratified_sample, stratified_total,
+                      stratum_keys, stratum_part)
+
+# Sections computed from the whole users/content files, which every shard reads in full
+DIMENSION_SECTIONS = ('users', 'content')
+
+def compute_partial_aggregates(users_df, sessions_df, content_df, merged_df, sample_population=None):
+    """Compute the mergeable states behind the descriptive stats, tests and report"""
+    missing = {column: MomentsState().update(merged_df[column].isnull().astype(int))
+               for column in merged_df.columns}
+    aggregates = {
+        'users': {
+            # Exact row count; HLL only where a distinct count is needed
+            'rows': MomentsState().update(np.ones(len(users_df))),
+            'age': MomentsState().update(users_df['age']),
+            'country': DistinctState().update(users_df['country']),
+            'subscription_type': TopKState().update(users_df['subscription_type']),
+        },
+        'sessions': {
+            'rows': MomentsState().update(np.ones(len(sessions_df))),
+            'watch_duration_minutes': MomentsState().update(sessions_df['watch_duration_minutes']),
+            'completion_percentage': MomentsState().update(sessions_df['completion_percentage']),
+            'completion_quantiles': QuantileState().update(sessions_df['completion_percentage']),
+            'watch_date': MinMaxState().update(sessions_df['watch_date']),
+            'quality_level': TopKState().update(sessions_df['quality_level']),
+            'device_type': TopKState().update(sessions_df['device_type']),
+        },
+        'content': {
+            'duration_minutes': MomentsState().update(content_df['duration_minutes']),
+            'rating': MomentsState().update(content_df['rating']),
+        },
+        'merged': {
+            'completion_by_subscription': grouped_moments(merged_df, 'subscription_type', 'completion_percentage'),
+            'duration_by_device': grouped_moments(merged_df, 'device_type', 'watch_duration_minutes'),
+            'completion_by_quality': grouped_moments(merged_df, 'is_high_quality', 'completion_percentage'),
+            'country': TopKState().update(merged_df['country']),
+            'missing': missing,
+        },
+    }
+    
+    # Sampled runs also keep per-stratum moments so results can be scaled back up
+    if sample_population is not None:
+        sessions_df = sessions_df.assign(stratum=sample_population['keys'])
+        quality = {
+            level: grouped_moments(sessions_df.assign(is_level=(sessions_df['quality_level'] == level).astype(int)),
+                                   'stratum', 'is_level')
+            for level in sessions_df['quality_level'].dropna().unique()
+        }
+        aggregates['sessions']['watch_date'] = sample_population['watch_date']
+        aggregates['strata'] = {
+            'population': sample_population['strata'],
+            'rows': grouped_moments(sessions_df.assign(row=1), 'stratum', 'row'),
+            'watch_duration_minutes': grouped_moments(sessions_df, 'stratum', 'watch_duration_minutes'),
+            'completion_percentage': grouped_moments(sessions_df, 'stratum', 'completion_percentage'),
+            'quality_level': quality,
+        }
+    return aggregates
+
+SAMPLE_ONLY_NOTE = ("sample-only result: computed on the unweighted stratified sample, so strata raised to "
+                    "min_per_stratum are over-represented; no population CIs")
+
+def session_estimates(aggregates):
+    """Population-scale session statistics with 95% CIs from a stratified sample"""
+    strata = aggregates['strata']
+    population = strata['population']
+    sampled = sum(state.count for state in strata['rows'].values())
+    
+    # Counts by a stratification dimension are known exactly from the population
+    def exact_counts(position):
+        counts = {}
+        for key, size in population.counts.items():
+            value = stratum_part(key, position)
+            counts[value] = counts.get(value, 0) + size
+        return pd.Series(counts, dtype='int64').sort_values(ascending=False)
+    
+    position = SAMPLE_STRATA.index('subscription_type')
+    subscriptions = exact_counts(position).index
+    return {
+        'total_sessions': sum(population.counts.values()),
+        'sampled_sessions': sampled,
+        'avg_duration': stratified_mean(population, strata['watch_duration_minutes']),
+        'avg_completion': stratified_mean(population, strata['completion_percentage']),
+        'completion_by_subscription': {
+            sub: stratified_mean(population, strata['completion_percentage'],
+                                 where=lambda key, sub=sub: stratum_part(key, position) == sub)
+            for sub in subscriptions
+        },
+        'quality_counts': {level: stratified_total(population, moments)
+                           for level, moments in strata['quality_level'].items()},
+        'device_counts': exact_counts(SAMPLE_STRATA.index('device_type')),
+        'country_counts': exact_counts(SAMPLE_STRATA.index('country')),
+    }
+
 class VideoStreamingAnalyzer:
     """Main class for video streaming platform analysis"""
     
@@ -35,6 +133,11 @@ class VideoStreamingAnalyzer:
         self.sessions_df = None
         self.content_df = None
         self.merged_df = None
+        self.rollups = None
+        self.aggregates = None
+        # None until predictive_modeling runs (never in a --from-partials reduce)
+        self.models_trained = None
+        self.sample_population = None
         
     def load_data(self):
         """Load all datasets"""
@@ -44,7 +147,7 @@ class VideoStreamingAnalyzer:
         self.users_df = pd.read_csv(os.path.join(self.data_dir, 'users.csv'))
         print(f"Loaded {len(self.users_df)} users")
         
-        # Load sessions data
+        # Load sessions data (the analysis needs every session in memory at once)
         self.sessions_df = pd.read_csv(os.path.join(self.data_dir, 'viewing_sessions.csv'))
         print(f"Loaded {len(self.sessions_df)} viewing sessions")
         
@@ -60,6 +163,24 @@ class VideoStreamingAnalyzer:
         
         print("Data loading completed!")
         
+    def sample_sessions(self, fraction, seed=0):
+        """Keep a deterministic sample of sessions stratified by subscription, country and device"""
+        users = self.users_df.set_index('user_id')
+        # Kept beside the sessions rather than as a column, so it never reaches merged_df
+        keys = stratum_keys([
+            self.sessions_df['user_id'].map(users['subscription_type']),
+            self.sessions_df['user_id'].map(users['country']),
+            self.sessions_df['device_type'],
+        ])
+        total = len(self.sessions_df)
+        watch_dates = MinMaxState().update(self.sessions_df['watch_date'])
+        
+        self.sessions_df, strata = stratified_sample(self.sessions_df, keys, 'session_id', fraction, seed=seed)
+        self.sample_population = {'strata': strata, 'watch_date': watch_dates,
+                                  'keys': keys.loc[self.sessions_df.index]}
+        print(f"Sampled {len(self.sessions_df):,} of {total:,} sessions "
+              f"({len(strata.counts)} strata, fraction {fraction:g})")
+        
     def create_merged_dataset(self):
         """Create comprehensive merged dataset for analysis"""
         print("Creating merged dataset...")
@@ -87,6 +208,46 @@ class VideoStreamingAnalyzer:
                                                  labels=['18-25', '26-35', '36-50', '50+'])
         
         print(f"Merged dataset created with {len(self.merged_df)} records")
+
+    def build_rollups(self, output_dir='rollups'):
+        """Materialize daily and monthly session rollups for dashboards and reports"""
+        print("Building session rollups...")
+        
+        self.rollups = build_rollups(self.merged_df)
+        paths = save_rollups(self.rollups, output_dir)
+        for grain, path in paths.items():
+            print(f"{grain.capitalize()} rollup: {len(self.rollups[grain]):,} rows -> {path}")
+        
+    def compute_aggregates(self):
+        """Compute the partial aggregates for the loaded data"""
+        self.aggregates = compute_partial_aggregates(self.users_df, self.sessions_df,
+                                                     self.content_df, self.merged_df,
+                                                     self.sample_population)
+        
+    def save_partials(self, path):
+        """Write this shard's partial aggregates as JSON"""
+        with open(path, 'w') as f:
+            json.dump(serialize_states(self.aggregates), f)
+        print(f"Partial aggregates saved as '{path}'")
+        
+    def load_partials(self, paths):
+        """Reduce partial aggregates written by save_partials on other shards
+        
+        Shards split the sessions but share the dimension files: an identical
+        users/content section is counted once, different ones are merged.
+        """
+        seen = {section: set() for section in DIMENSION_SECTIONS}
+        for path in paths:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            for section in DIMENSION_SECTIONS:
+                fingerprint = json.dumps(data.get(section), sort_keys=True)
+                if fingerprint in seen[section]:
+                    data.pop(section)
+                seen[section].add(fingerprint)
+            partial = deserialize_state(data)
+            self.aggregates = partial if self.aggregates is None else merge_states(self.aggregates, partial)
+        print(f"Merged partial aggregates from {len(paths)} shard(s)")
         
     def descriptive_statistics(self):
         """Generate comprehensive descriptive statistics"""
@@ -94,31 +255,51 @@ class VideoStreamingAnalyzer:
         print("DESCRIPTIVE STATISTICS")
         print("="*50)
         
+        users = self.aggregates['users']
+        sessions = self.aggregates['sessions']
+        content = self.aggregates['content']
+        
         # User statistics
         print("\nUSER STATISTICS:")
-        print(f"Total Users: {self.users_df['user_id'].nunique():,}")
-        print(f"Average Age: {self.users_df['age'].mean():.1f} years")
-        print(f"Countries: {self.users_df['country'].nunique()}")
+        print(f"Total Users: {users['rows'].count:,}")
+        print(f"Average Age: {users['age'].mean:.1f} years")
+        print(f"Countries: {users['country'].finalize()}")
         print("\nSubscription Distribution:")
-        print(self.users_df['subscription_type'].value_counts())
+        print(users['subscription_type'].finalize())
         
         # Session statistics
+        date_range = sessions['watch_date'].finalize()
         print("\nSESSION STATISTICS:")
-        print(f"Total Sessions: {len(self.sessions_df):,}")
-        print(f"Average Session Duration: {self.sessions_df['watch_duration_minutes'].mean():.1f} minutes")
-        print(f"Average Completion Rate: {self.sessions_df['completion_percentage'].mean():.1f}%")
+        if 'strata' in self.aggregates:
+            estimates = session_estimates(self.aggregates)
+            print(f"Total Sessions: {estimates['total_sessions']:,} (sampled {estimates['sampled_sessions']:,})")
+            print(f"Date Range: {date_range['min']:%Y-%m-%d} to {date_range['max']:%Y-%m-%d}")
+            print(f"Average Session Duration: {estimates['avg_duration'].format('.1f', ' min')}")
+            print(f"Average Completion Rate: {estimates['avg_completion'].format('.1f', '%')}")
+        else:
+            print(f"Total Sessions: {sessions['rows'].count:,}")
+            print(f"Date Range: {date_range['min']:%Y-%m-%d} to {date_range['max']:%Y-%m-%d}")
+            print(f"Average Session Duration: {sessions['watch_duration_minutes'].mean:.1f} minutes")
+            print(f"Average Completion Rate: {sessions['completion_percentage'].mean:.1f}%")
+            print(f"Median Completion Rate: {sessions['completion_quantiles'].quantile(0.5):.1f}%")
         
         # Content statistics
         print("\nCONTENT STATISTICS:")
-        print(f"Total Content Items: {len(self.content_df):,}")
-        print(f"Average Duration: {self.content_df['duration_minutes'].mean():.1f} minutes")
-        print(f"Average Rating: {self.content_df['rating'].mean():.2f}")
+        print(f"Total Content Items: {content['duration_minutes'].count:,}")
+        print(f"Average Duration: {content['duration_minutes'].mean:.1f} minutes")
+        print(f"Average Rating: {content['rating'].mean:.2f}")
         
         # Quality and device distribution
         print("\nQUALITY LEVEL DISTRIBUTION:")
-        print(self.sessions_df['quality_level'].value_counts())
-        print("\nDEVICE TYPE DISTRIBUTION:")
-        print(self.sessions_df['device_type'].value_counts())
+        if 'strata' in self.aggregates:
+            for level, estimate in sorted(estimates['quality_counts'].items(), key=lambda item: -item[1].value):
+                print(f"{level:<8} {estimate.format(',.0f')}")
+            print("\nDEVICE TYPE DISTRIBUTION:")
+            print(estimates['device_counts'])
+        else:
+            print(sessions['quality_level'].finalize())
+            print("\nDEVICE TYPE DISTRIBUTION:")
+            print(sessions['device_type'].finalize())
         
     def hypothesis_testing(self):
         """Perform hypothesis tests"""
@@ -126,58 +307,56 @@ class VideoStreamingAnalyzer:
         print("HYPOTHESIS TESTING")
         print("="*50)
         
+        merged = self.aggregates['merged']
+        if 'strata' in self.aggregates:
+            sampled = sum(state.count for state in self.aggregates['strata']['rows'].values())
+            print(f"\nTests run on the {sampled:,}-session sample ({SAMPLE_ONLY_NOTE})")
+        
         # Test 1: Subscription type vs completion rate
         print("\n1. SUBSCRIPTION TYPE vs COMPLETION RATE")
-        subscription_groups = []
-        for sub_type in self.merged_df['subscription_type'].unique():
-            group_data = self.merged_df[self.merged_df['subscription_type'] == sub_type]['completion_percentage']
-            subscription_groups.append(group_data)
-        
-        f_stat, p_value = stats.f_oneway(*subscription_groups)
+        f_stat, p_value = anova_from_moments(merged['completion_by_subscription'].values())
         print(f"ANOVA F-statistic: {f_stat:.4f}")
         print(f"P-value: {p_value:.6f}")
         print(f"Result: {'Significant difference' if p_value < 0.05 else 'No significant difference'}")
         
         # Test 2: Device type vs watch duration
         print("\n2. DEVICE TYPE vs WATCH DURATION")
-        device_groups = []
-        for device in self.merged_df['device_type'].unique():
-            group_data = self.merged_df[self.merged_df['device_type'] == device]['watch_duration_minutes']
-            device_groups.append(group_data)
-        
-        f_stat, p_value = stats.f_oneway(*device_groups)
+        f_stat, p_value = anova_from_moments(merged['duration_by_device'].values())
         print(f"ANOVA F-statistic: {f_stat:.4f}")
         print(f"P-value: {p_value:.6f}")
         print(f"Result: {'Significant difference' if p_value < 0.05 else 'No significant difference'}")
         
         # Test 3: Quality level vs completion rate (t-test)
         print("\n3. HIGH QUALITY vs COMPLETION RATE")
-        high_quality = self.merged_df[self.merged_df['is_high_quality'] == True]['completion_percentage']
-        low_quality = self.merged_df[self.merged_df['is_high_quality'] == False]['completion_percentage']
-        
-        t_stat, p_value = stats.ttest_ind(high_quality, low_quality)
+        by_quality = merged['completion_by_quality']
+        t_stat, p_value = ttest_from_moments(by_quality['True'], by_quality['False'])
         print(f"T-statistic: {t_stat:.4f}")
         print(f"P-value: {p_value:.6f}")
         print(f"Result: {'Significant difference' if p_value < 0.05 else 'No significant difference'}")
         
-    def user_clustering(self):
+    def user_clustering(self, n_jobs=1):
         """Perform user clustering analysis"""
         print("\n" + "="*50)
         print("USER CLUSTERING ANALYSIS")
         print("="*50)
-        
-        # Prepare features for clustering
-        user_features = self.merged_df.groupby('user_id').agg({
-            'session_id': 'count',
-            'watch_duration_minutes': 'sum',
-            'completion_percentage': 'mean',
-            'content_id': 'nunique',
-            'is_high_quality': 'mean',
-            'age': 'first'
-        }).reset_index()
-        
-        user_features.columns = ['user_id', 'total_sessions', 'total_watch_time', 
-                               'avg_completion', 'unique_content', 'quality_preference', 'age']
+        if self.sample_population is not None:
+            print(f"Note: {SAMPLE_ONLY_NOTE}")
+        
+        # Prepare features for clustering (hash-partitioned across processes for large inputs)
+        if n_jobs != 1 and len(self.merged_df) >= MIN_PARALLEL_ROWS:
+            user_features = user_features_parallel(self.merged_df, n_jobs)
+        else:
+            user_features = self.merged_df.groupby('user_id').agg({
+                'session_id': 'count',
+                'watch_duration_minutes': 'sum',
+                'completion_percentage': 'mean',
+                'content_id': 'nunique',
+                'is_high_quality': 'mean',
+                'age': 'first'
+            }).reset_index()
+            
+            user_features.columns = ['user_id', 'total_sessions', 'total_watch_time', 
+                                   'avg_completion', 'unique_content', 'quality_preference', 'age']
         
         # Scale features
         scaler = StandardScaler()
@@ -222,6 +401,8 @@ class VideoStreamingAnalyzer:
         print("\n" + "="*50)
         print("PREDICTIVE MODELING")
         print("="*50)
+        if self.sample_population is not None:
+            print(f"Note: {SAMPLE_ONLY_NOTE}")
         
         # Prepare features for prediction
         features = self.merged_df[['age', 'watch_duration_minutes', 'is_high_quality', 
@@ -257,6 +438,7 @@ class VideoStreamingAnalyzer:
         
         print("\nRANDOM FOREST RESULTS:")
         print(f"AUC Score: {roc_auc_score(y_test, rf_prob):.4f}")
+        self.models_trained = 2
         print("\nClassification Report:")
         print(classification_report(y_test, rf_pred))
         
@@ -352,32 +534,60 @@ class VideoStreamingAnalyzer:
         print("GENERATING ANALYSIS REPORT")
         print("="*50)
         
+        users = self.aggregates['users']
+        sessions = self.aggregates['sessions']
+        merged = self.aggregates['merged']
+        top_device = sessions['device_type'].top(1)[0][0]
+        top_country = merged['country'].top(1)[0][0]
+        top_quality = sessions['quality_level'].top(1)[0][0]
+        lowest_completion = min(merged['completion_by_subscription'].items(), key=lambda item: item[1].mean)[0]
+        total_sessions = f"{sessions['rows'].count:,}"
+        avg_completion = f"{sessions['completion_percentage'].mean:.1f}%"
+        sampling_note = ""
+        if 'strata' in self.aggregates:
+            estimates = session_estimates(self.aggregates)
+            top_device = estimates['device_counts'].index[0]
+            top_country = estimates['country_counts'].index[0]
+            top_quality = max(estimates['quality_counts'].items(), key=lambda item: item[1].value)[0]
+            lowest_completion = min(estimates['completion_by_subscription'].items(), key=lambda item: item[1].value)[0]
+            total_sessions = f"{estimates['total_sessions']:,}"
+            avg_completion = estimates['avg_completion'].format('.1f', '%')
+            sampling_note = (f"\n- Sampling: stratified sample of {estimates['sampled_sessions']:,} sessions; "
+                             f"intervals are 95% confidence intervals.\n- Hypothesis tests, clustering and "
+                             f"models: {SAMPLE_ONLY_NOTE}")
+        if self.models_trained is None:
+            models_line = "- Models trained: skipped (no raw data in this run)"
+        else:
+            models_line = f"- Models trained: {self.models_trained} (Logistic Regression, Random Forest)"
+        missing_cells = sum(state.total for state in merged['missing'].values())
+        total_cells = sum(state.count for state in merged['missing'].values())
+        
         report = f"""
 VIDEO STREAMING PLATFORM ANALYSIS REPORT
 Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 EXECUTIVE SUMMARY:
-- Total Users: {self.users_df['user_id'].nunique():,}
-- Total Sessions: {len(self.sessions_df):,}
-- Total Content: {len(self.content_df):,}
-- Average Completion Rate: {self.sessions_df['completion_percentage'].mean():.1f}%
+- Total Users: {users['rows'].count:,}
+- Total Sessions: {total_sessions}
+- Total Content: {self.aggregates['content']['duration_minutes'].count:,}
+- Average Completion Rate: {avg_completion}
 
 KEY INSIGHTS:
-1. Most popular subscription type: {self.users_df['subscription_type'].mode().iloc[0]}
-2. Most used device: {self.sessions_df['device_type'].mode().iloc[0]}
-3. Most common quality: {self.sessions_df['quality_level'].mode().iloc[0]}
-4. Top country by sessions: {self.merged_df['country'].value_counts().index[0]}
+1. Most popular subscription type: {users['subscription_type'].top(1)[0][0]}
+2. Most used device: {top_device}
+3. Most common quality: {top_quality}
+4. Top country by sessions: {top_country}
 
 RECOMMENDATIONS:
-1. Focus on improving completion rates for {self.merged_df.groupby('subscription_type')['completion_percentage'].mean().idxmin()} subscribers
-2. Optimize streaming quality for {self.sessions_df['device_type'].mode().iloc[0]} devices
-3. Expand content library in {self.merged_df['country'].value_counts().index[0]} market
+1. Focus on improving completion rates for {lowest_completion} subscribers
+2. Optimize streaming quality for {top_device} devices
+3. Expand content library in {top_country} market
 4. Implement personalized recommendations based on user clustering analysis
 
 TECHNICAL METRICS:
-- Data quality: {((1 - self.merged_df.isnull().sum().sum() / (len(self.merged_df) * len(self.merged_df.columns))) * 100):.1f}%
+- Data quality: {((1 - missing_cells / total_cells) * 100):.1f}%
 - Analysis completion: 100%
-- Models trained: 2 (Logistic Regression, Random Forest)
+{models_line}{sampling_note}
         """
         
         with open('analysis_report.txt', 'w') as f:
@@ -388,22 +598,54 @@ TECHNICAL METRICS:
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Video streaming platform performance analysis")
+    parser.add_argument('--data-dir', default='.', help="Directory with users.csv, viewing_sessions.csv and content.json")
+    parser.add_argument('--partials-out', help="Only compute this shard's partial aggregates and write them as JSON")
+    parser.add_argument('--from-partials', nargs='+', metavar='PATH',
+                        help="Reduce partial aggregates from shards and report on them without raw data")
+    parser.add_argument('--sample', type=float, metavar='FRACTION',
+                        help="Analyze a deterministic stratified sample of sessions (e.g. 0.05) with 95%% CIs")
+    parser.add_argument('--sample-seed', type=int, default=0, help="Seed for the sample hash")
+    args = parser.parse_args()
+    if args.sample is not None and not 0 < args.sample <= 1:
+        parser.error("--sample must be a fraction in (0, 1]")
+    
     print("VIDEO STREAMING PLATFORM PERFORMANCE ANALYSIS")
     print("=" * 60)
     
     # Initialize analyzer
-    analyzer = VideoStreamingAnalyzer()
+    analyzer = VideoStreamingAnalyzer(args.data_dir)
+    
+    # Central reduce step: statistics and report from merged shard aggregates
+    if args.from_partials:
+        analyzer.load_partials(args.from_partials)
+        analyzer.descriptive_statistics()
+        analyzer.hypothesis_testing()
+        analyzer.generate_report()
+        return
     
     # Load data
     analyzer.load_data()
+    if args.sample is not None:
+        analyzer.sample_sessions(args.sample, args.sample_seed)
     
     # Create merged dataset
     analyzer.create_merged_dataset()
+    analyzer.compute_aggregates()
+    
+    # Map step only: ship this shard's aggregates to the reducer
+    if args.partials_out:
+        analyzer.save_partials(args.partials_out)
+        return
+    
+    # Materialize rollups once per ingest (never from a sample)
+    if args.sample is None:
+        analyzer.build_rollups()
     
     # Run analysis
     analyzer.descriptive_statistics()
     analyzer.hypothesis_testing()
-    user_clusters = analyzer.user_clustering()
+    user_clusters = analyzer.user_clustering(n_jobs=os.cpu_count())
     models = analyzer.predictive_modeling()
     analyzer.create_visualizations()
     analyzer.generate_report()
@@ -413,6 +655,7 @@ def main():
     print("Check the following files:")
     print("- streaming_analysis_dashboard.png (visualizations)")
     print("- analysis_report.txt (summary report)")
+    print("- rollups/sessions_daily.csv, rollups/sessions_monthly.csv (pre-aggregated cubes)")
     print("="*60)
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Source-to-database reconciliation of viewing sessions by watch_date month
+Each month is summarized by its row count and an order-independent content
+hash (sum of 64-bit row hashes modulo 2^64), computed on the source chunks
+while loading and server-side in a single grouped query
+"""
+
+import hashlib
+import numpy as np
+import pandas as pd
+
+HASH_MODULUS = 2 ** 64
+
+# Canonical row text shared by both sides: fields joined by '|', NULL as ''
+CANONICAL_SESSION_SQL = """concat_ws('|', session_id, coalesce(user_id, ''), coalesce(content_id, ''),
+    to_char(watch_date, 'YYYY-MM-DD'), coalesce(watch_duration_minutes::text, ''),
+    coalesce(completion_percentage::text, ''),
+    coalesce(device_type, ''), coalesce(quality_level, ''))"""
+
+SERVER_DIGEST_SQL = f"""
+    SELECT to_char(watch_date, 'YYYY-MM') AS month, COUNT(*),
+           SUM(('x' || substr(md5({CANONICAL_SESSION_SQL}), 1, 16))::bit(64)::bigint)
+    FROM {{table}}
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+
+def _text(series):
+    return series.astype('string').fillna('')
+
+
+def canonical_session_text(sessions):
+    """Canonical text of each session row, identical to CANONICAL_SESSION_SQL"""
+    completion = sessions['completion_percentage'].map(lambda v: '' if pd.isna(v) else f'{v:.2f}')
+    fields = [_text(sessions['session_id']), _text(sessions['user_id']), _text(sessions['content_id']),
+              sessions['watch_date'].dt.strftime('%Y-%m-%d'), _text(sessions['watch_duration_minutes']),
+              completion.astype('string'), _text(sessions['device_type']), _text(sessions['quality_level'])]
+    return fields[0].str.cat(fields[1:], sep='|')
+
+
+def row_hashes(texts):
+    """First 64 bits of the md5 of each text, as unsigned integers"""
+    digests = b''.join(hashlib.md5(text.encode('utf-8')).digest()[:8] for text in texts)
+    return np.frombuffer(digests, dtype='>u8').astype(np.uint64)
+
+
+class PartitionDigest:
+    """Row count and hash sum per watch_date month; mergeable and JSON-serializable"""
+
+    def __init__(self, partitions=None):
+        self.partitions = partitions or {}    # month -> [count, hash_sum]
+
+    def update(self, sessions):
+        if len(sessions) == 0:
+            return self
+        frame = pd.DataFrame({'month': sessions['watch_date'].dt.strftime('%Y-%m').to_numpy(),
+                              'hash': row_hashes(canonical_session_text(sessions))})
+        for month, hashes in frame.groupby('month')['hash']:
+            # uint64 addition wraps, which is exactly the sum modulo 2^64
+            hash_sum = int(np.add.reduce(hashes.to_numpy(dtype=np.uint64), dtype=np.uint64))
+            self._add(month, len(hashes), hash_sum)
+        return self
+
+    def _add(self, month, count, hash_sum):
+        current = self.partitions.setdefault(month, [0, 0])
+        current[0] += count
+        current[1] = (current[1] + hash_sum) % HASH_MODULUS
+
+    def merge(self, other):
+        for month, (count, hash_sum) in other.partitions.items():
+            self._add(month, count, hash_sum)
+        return self
+
+    @property
+    def rows(self):
+        return sum(count for count, _ in self.partitions.values())
+
+    def to_dict(self):
+        return {month: list(values) for month, values in sorted(self.partitions.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({month: [int(count), int(hash_sum)] for month, (count, hash_sum) in (data or {}).items()})
+
+
+def server_digest(cursor, table='viewing_sessions'):
+    """The same per-month digest computed by the database in one grouped query"""
+    cursor.execute(SERVER_DIGEST_SQL.format(table=table))
+    # Signed bigint sums map onto the same residues modulo 2^64
+    return PartitionDigest({month: [count, int(hash_sum) % HASH_MODULUS]
+                            for month, count, hash_sum in cursor.fetchall()})
+
+
+def compare_digests(source, server):
+    """Months whose count or content hash differ: (month, source rows, db rows, hash matches)"""
+    mismatches = []
+    for month in sorted(set(source.partitions) | set(server.partitions)):
+        source_count, source_hash = source.partitions.get(month, [0, 0])
+        server_count, server_hash = server.partitions.get(month, [0, 0])
+        if source_count != server_count or source_hash != server_hash:
+            mismatches.append((month, source_count, server_count, source_hash == server_hash))
+    return mismatches
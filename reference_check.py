@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Client-side referential integrity for the session loads
+Builds the user_id / content_id key sets from the dimension sources and
+splits every session chunk into known and orphan rows before it reaches the
+database; rejected rows are appended to a CSV with the reason
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+REJECT_REASON_COLUMN = 'reject_reason'
+
+
+def load_user_ids(users_file):
+    """Distinct user_id values of the users CSV"""
+    return pd.read_csv(users_file, usecols=['user_id'], dtype={'user_id': 'string'})['user_id'].dropna().unique()
+
+
+def load_content_ids(content_file):
+    """Distinct content_id values of the movies and series in content.json"""
+    with open(content_file, 'r', encoding='utf-8') as f:
+        content_data = json.load(f)
+    items = content_data.get('movies', []) + content_data.get('series', [])
+    return pd.unique(pd.Series([item['content_id'] for item in items], dtype='string').dropna())
+
+
+class ReferenceValidator:
+    """Check session chunks against the dimension keys with vectorized lookups"""
+
+    def __init__(self, user_ids, content_ids):
+        # A unique Index keeps its hash table between calls: each chunk costs O(chunk)
+        self.user_ids = pd.Index(user_ids).unique()
+        self.content_ids = pd.Index(content_ids).unique()
+
+    @classmethod
+    def from_sources(cls, users_file, content_file):
+        return cls(load_user_ids(users_file), load_content_ids(content_file))
+
+    def known(self, keys, values):
+        return keys.get_indexer(values.astype(object)) >= 0
+
+    def split(self, sessions, rejected=None):
+        """(sessions with known keys, rejected rows with a reject_reason column)"""
+        known_user = self.known(self.user_ids, sessions['user_id'])
+        known_content = self.known(self.content_ids, sessions['content_id'])
+        known = known_user & known_content
+        orphans = sessions.loc[~known].copy()
+        orphans[REJECT_REASON_COLUMN] = np.where(known_user[~known], 'unknown_content_id', 'unknown_user_id')
+
+        parts = [orphans]
+        if rejected is not None and len(rejected):
+            rejected = rejected.copy()
+            rejected[REJECT_REASON_COLUMN] = 'invalid_values'
+            parts.insert(0, rejected)
+        return sessions.loc[known], pd.concat(parts)
+
+    def describe(self):
+        return f"{len(self.user_ids):,} user_id, {len(self.content_ids):,} content_id"
+
+
+class RejectWriter:
+    """Append rejected rows to a CSV, writing the header only once"""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.rows = 0
+        self._has_header = append and os.path.exists(path) and os.path.getsize(path) > 0
+        if not append and os.path.exists(path):
+            os.remove(path)
+
+    def write(self, rejected):
+        if len(rejected) == 0:
+            return
+        rejected.to_csv(self.path, mode='a', index=False, header=not self._has_header)
+        self._has_header = True
+        self.rows += len(rejected)
+
+    def absorb(self, part_path):
+        """Append a worker's reject file to this one and remove it"""
+        if not os.path.exists(part_path):
+            return
+        for chunk in pd.read_csv(part_path, chunksize=100_000, dtype='string'):
+            self.write(chunk)
+        os.remove(part_path)
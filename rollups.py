@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Materialized session rollups for the Video Streaming Platform
+Pre-aggregated day/month cubes that dashboards and reports can read
+instead of scanning every viewing session
+"""
+
+import os
+import numpy as np
+import pandas as pd
+
+from sketches import (decode_registers, encode_registers, estimate_cardinality,
+                      hash_values, register_updates)
+
+ROLLUP_DIMENSIONS = ['country', 'subscription_type', 'device_type', 'quality_level']
+ROLLUP_MEASURES = ['session_count', 'duration_sum', 'duration_sumsq',
+                   'completion_sum', 'completion_sumsq']
+HLL_PRECISION = 12
+
+
+def _hll_column(group_codes, n_groups, user_ids, precision):
+    """Build one serialized users HyperLogLog per group code"""
+    index, rank = register_updates(hash_values(user_ids), precision)
+    updates = pd.DataFrame({'group': group_codes, 'index': index, 'rank': rank})
+    updates = updates.groupby(['group', 'index'], sort=True)['rank'].max().reset_index()
+
+    bounds = np.searchsorted(updates['group'].to_numpy(), np.arange(n_groups + 1))
+    idx = updates['index'].to_numpy()
+    ranks = updates['rank'].to_numpy()
+    return [encode_registers(idx[start:end], ranks[start:end], precision)
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def build_daily_rollup(merged_df, precision=HLL_PRECISION):
+    """Aggregate sessions into a day x country x subscription x device x quality cube"""
+    sessions = merged_df[['watch_date', 'user_id', 'watch_duration_minutes',
+                          'completion_percentage'] + ROLLUP_DIMENSIONS].copy()
+    sessions['period'] = sessions['watch_date'].dt.normalize()
+    sessions['duration_sq'] = sessions['watch_duration_minutes'].astype(float) ** 2
+    sessions['completion_sq'] = sessions['completion_percentage'].astype(float) ** 2
+
+    keys = ['period'] + ROLLUP_DIMENSIONS
+    grouped = sessions.groupby(keys, dropna=False, sort=True)
+    rollup = grouped.agg(
+        session_count=('user_id', 'size'),
+        duration_sum=('watch_duration_minutes', 'sum'),
+        duration_sumsq=('duration_sq', 'sum'),
+        completion_sum=('completion_percentage', 'sum'),
+        completion_sumsq=('completion_sq', 'sum'),
+    ).reset_index()
+
+    rollup['users_hll'] = _hll_column(grouped.ngroup().to_numpy(), len(rollup),
+                                      sessions['user_id'].to_numpy(), precision)
+    return rollup
+
+
+def _coarsen(rollup, keys, precision):
+    """Sum the measures onto fewer keys and merge the user registers per group"""
+    grouped = rollup.groupby(keys, dropna=False, sort=True)
+    coarse = grouped[ROLLUP_MEASURES].sum().reset_index()
+
+    registers = np.zeros((len(coarse), 1 << precision), dtype=np.uint8)
+    for code, text in zip(grouped.ngroup().to_numpy(), rollup['users_hll']):
+        np.maximum(registers[code], decode_registers(text, precision), out=registers[code])
+    return coarse, registers
+
+
+def coarsen_rollup(rollup, keys, precision=HLL_PRECISION):
+    """Re-aggregate a rollup onto fewer keys, merging the user sketches"""
+    coarse, registers = _coarsen(rollup, keys, precision)
+    coarse['users_hll'] = [encode_registers(np.flatnonzero(row), row[row > 0], precision)
+                           for row in registers]
+    return coarse
+
+
+def build_rollups(merged_df, precision=HLL_PRECISION):
+    """Build the daily cube and the monthly cube derived from it"""
+    daily = build_daily_rollup(merged_df, precision)
+    monthly = daily.assign(period=daily['period'].dt.to_period('M').dt.to_timestamp())
+    monthly = coarsen_rollup(monthly, ['period'] + ROLLUP_DIMENSIONS, precision)
+    return {'daily': daily, 'monthly': monthly}
+
+
+def summarize_rollup(rollup, by, precision=HLL_PRECISION):
+    """Finalize a rollup into readable metrics grouped by the given columns"""
+    summary, registers = _coarsen(rollup, by, precision)
+    n = summary['session_count']
+    summary['avg_duration'] = summary['duration_sum'] / n
+    summary['avg_completion'] = summary['completion_sum'] / n
+    summary['std_duration'] = np.sqrt(
+        np.maximum(summary['duration_sumsq'] - n * summary['avg_duration'] ** 2, 0) / (n - 1))
+    summary['std_completion'] = np.sqrt(
+        np.maximum(summary['completion_sumsq'] - n * summary['avg_completion'] ** 2, 0) / (n - 1))
+    summary['unique_users'] = np.round(estimate_cardinality(registers)).astype(int)
+    return summary
+
+
+def save_rollups(rollups, output_dir='rollups'):
+    """Persist each rollup cube as CSV and return the written paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = {}
+    for grain, rollup in rollups.items():
+        path = os.path.join(output_dir, f'sessions_{grain}.csv')
+        rollup.to_csv(path, index=False, date_format='%Y-%m-%d')
+        paths[grain] = path
+    return paths
+
+
+def load_rollup(grain, output_dir='rollups'):
+    """Read a persisted rollup cube back into a DataFrame"""
+    path = os.path.join(output_dir, f'sessions_{grain}.csv')
+    rollup = pd.read_csv(path, parse_dates=['period'])
+    for column in ROLLUP_DIMENSIONS:
+        rollup[column] = rollup[column].astype('category')
+    return rollup
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Stratified sampling for fast exploratory runs of the analysis
+Deterministic hash-based sampling plus stratified estimators with 95% CIs
+"""
+
+import math
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+from aggregates import TopKState
+
+SAMPLE_STRATA = ['subscription_type', 'country', 'device_type']
+STRATUM_SEPARATOR = '|'
+MIN_PER_STRATUM = 50
+Z_95 = 1.959964
+
+
+class Estimate(namedtuple('Estimate', ['value', 'low', 'high'])):
+    """Point estimate with a 95% confidence interval"""
+
+    def format(self, spec, suffix=''):
+        return (f"{self.value:{spec}}{suffix} "
+                f"(95% CI {self.low:{spec}}{suffix} - {self.high:{spec}}{suffix})")
+
+
+def stratum_keys(columns):
+    """Join several aligned Series into one stratum key per row"""
+    columns = [c.astype(str) for c in columns]
+    return columns[0].str.cat(columns[1:], sep=STRATUM_SEPARATOR)
+
+
+def stratum_part(key, position):
+    """Extract one dimension (by position in SAMPLE_STRATA) from a stratum key"""
+    return key.split(STRATUM_SEPARATOR)[position]
+
+
+def hash_uniform(values, seed=0):
+    """Map keys to deterministic pseudo-uniform numbers in [0, 1)"""
+    hashes = pd.util.hash_array(np.asarray(values, dtype=object), hash_key=f'{seed:016d}')
+    return (hashes >> np.uint64(11)).astype(np.float64) * 2.0 ** -53
+
+
+def stratified_sample(df, strata, key_column, fraction, min_per_stratum=MIN_PER_STRATUM, seed=0):
+    """Sample rows whose key hashes under their stratum's rate
+
+    Every stratum is sampled at `fraction`, raised so that small strata still
+    keep about `min_per_stratum` rows. Returns the sample and the exact
+    population count per stratum.
+    """
+    if not 0 < fraction <= 1:
+        raise ValueError("sample fraction must be in (0, 1]")
+    population = TopKState(capacity=None).update(strata)
+    sizes = pd.Series(population.counts, dtype=float)
+    rates = np.minimum(1.0, np.maximum(fraction, min_per_stratum / sizes))
+
+    row_rates = strata.astype(str).map(rates).to_numpy()
+    keep = hash_uniform(df[key_column].to_numpy(), seed) < row_rates
+    return df[keep], population
+
+
+def stratified_mean(population, moments, where=None):
+    """Stratified estimate of a mean from per-stratum population counts and sample moments"""
+    strata = {key: size for key, size in population.counts.items()
+              if (where is None or where(key)) and key in moments and moments[key].count > 0}
+    total = sum(strata.values())
+    if total == 0:
+        return Estimate(float('nan'), float('nan'), float('nan'))
+
+    value = 0.0
+    variance = 0.0
+    for key, size in strata.items():
+        sample = moments[key]
+        weight = size / total
+        value += weight * sample.mean
+        if sample.count > 1:
+            finite_population = max(1 - sample.count / size, 0.0)
+            variance += weight ** 2 * finite_population * sample.variance / sample.count
+    half_width = Z_95 * math.sqrt(variance)
+    return Estimate(value, value - half_width, value + half_width)
+
+
+def stratified_total(population, moments, where=None):
+    """Scale a stratified mean of an indicator or measure up to a population total"""
+    size = sum(count for key, count in population.counts.items() if where is None or where(key))
+    mean = stratified_mean(population, moments, where)
+    return Estimate(mean.value * size, mean.low * size, mean.high * size)
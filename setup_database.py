@@ -8,30 +8,28 @@ import psycopg2
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import sys
 
+from db import connect, health_check, pg_settings
+from migrate import migrate
+
 def create_database():
     """Crear la base de datos si no existe"""
     try:
         # Conectar a la base de datos por defecto (postgres)
-        conn = psycopg2.connect(
-            host='localhost',
-            port=5432,
-            database='postgres',
-            user='postgres',
-            password='postgres'
-        )
+        conn = connect(database='postgres')
         conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
         cursor = conn.cursor()
         
         # Verificar si la base de datos existe
-        cursor.execute("SELECT 1 FROM pg_database WHERE datname = 'video_streaming_platform'")
+        database = pg_settings()['database']
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (database,))
         exists = cursor.fetchone()
         
         if not exists:
             # Crear la base de datos
-            cursor.execute('CREATE DATABASE video_streaming_platform')
-            print("✅ Base de datos 'video_streaming_platform' creada")
+            cursor.execute(f'CREATE DATABASE {database}')
+            print(f"✅ Base de datos '{database}' creada")
         else:
-            print("ℹ️  Base de datos 'video_streaming_platform' ya existe")
+            print(f"ℹ️  Base de datos '{database}' ya existe")
         
         cursor.close()
         conn.close()
@@ -41,29 +39,32 @@ def create_database():
         print("\n💡 Asegúrate de que:")
         print("   - PostgreSQL esté instalado y ejecutándose")
         print("   - El usuario 'postgres' tenga permisos")
-        print("   - La contraseña sea 'postgres' (o modifica el script)")
+        print("   - La contraseña sea 'postgres' (o define PG_PASSWORD en el entorno o en .env)")
         sys.exit(1)
 
 def test_connection():
     """Probar la conexión a la base de datos"""
+    ok, detail = health_check()['postgres']
+    if ok:
+        print(f"✅ Conexión exitosa a PostgreSQL: {detail}")
+    else:
+        print(f"❌ Error conectando a la base de datos: {detail}")
+    return ok
+
+def apply_migrations():
+    """Crear o actualizar el esquema con las migraciones pendientes"""
+    conn = connect()
     try:
-        conn = psycopg2.connect(
-            host='localhost',
-            port=5432,
-            database='video_streaming_platform',
-            user='postgres',
-            password='postgres'
-        )
-        cursor = conn.cursor()
-        cursor.execute('SELECT version();')
-        version = cursor.fetchone()[0]
-        print(f"✅ Conexión exitosa a PostgreSQL: {version}")
-        cursor.close()
+        applied = migrate(conn)
+        for migration in applied:
+            print(f"✅ Migración {migration.version:04d}_{migration.name} aplicada")
+        if not applied:
+            print("ℹ️  Esquema al día: no hay migraciones pendientes")
+    except (psycopg2.Error, ValueError) as e:
+        print(f"❌ Error aplicando migraciones: {e}")
+        sys.exit(1)
+    finally:
         conn.close()
-        return True
-    except psycopg2.Error as e:
-        print(f"❌ Error conectando a la base de datos: {e}")
-        return False
 
 def main():
     """Función principal"""
@@ -75,6 +76,7 @@ def main():
     
     # Probar conexión
     if test_connection():
+        apply_migrations()
         print("\n🎉 Base de datos configurada correctamente!")
         print("Ahora puedes ejecutar: python insert_data.py")
     else:
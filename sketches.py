@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Probabilistic sketches for the Video Streaming Platform analysis
+HyperLogLog distinct counters that can be built vectorized, stored and merged
+"""
+
+import base64
+import numpy as np
+import pandas as pd
+
+# HyperLogLog bias-correction constants for small register counts
+_ALPHA = {16: 0.673, 32: 0.697, 64: 0.709}
+
+# Serialized register layouts: all registers, or (index, rank) pairs for sparse sketches
+_DENSE = 0
+_SPARSE = 1
+_SPARSE_DTYPE = np.dtype([('index', '<u2'), ('rank', 'u1')])
+
+
+def hash_values(values):
+    """Hash an array-like of keys to uint64 (stable across runs and processes)"""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _bit_length(x):
+    """Vectorized bit length of a uint64 array"""
+    x = x.copy()
+    length = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = x >= (np.uint64(1) << np.uint64(shift))
+        length[mask] += shift
+        x[mask] >>= np.uint64(shift)
+    return length + (x > 0)
+
+
+def register_updates(hashes, precision):
+    """Return (register index, rank) pairs for an array of uint64 hashes"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    value_bits = 64 - precision
+    index = (hashes >> np.uint64(value_bits)).astype(np.int64)
+    remainder = hashes & np.uint64((1 << value_bits) - 1)
+    rank = (value_bits - _bit_length(remainder) + 1).astype(np.uint8)
+    return index, rank
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with 2**precision one-byte registers"""
+
+    def __init__(self, precision=12, registers=None):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            registers = np.zeros(self.m, dtype=np.uint8)
+        self.registers = np.asarray(registers, dtype=np.uint8)
+
+    def update(self, values):
+        """Add an array-like of keys to the sketch"""
+        values = np.asarray(values, dtype=object)
+        if len(values) == 0:
+            return self
+        index, rank = register_updates(hash_values(values), self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        """Merge another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        """Estimate the number of distinct keys added so far"""
+        return estimate_cardinality(self.registers[np.newaxis, :])[0]
+
+    def to_base64(self):
+        """Serialize the registers to a compact text form"""
+        index = np.flatnonzero(self.registers)
+        return encode_registers(index, self.registers[index], self.precision)
+
+    @classmethod
+    def from_base64(cls, text, precision):
+        """Rebuild a sketch from the output of to_base64"""
+        return cls(precision, decode_registers(text, precision))
+
+
+def encode_registers(index, rank, precision):
+    """Encode the non-zero registers of one sketch, sparse while that is smaller"""
+    m = 1 << precision
+    if len(index) * _SPARSE_DTYPE.itemsize < m:
+        pairs = np.empty(len(index), dtype=_SPARSE_DTYPE)
+        pairs['index'] = index
+        pairs['rank'] = rank
+        payload = bytes([_SPARSE]) + pairs.tobytes()
+    else:
+        registers = np.zeros(m, dtype=np.uint8)
+        registers[index] = rank
+        payload = bytes([_DENSE]) + registers.tobytes()
+    return base64.b64encode(payload).decode('ascii')
+
+
+def decode_registers(text, precision):
+    """Decode the output of encode_registers into a full register array"""
+    payload = base64.b64decode(text)
+    registers = np.zeros(1 << precision, dtype=np.uint8)
+    if payload[0] == _SPARSE:
+        pairs = np.frombuffer(payload, dtype=_SPARSE_DTYPE, offset=1)
+        registers[pairs['index']] = pairs['rank']
+    else:
+        registers[:] = np.frombuffer(payload, dtype=np.uint8, offset=1)
+    return registers
+
+
+def estimate_cardinality(registers):
+    """Estimate distinct counts for a 2-D array of register rows"""
+    registers = np.asarray(registers, dtype=np.float64)
+    m = registers.shape[1]
+    alpha = _ALPHA.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.sum(np.power(2.0, -registers), axis=1)
+    zeros = np.sum(registers == 0, axis=1)
+
+    # Small-range correction: linear counting while registers are still empty
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.where(zeros > 0, zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Index and constraint suspension for bulk reloads of PostgreSQL tables
+Captures the secondary indexes, primary key and foreign keys of a table, drops
+them for the load and rebuilds them afterwards: indexes in parallel on separate
+connections, foreign keys added NOT VALID and validated in a single pass.
+Also builds staging copies of tables and swaps them in for blue/green reloads.
+Partitioned tables are handled through their parent: index and constraint
+definitions cascade to the partitions
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Floor for maintenance_work_mem of each parallel index build
+MIN_BUILD_MEMORY_MB = 64
+
+
+class SuspendedTable:
+    """Definitions dropped from a table, enough to restore it exactly"""
+
+    def __init__(self, table, indexes, primary_key, foreign_keys):
+        self.table = table
+        self.indexes = indexes              # [(name, CREATE INDEX ...)]
+        self.primary_key = primary_key      # (name, PRIMARY KEY (...)) or None
+        self.foreign_keys = foreign_keys    # [(name, FOREIGN KEY ... REFERENCES ...)]
+
+    def describe(self):
+        names = [name for name, _ in self.indexes]
+        if self.primary_key:
+            names.append(self.primary_key[0])
+        names += [name for name, _ in self.foreign_keys]
+        return ', '.join(names) or '(nothing)'
+
+
+def secondary_indexes(cursor, table):
+    """(name, definition) of the indexes of a table not backing a constraint"""
+    # Indexes of a partitioned table print as ON ONLY, which would not cascade when re-run
+    cursor.execute("""
+        SELECT i.relname, replace(pg_get_indexdef(x.indexrelid), ' ON ONLY ', ' ON ')
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = %s::regclass
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+        ORDER BY i.relname
+    """, (table,))
+    return cursor.fetchall()
+
+
+def table_constraints(cursor, table, contype):
+    """(name, definition) of the constraints of a table of one type ('p', 'f', ...)"""
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype = %s
+        ORDER BY conname
+    """, (table, contype))
+    return cursor.fetchall()
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass", (table,))
+    return cursor.fetchone()[0]
+
+
+def child_partitions(cursor, table):
+    """Names of the partitions of a table (empty for a plain table)"""
+    cursor.execute("""
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        ORDER BY c.relname
+    """, (table,))
+    return [name for name, in cursor.fetchall()]
+
+
+def suspend_table(conn, table, keep_primary_key=False):
+    """Drop secondary indexes, foreign keys and (unless referenced or kept) the primary key"""
+    cursor = conn.cursor()
+    indexes = secondary_indexes(cursor, table)
+    foreign_keys = table_constraints(cursor, table, 'f')
+    primary_key = None
+    if not keep_primary_key:
+        keys = table_constraints(cursor, table, 'p')
+        # A primary key referenced by another table's FK cannot be dropped
+        cursor.execute("SELECT 1 FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'", (table,))
+        if keys and cursor.fetchone() is None:
+            primary_key = keys[0]
+
+    for name, _ in foreign_keys:
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+    if primary_key:
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {primary_key[0]}")
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    conn.commit()
+    cursor.close()
+    return SuspendedTable(table, indexes, primary_key, foreign_keys)
+
+
+def build_memory_mb(cursor, parallel_builds, total_mb=None):
+    """maintenance_work_mem per build so that concurrent builds share one budget"""
+    if total_mb is None:
+        cursor.execute("SELECT pg_size_bytes(current_setting('maintenance_work_mem'))")
+        # The server setting is meant for one build at a time: allow it per build up to 4 builds
+        total_mb = cursor.fetchone()[0] // (1024 * 1024) * min(parallel_builds, 4)
+    return max(MIN_BUILD_MEMORY_MB, total_mb // max(parallel_builds, 1))
+
+
+def _run_build(connection, statement, memory_mb):
+    """Run one DDL statement on its own connection with a dedicated memory budget
+
+    `connection` is a context manager factory such as db.pg_connection.
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        # SET LOCAL: the setting ends with the transaction, not with the pooled connection
+        cursor.execute(f"SET LOCAL maintenance_work_mem = '{int(memory_mb)}MB'")
+        cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+    return statement
+
+
+def duplicate_keys(cursor, table, definition):
+    """Number of key values appearing more than once, for a PRIMARY KEY (...) definition"""
+    columns = re.match(r'PRIMARY KEY \((.*)\)', definition).group(1)
+    cursor.execute(f"SELECT count(*) FROM (SELECT 1 FROM {table} GROUP BY {columns} HAVING count(*) > 1) d")
+    return cursor.fetchone()[0]
+
+
+def restore_table(conn, connection, suspended, parallel_builds=4, total_memory_mb=None, validate_foreign_keys=True):
+    """Rebuild the primary key and indexes in parallel, re-add and validate FKs, then ANALYZE
+
+    validate_foreign_keys=False leaves the FKs NOT VALID (enforced for new rows
+    only), for loads whose references were already checked client-side.
+    Partitioned tables do not accept NOT VALID FKs: there they are added, and
+    checked, in one step.
+
+    Every step is attempted even if an earlier one fails, so one bad key does
+    not leave the table without its other indexes. Returns the number of
+    indexes and keys rebuilt; if any step failed, raises RuntimeError naming each
+    failed step with its definition, so it can be re-run by hand.
+    """
+    table = suspended.table
+    failed = []
+
+    cursor = conn.cursor()
+    parallel_builds = max(1, min(parallel_builds, len(suspended.indexes)))
+    memory_mb = build_memory_mb(cursor, parallel_builds, total_memory_mb)
+    partitioned = is_partitioned(cursor, table)
+    conn.commit()
+
+    # ADD PRIMARY KEY locks the table exclusively, so it goes alone and first
+    if suspended.primary_key:
+        name, definition = suspended.primary_key
+        statement = f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"
+        try:
+            # Duplicates would make the build fail only after sorting the whole table
+            duplicates = duplicate_keys(cursor, table, definition)
+            conn.commit()
+            if duplicates:
+                failed.append((name, statement, f"{duplicates} duplicated key values"))
+            else:
+                _run_build(connection, statement, memory_mb * parallel_builds)
+        except Exception as e:
+            conn.rollback()
+            failed.append((name, statement, e))
+
+    # CREATE INDEX builds only share-lock the table: each scans it on its own backend
+    with ThreadPoolExecutor(max_workers=parallel_builds) as pool:
+        builds = {pool.submit(_run_build, connection, definition, memory_mb): (name, definition)
+                  for name, definition in suspended.indexes}
+    for build, (name, definition) in builds.items():
+        if build.exception() is not None:
+            failed.append((name, definition, build.exception()))
+
+    # NOT VALID skips the check at creation; VALIDATE checks all existing rows in one scan
+    for name, definition in suspended.foreign_keys:
+        statement = f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}{'' if partitioned else ' NOT VALID'}"
+        checks = [statement]
+        if validate_foreign_keys and not partitioned:
+            checks.append(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+        for statement in checks:
+            try:
+                cursor.execute(statement)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                failed.append((name, statement, e))
+                break
+
+    cursor.execute(f"ANALYZE {table}")
+    conn.commit()
+    cursor.close()
+    if failed:
+        steps = '; '.join(f"{name} ({str(error).strip()}): {statement}" for name, statement, error in failed)
+        raise RuntimeError(f"{table}: {len(failed)} restore steps failed: {steps}")
+    return len(suspended.indexes) + bool(suspended.primary_key)
+
+
+# Blue/green reloads: load into <table>_staging, then swap it in with renames
+STAGING_SUFFIX = '_staging'
+
+
+def create_swap_table(conn, table):
+    """Empty UNLOGGED copy of a table's columns (no indexes or constraints) to load into
+
+    A partitioned table gets a partitioned copy with the same key and no
+    partitions; the loader adds them (UNLOGGED) as it goes.
+    """
+    staging = table + STAGING_SUFFIX
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {staging} CASCADE")
+    cursor.execute("SELECT pg_get_partkeydef(%s::regclass)", (table,))
+    partition_key = cursor.fetchone()[0]
+    if partition_key:
+        # A partitioned table itself cannot be UNLOGGED, only its partitions
+        cursor.execute(f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY {partition_key}")
+    else:
+        cursor.execute(f"CREATE UNLOGGED TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)")
+    conn.commit()
+    cursor.close()
+    return staging
+
+
+def _stage_index(definition, staging):
+    """Point a CREATE INDEX definition at the staging table (or view) under a suffixed name"""
+    return re.sub(r'^(CREATE (?:UNIQUE )?INDEX) (\S+) ON (?:(\S+)\.)?\S+ ',
+                  lambda m: f"{m.group(1)} {m.group(2)}{STAGING_SUFFIX} ON "
+                            f"{m.group(3) + '.' if m.group(3) else ''}{staging} ",
+                  definition)
+
+
+def _stage_references(definition, tables):
+    """Point the REFERENCES of an FK definition at the staging copies of swapped tables"""
+    return re.sub(r'REFERENCES ((?:\w+\.)?)(\w+)\(',
+                  lambda m: f"REFERENCES {m.group(1)}{m.group(2)}"
+                            f"{STAGING_SUFFIX if m.group(2) in tables else ''}(",
+                  definition)
+
+
+def _stage_view(definition, tables):
+    """Point the FROM/JOIN table references of a view definition at the staging copies of swapped tables"""
+    return re.sub(r'\b(FROM|JOIN)(\s+\(*)((?:\w+\.)?)(\w+)\b',
+                  lambda m: m.group(0) + (STAGING_SUFFIX if m.group(4) in tables else ''),
+                  definition)
+
+
+def staged_definitions(conn, table, tables):
+    """Indexes and constraints of the live table, renamed for its staging copy"""
+    staging = table + STAGING_SUFFIX
+    cursor = conn.cursor()
+    indexes = [(name + STAGING_SUFFIX, _stage_index(definition, staging))
+               for name, definition in secondary_indexes(cursor, table)]
+    keys = table_constraints(cursor, table, 'p')
+    primary_key = (keys[0][0] + STAGING_SUFFIX, keys[0][1]) if keys else None
+    foreign_keys = [(name + STAGING_SUFFIX, _stage_references(definition, tables))
+                    for name, definition in table_constraints(cursor, table, 'f')]
+
+    # Swapping drops the old tables: an FK from a table outside the swap would go with them
+    cursor.execute("""
+        SELECT conrelid::regclass::text, conname FROM pg_constraint
+        WHERE confrelid = %s::regclass AND contype = 'f'
+    """, (table,))
+    external = [f"{owner}.{name}" for owner, name in cursor.fetchall() if owner.split('.')[-1] not in tables]
+    cursor.close()
+    if external:
+        raise ValueError(f"cannot swap {table}: referenced by {', '.join(external)}")
+    return SuspendedTable(staging, indexes, primary_key, foreign_keys)
+
+
+def finish_swap_tables(conn, connection, tables, parallel_builds=4, total_memory_mb=None, validate_foreign_keys=True):
+    """Make the loaded staging tables durable, then build their indexes and constraints"""
+    definitions = [staged_definitions(conn, table, tables) for table in tables]
+    cursor = conn.cursor()
+    # SET LOGGED before any FK: a permanent table cannot reference an unlogged one
+    for table in tables:
+        staging = table + STAGING_SUFFIX
+        for name in child_partitions(cursor, staging) or [staging]:
+            cursor.execute(f"ALTER TABLE {name} SET LOGGED")
+            conn.commit()
+    cursor.close()
+    for suspended in definitions:
+        restore_table(conn, connection, suspended, parallel_builds, total_memory_mb, validate_foreign_keys)
+
+
+def dependent_views(cursor, tables):
+    """(name, relkind, definition, index definitions) of the views and materialized views
+    reading any of the tables, in creation order"""
+    cursor.execute("""
+        SELECT DISTINCT v.oid, v.oid::regclass::text, v.relkind, pg_get_viewdef(v.oid),
+               ARRAY(SELECT pg_get_indexdef(x.indexrelid) FROM pg_index x WHERE x.indrelid = v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = ANY(%s::regclass[]) AND v.relkind IN ('v', 'm') AND v.oid <> d.refobjid
+        ORDER BY v.oid
+    """, (list(tables),))
+    return [tuple(row[1:]) for row in cursor.fetchall()]
+
+
+def drop_view(cursor, view):
+    name, relkind = view[:2]
+    cursor.execute(f"DROP {'MATERIALIZED VIEW' if relkind == 'm' else 'VIEW'} {name}")
+
+
+def create_view(cursor, view):
+    """Recreate a view captured by dependent_views; a materialized view is filled and re-indexed"""
+    name, relkind, definition, indexes = view
+    if relkind == 'm':
+        cursor.execute(f"CREATE MATERIALIZED VIEW {name} AS {definition}")
+        for index in indexes:
+            cursor.execute(index)
+    else:
+        cursor.execute(f"CREATE VIEW {name} AS {definition}")
+
+
+def stage_materialized_views(conn, tables):
+    """Build, filled and indexed, a <view>_staging copy of each materialized view over the
+    swapped tables, reading their staging copies; returns the names of the live views"""
+    cursor = conn.cursor()
+    views = [view for view in dependent_views(cursor, tables) if view[1] == 'm']
+    conn.commit()
+    for name, relkind, definition, indexes in views:
+        staging = name.split('.')[-1] + STAGING_SUFFIX
+        cursor.execute(f"DROP MATERIALIZED VIEW IF EXISTS {staging}")
+        create_view(cursor, (staging, relkind, _stage_view(definition, tables),
+                             [_stage_index(index, staging) for index in indexes]))
+        conn.commit()
+    cursor.close()
+    return [name for name, _, _, _ in views]
+
+
+def refresh_materialized_views(conn, names=None):
+    """Refresh materialized views (default: all in the search path), each in its own transaction
+
+    Populated views with a unique index are refreshed CONCURRENTLY, so readers
+    keep querying the previous contents meanwhile. Returns [(name, seconds, concurrently)].
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT c.oid::regclass::text, c.relispopulated,
+               EXISTS (SELECT 1 FROM pg_index x WHERE x.indrelid = c.oid AND x.indisunique
+                       AND x.indpred IS NULL AND x.indexprs IS NULL)
+        FROM pg_class c
+        WHERE c.relkind = 'm' AND pg_table_is_visible(c.oid)
+        ORDER BY c.oid
+    """)
+    views = [row for row in cursor.fetchall() if names is None or row[0] in names]
+    conn.commit()
+    refreshed = []
+    for name, populated, unique in views:
+        concurrently = populated and unique
+        started = time.perf_counter()
+        cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{name}")
+        conn.commit()
+        refreshed.append((name, time.perf_counter() - started, concurrently))
+    cursor.close()
+    return refreshed
+
+
+def swap_tables(conn, tables, lock_timeout='5s'):
+    """Replace the live tables with their staging copies in one short transaction
+
+    Dependent materialized views are built beforehand over the staging tables,
+    so inside the swap they are only dropped and renamed: the locks last as
+    long as the renames, and readers never see an empty view.
+    """
+    staged_views = stage_materialized_views(conn, tables)
+    cursor = conn.cursor()
+    cursor.execute(f"SET LOCAL lock_timeout = '{lock_timeout}'")
+    for table in tables:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+    # Views are bound to the old tables: plain ones are rebuilt on the new tables, materialized
+    # ones replaced by their staged copies
+    views = dependent_views(cursor, tables)
+    for view in reversed(views):
+        drop_view(cursor, view)
+
+    for table in tables:
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+        cursor.execute(f"ALTER TABLE {table}{STAGING_SUFFIX} RENAME TO {table}")
+    cursor.execute(f"DROP TABLE {', '.join(f'{table}_old' for table in tables)} CASCADE")
+
+    # With the old tables gone the original index and constraint names are free again
+    for table in tables:
+        for name, _ in secondary_indexes(cursor, table):
+            if name.endswith(STAGING_SUFFIX):
+                cursor.execute(f"ALTER INDEX {name} RENAME TO {name[:-len(STAGING_SUFFIX)]}")
+        for contype in ('p', 'f'):
+            for name, _ in table_constraints(cursor, table, contype):
+                if name.endswith(STAGING_SUFFIX):
+                    cursor.execute(f"ALTER TABLE {table} RENAME CONSTRAINT {name} "
+                                   f"TO {name[:-len(STAGING_SUFFIX)]}")
+
+    # Partitions of a staging copy are named <table>_staging_<suffix>, and so are their indexes
+    for table in tables:
+        prefix = table + STAGING_SUFFIX
+        for name in child_partitions(cursor, table):
+            if name.startswith(prefix):
+                renamed = table + name[len(prefix):]
+                cursor.execute(f"ALTER TABLE {name} RENAME TO {renamed}")
+                cursor.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass",
+                               (renamed,))
+                for index, in cursor.fetchall():
+                    if index.startswith(name):
+                        cursor.execute(f"ALTER INDEX {index} RENAME TO {renamed}{index[len(name):]}")
+
+    for view in views:
+        if view[1] != 'm':
+            create_view(cursor, view)
+    for name in staged_views:
+        live = name.split('.')[-1]
+        cursor.execute(f"ALTER MATERIALIZED VIEW {live}{STAGING_SUFFIX} RENAME TO {live}")
+        cursor.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass", (name,))
+        for index, in cursor.fetchall():
+            if index.endswith(STAGING_SUFFIX):
+                cursor.execute(f"ALTER INDEX {index} RENAME TO {index.split('.')[-1][:-len(STAGING_SUFFIX)]}")
+    conn.commit()
+    cursor.close()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Live progress and throughput telemetry for the loaders
+Reports rows/s, bytes/s, ETA, batch latency percentiles and database
+round-trip times while a load runs, and writes a summary JSON at the end
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import numpy as np
+
+DEFAULT_REPORT_INTERVAL = 2.0
+SUMMARY_FILE = 'load_telemetry.json'
+
+# Summaries of the loads finished in this process, in order
+COMPLETED = []
+
+# Progress line wording, in the language of the calling script
+REPORT_LABELS = {
+    'es': {'rows': 'filas', 'batch': 'lote'},
+    'en': {'rows': 'rows', 'batch': 'batch'},
+}
+
+
+def estimate_csv_rows(path, sample_bytes=1024 * 1024):
+    """Data rows of a CSV estimated from the line length of its first bytes"""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        sample = f.read(sample_bytes)
+    lines = sample.count(b'\n')
+    if lines <= 1 or len(sample) >= size:
+        return max(lines - 1, 0)
+    return int(size / (len(sample) / lines)) - 1
+
+
+def _percentiles(values):
+    if not values:
+        return {'p50': None, 'p95': None, 'p99': None, 'max': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(max(values))}
+
+
+def _ms(seconds):
+    return '-' if seconds is None else f"{seconds * 1000:.0f}ms" if seconds >= 0.01 else f"{seconds * 1000:.1f}ms"
+
+
+class LoadTelemetry:
+    """Track one load: record batches and round trips, print progress, summarize"""
+
+    def __init__(self, name, total_rows=None, report_interval=DEFAULT_REPORT_INTERVAL, ping=None, quiet=False,
+                 language='es'):
+        self.name = name
+        self.labels = REPORT_LABELS[language]
+        self.total_rows = total_rows
+        self.report_interval = report_interval
+        self.ping = ping
+        self.quiet = quiet
+        self.rows = 0
+        self.bytes = 0
+        self.batch_seconds = []
+        self.round_trip_seconds = []
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def record_batch(self, rows, nbytes=0, seconds=None):
+        self.rows += rows
+        self.bytes += nbytes
+        if seconds is not None:
+            self.batch_seconds.append(seconds)
+        self._maybe_report()
+
+    @contextmanager
+    def batch(self, rows, nbytes=0):
+        """Time one batch write"""
+        started = time.perf_counter()
+        yield
+        self.record_batch(rows, nbytes, time.perf_counter() - started)
+
+    @contextmanager
+    def round_trip(self):
+        """Time one request/response with the database (a commit, a ping...)"""
+        started = time.perf_counter()
+        yield
+        self.round_trip_seconds.append(time.perf_counter() - started)
+
+    def merge(self, other):
+        """Add the batches of a worker's telemetry (summary or instance)"""
+        data = other if isinstance(other, dict) else other.state()
+        self.rows += data['rows']
+        self.bytes += data['bytes']
+        self.batch_seconds += data['batch_seconds']
+        self.round_trip_seconds += data['round_trip_seconds']
+        self._maybe_report()
+
+    def state(self):
+        """Raw counters, small enough to send back from a worker process"""
+        return {'rows': self.rows, 'bytes': self.bytes, 'batch_seconds': self.batch_seconds,
+                'round_trip_seconds': self.round_trip_seconds}
+
+    @property
+    def elapsed(self):
+        return max(time.perf_counter() - self.started, 1e-9)
+
+    def eta(self):
+        if not self.total_rows or self.rows == 0 or self.rows >= self.total_rows:
+            return None
+        return (self.total_rows - self.rows) / (self.rows / self.elapsed)
+
+    def _maybe_report(self):
+        now = time.perf_counter()
+        if self.quiet or now - self.last_report < self.report_interval:
+            return
+        self.last_report = now
+        if self.ping is not None:
+            with self.round_trip():
+                self.ping()
+        self.report()
+
+    def report(self):
+        progress = f" ({self.rows / self.total_rows:.0%})" if self.total_rows else ""
+        rows = self.labels['rows']
+        parts = [f"{self.rows:,} {rows}{progress}", f"{self.rows / self.elapsed:,.0f} {rows}/s"]
+        if self.bytes:
+            parts.append(f"{self.bytes / self.elapsed / 1024 ** 2:,.1f} MB/s")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"ETA {timedelta(seconds=round(eta))}")
+        if self.batch_seconds:
+            batch = _percentiles(self.batch_seconds)
+            parts.append(f"{self.labels['batch']} p50 {_ms(batch['p50'])} p95 {_ms(batch['p95'])} p99 {_ms(batch['p99'])}")
+        if self.round_trip_seconds:
+            parts.append(f"RTT p50 {_ms(_percentiles(self.round_trip_seconds)['p50'])}")
+        print(f"   ⏱️  {self.name}: " + " · ".join(parts))
+
+    def summary(self):
+        elapsed = self.elapsed
+        return {
+            'name': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': round(elapsed, 3),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'rows_per_second': self.rows / elapsed,
+            'bytes_per_second': self.bytes / elapsed,
+            'batches': len(self.batch_seconds),
+            'batch_latency_seconds': _percentiles(self.batch_seconds),
+            'round_trips': len(self.round_trip_seconds),
+            'round_trip_seconds': _percentiles(self.round_trip_seconds),
+        }
+
+    def finish(self):
+        """Print the final line, record the summary in COMPLETED and return it"""
+        if not self.quiet:
+            self.report()
+        summary = self.summary()
+        COMPLETED.append(summary)
+        return summary
+
+
+def write_summary(path=SUMMARY_FILE, summaries=None, **run_info):
+    """Write the summaries of one run (default: COMPLETED) plus run settings to a JSON file"""
+    data = {'finished_at': datetime.now().isoformat(timespec='seconds'), **run_info,
+            'loads': list(COMPLETED if summaries is None else summaries)}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return path
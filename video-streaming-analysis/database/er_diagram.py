@@ -64,7 +64,7 @@ def create_er_diagram():
     
     # Sessions attributes
     sessions_attrs = ['session_id (PK)', 'user_id (FK)', 'content_id (FK)',
-                      'watch_date', 'watch_duration_minutes', 'completion_percentage',
+                      'watch_date (PK)', 'watch_duration_minutes', 'completion_percentage',
                       'device_type', 'quality_level']
     for i, attr in enumerate(sessions_attrs):
         y_pos = 5.2 - i * 0.3
@@ -0,0 +1,24 @@
+-- 0002: control tables of insert_data.py
+-- etl_watermarks: last loaded date per table (incremental loads)
+-- etl_checkpoints: per-chunk progress of the session load (--resume, --reconcile)
+
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    table_name VARCHAR(63) PRIMARY KEY,
+    column_name VARCHAR(63) NOT NULL,
+    watermark DATE,
+    rows_merged BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS etl_checkpoints (
+    table_name VARCHAR(63) PRIMARY KEY,
+    source_file TEXT NOT NULL,
+    fingerprint VARCHAR(64) NOT NULL,
+    last_chunk INTEGER NOT NULL DEFAULT 0,
+    rows_read BIGINT NOT NULL DEFAULT 0,
+    rows_committed BIGINT NOT NULL DEFAULT 0,
+    rows_rejected BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL,
+    source_digest JSONB,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,18 @@
+"""
+0003: partition viewing_sessions by month of watch_date
+The table is rebuilt with its rows; the primary key becomes (session_id, watch_date)
+"""
+
+from partitions import convert_to_partitioned, ensure_default_partition
+from table_maintenance import is_partitioned
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    if is_partitioned(cursor, 'viewing_sessions'):
+        # Created already partitioned (schema.sql): only the DEFAULT partition may be missing
+        ensure_default_partition(cursor, 'viewing_sessions')
+        conn.commit()
+    else:
+        convert_to_partitioned(conn, 'viewing_sessions', 'watch_date')
+    cursor.close()
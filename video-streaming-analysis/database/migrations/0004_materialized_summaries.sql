@@ -0,0 +1,50 @@
+-- 0004: materialized copies of the summary views for the dashboards
+-- Same queries as the plain views, computed once per load; the unique indexes
+-- allow REFRESH MATERIALIZED VIEW CONCURRENTLY, which does not block readers
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_engagement_summary_mv AS
+SELECT 
+	u.user_id,
+	u.country,
+	u.subscription_type,
+	COUNT(v.session_id) AS total_sessions,
+	COALESCE(SUM(v.watch_duration_minutes),0) AS total_watch_minutes,
+	AVG(v.completion_percentage) AS avg_completion_percentage
+FROM users u
+LEFT JOIN viewing_sessions v ON v.user_id = u.user_id
+GROUP BY u.user_id, u.country, u.subscription_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS user_engagement_summary_mv_user_id
+	ON user_engagement_summary_mv(user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS content_performance_summary_mv AS
+SELECT 
+	c.content_id,
+	c.title,
+	c.content_type,
+	c.release_year,
+	c.rating,
+	COUNT(v.session_id) AS total_views,
+	AVG(v.completion_percentage) AS avg_completion_percentage,
+	AVG(v.watch_duration_minutes) AS avg_watch_duration
+FROM content c
+LEFT JOIN viewing_sessions v ON v.content_id = c.content_id
+GROUP BY c.content_id, c.title, c.content_type, c.release_year, c.rating;
+
+CREATE UNIQUE INDEX IF NOT EXISTS content_performance_summary_mv_content_id
+	ON content_performance_summary_mv(content_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS content_type_analysis_mv AS
+SELECT 
+	c.content_type,
+	COUNT(*) as content_count,
+	AVG(c.rating) as avg_rating,
+	AVG(c.views_count) as avg_views,
+	AVG(c.production_budget) as avg_budget,
+	AVG(v.completion_percentage) as avg_completion_rate
+FROM content c
+LEFT JOIN viewing_sessions v ON c.content_id = v.content_id
+GROUP BY c.content_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS content_type_analysis_mv_content_type
+	ON content_type_analysis_mv(content_type);
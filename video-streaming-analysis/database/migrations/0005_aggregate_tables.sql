@@ -0,0 +1,76 @@
+-- 0005: incrementally maintained session aggregates
+-- Loaders add each batch of sessions as deltas (INSERT ... ON CONFLICT DO UPDATE);
+-- count, sum and sum of squares are enough for exact means and variances.
+-- completion sums are NUMERIC so they stay exact; NULL dimensions are stored as 'unknown'
+
+CREATE TABLE IF NOT EXISTS agg_user_metrics (
+    user_id VARCHAR(20) PRIMARY KEY,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS agg_content_metrics (
+    content_id VARCHAR(20) PRIMARY KEY,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily_dimension (
+    watch_date DATE NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    quality_level VARCHAR(20) NOT NULL,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (watch_date, device_type, quality_level)
+);
+
+-- Means and sample variances from the running sums
+CREATE OR REPLACE VIEW user_metrics AS
+SELECT 
+	user_id,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_user_metrics;
+
+CREATE OR REPLACE VIEW content_metrics AS
+SELECT 
+	content_id,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_content_metrics;
+
+CREATE OR REPLACE VIEW daily_dimension_metrics AS
+SELECT 
+	watch_date,
+	device_type,
+	quality_level,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_daily_dimension;
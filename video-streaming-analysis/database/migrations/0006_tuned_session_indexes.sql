@@ -0,0 +1,16 @@
+-- 0006: tuned index set for viewing_sessions
+-- Sessions arrive in watch_date order, so a BRIN index (a few pages per month)
+-- replaces the B-tree on watch_date. The device x quality and per-content
+-- aggregates read only the INCLUDEd columns and can run as index-only scans
+
+DROP INDEX IF EXISTS idx_sessions_date;
+CREATE INDEX IF NOT EXISTS idx_sessions_date_brin ON viewing_sessions
+	USING brin (watch_date) WITH (pages_per_range = 32);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_device_quality ON viewing_sessions (device_type, quality_level)
+	INCLUDE (completion_percentage, watch_duration_minutes);
+
+-- Supersedes the single-column idx_sessions_content (same leading column)
+DROP INDEX IF EXISTS idx_sessions_content;
+CREATE INDEX IF NOT EXISTS idx_sessions_content_covering ON viewing_sessions (content_id)
+	INCLUDE (session_id, user_id, quality_level, completion_percentage, watch_duration_minutes);
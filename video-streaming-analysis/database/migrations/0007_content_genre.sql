@@ -0,0 +1,19 @@
+-- 0007: content_genre bridge table
+-- One row per (content, genre), backfilled from the JSONB content.genre array.
+-- Genre analytics join it on (genre, content_id) instead of unnesting the JSON
+
+CREATE TABLE IF NOT EXISTS content_genre (
+	content_id VARCHAR(20) NOT NULL REFERENCES content(content_id) ON DELETE CASCADE,
+	genre VARCHAR(100) NOT NULL,
+	PRIMARY KEY (content_id, genre)
+);
+
+CREATE INDEX IF NOT EXISTS idx_content_genre_genre ON content_genre (genre, content_id);
+
+INSERT INTO content_genre (content_id, genre)
+SELECT DISTINCT c.content_id, btrim(g.genre)
+FROM content c
+CROSS JOIN LATERAL jsonb_array_elements_text(
+	CASE WHEN jsonb_typeof(c.genre) = 'array' THEN c.genre ELSE '[]'::jsonb END) AS g(genre)
+WHERE btrim(g.genre) <> ''
+ON CONFLICT DO NOTHING;
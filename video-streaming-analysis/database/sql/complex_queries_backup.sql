@@ -121,14 +121,14 @@ ORDER BY cohort_month;
 -- 6. Content Genre Performance
 WITH genre_analysis AS (
     SELECT 
-        jsonb_array_elements_text(c.genre) as genre_name,
+        cg.genre as genre_name,
         COUNT(vs.session_id) as total_sessions,
         AVG(vs.completion_percentage) as avg_completion,
         AVG(vs.watch_duration_minutes) as avg_duration,
         COUNT(DISTINCT vs.user_id) as unique_viewers
-    FROM content c
-    LEFT JOIN viewing_sessions vs ON c.content_id = vs.content_id
-    GROUP BY jsonb_array_elements_text(c.genre)
+    FROM content_genre cg
+    LEFT JOIN viewing_sessions vs ON cg.content_id = vs.content_id
+    GROUP BY cg.genre
 )
 SELECT 
     genre_name,
@@ -136,7 +136,7 @@ SELECT
     ROUND(avg_completion, 2) as avg_completion,
     ROUND(avg_duration, 2) as avg_duration,
     unique_viewers,
-    ROUND((total_sessions::DECIMAL / unique_viewers), 2) as sessions_per_viewer
+    ROUND((total_sessions::DECIMAL / NULLIF(unique_viewers, 0)), 2) as sessions_per_viewer
 FROM genre_analysis
 WHERE genre_name IS NOT NULL
 ORDER BY total_sessions DESC;
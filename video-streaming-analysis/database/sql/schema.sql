@@ -3,6 +3,9 @@
 
 -- Note: Create database outside if needed: CREATE DATABASE video_streaming_platform;
 -- Use: \c video_streaming_platform;
+--
+-- Reference snapshot of the current schema. Databases are created and upgraded by
+-- the versioned migrations in ../migrations (python migrate.py); add changes there.
 
 CREATE TABLE IF NOT EXISTS users (
 	user_id VARCHAR(20) PRIMARY KEY,
@@ -10,8 +13,7 @@ CREATE TABLE IF NOT EXISTS users (
 	country VARCHAR(100),
 	subscription_type VARCHAR(50),
 	registration_date DATE,
-	total_watch_time_hours DECIMAL(10,2),
-	
+	total_watch_time_hours DECIMAL(10,2)
 );
 
 -- Content table (unified for movies and series)
@@ -28,12 +30,21 @@ CREATE TABLE IF NOT EXISTS content (
 	-- Series-specific fields (NULL for movies)
 	seasons INTEGER,
 	episodes_per_season JSONB, -- array of integers
-	avg_episode_duration INTEGER, -- for series
-	
+	avg_episode_duration INTEGER -- for series
 );
 
+-- One row per genre of each title, maintained by the content loaders
+CREATE TABLE IF NOT EXISTS content_genre (
+	content_id VARCHAR(20) NOT NULL REFERENCES content(content_id) ON DELETE CASCADE,
+	genre VARCHAR(100) NOT NULL,
+	PRIMARY KEY (content_id, genre)
+);
+
+-- Partitioned by month of watch_date: date filters prune partitions and whole
+-- months can be reloaded or dropped. Monthly partitions (viewing_sessions_YYYY_MM)
+-- are created by the loaders; the key must include the partition column
 CREATE TABLE IF NOT EXISTS viewing_sessions (
-	session_id VARCHAR(20) PRIMARY KEY,
+	session_id VARCHAR(20) NOT NULL,
 	user_id VARCHAR(20) REFERENCES users(user_id),
 	content_id VARCHAR(20) REFERENCES content(content_id),
 	watch_date DATE NOT NULL,
@@ -41,17 +52,26 @@ CREATE TABLE IF NOT EXISTS viewing_sessions (
 	completion_percentage DECIMAL(5,2),
 	device_type VARCHAR(50),
 	quality_level VARCHAR(20),
-	
-);
+	PRIMARY KEY (session_id, watch_date)
+) PARTITION BY RANGE (watch_date);
+
+-- Rows outside every monthly partition
+CREATE TABLE IF NOT EXISTS viewing_sessions_default PARTITION OF viewing_sessions DEFAULT;
 
 -- Helpful indexes
 CREATE INDEX IF NOT EXISTS idx_users_country ON users(country);
 CREATE INDEX IF NOT EXISTS idx_users_subscription_type ON users(subscription_type);
 CREATE INDEX IF NOT EXISTS idx_content_type ON content(content_type);
 CREATE INDEX IF NOT EXISTS idx_content_release_year ON content(release_year);
+CREATE INDEX IF NOT EXISTS idx_content_genre_genre ON content_genre (genre, content_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_user ON viewing_sessions(user_id);
-CREATE INDEX IF NOT EXISTS idx_sessions_content ON viewing_sessions(content_id);
-CREATE INDEX IF NOT EXISTS idx_sessions_date ON viewing_sessions(watch_date);
+-- BRIN for the append-ordered watch_date; covering indexes for the aggregates
+CREATE INDEX IF NOT EXISTS idx_sessions_date_brin ON viewing_sessions
+	USING brin (watch_date) WITH (pages_per_range = 32);
+CREATE INDEX IF NOT EXISTS idx_sessions_device_quality ON viewing_sessions (device_type, quality_level)
+	INCLUDE (completion_percentage, watch_duration_minutes);
+CREATE INDEX IF NOT EXISTS idx_sessions_content_covering ON viewing_sessions (content_id)
+	INCLUDE (session_id, user_id, quality_level, completion_percentage, watch_duration_minutes);
 
 -- Views for quick analysis
 CREATE OR REPLACE VIEW user_engagement_summary AS
@@ -92,3 +112,124 @@ SELECT
 FROM content c
 LEFT JOIN viewing_sessions v ON c.content_id = v.content_id
 GROUP BY c.content_type;
+
+-- Materialized copies for the dashboards, refreshed CONCURRENTLY after each load
+CREATE MATERIALIZED VIEW IF NOT EXISTS user_engagement_summary_mv AS
+SELECT 
+	u.user_id,
+	u.country,
+	u.subscription_type,
+	COUNT(v.session_id) AS total_sessions,
+	COALESCE(SUM(v.watch_duration_minutes),0) AS total_watch_minutes,
+	AVG(v.completion_percentage) AS avg_completion_percentage
+FROM users u
+LEFT JOIN viewing_sessions v ON v.user_id = u.user_id
+GROUP BY u.user_id, u.country, u.subscription_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS user_engagement_summary_mv_user_id
+	ON user_engagement_summary_mv(user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS content_performance_summary_mv AS
+SELECT 
+	c.content_id,
+	c.title,
+	c.content_type,
+	c.release_year,
+	c.rating,
+	COUNT(v.session_id) AS total_views,
+	AVG(v.completion_percentage) AS avg_completion_percentage,
+	AVG(v.watch_duration_minutes) AS avg_watch_duration
+FROM content c
+LEFT JOIN viewing_sessions v ON v.content_id = c.content_id
+GROUP BY c.content_id, c.title, c.content_type, c.release_year, c.rating;
+
+CREATE UNIQUE INDEX IF NOT EXISTS content_performance_summary_mv_content_id
+	ON content_performance_summary_mv(content_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS content_type_analysis_mv AS
+SELECT 
+	c.content_type,
+	COUNT(*) as content_count,
+	AVG(c.rating) as avg_rating,
+	AVG(c.views_count) as avg_views,
+	AVG(c.production_budget) as avg_budget,
+	AVG(v.completion_percentage) as avg_completion_rate
+FROM content c
+LEFT JOIN viewing_sessions v ON c.content_id = v.content_id
+GROUP BY c.content_type;
+
+CREATE UNIQUE INDEX IF NOT EXISTS content_type_analysis_mv_content_type
+	ON content_type_analysis_mv(content_type);
+
+-- Session aggregates maintained incrementally by the loaders (count, sum, sum of squares)
+CREATE TABLE IF NOT EXISTS agg_user_metrics (
+    user_id VARCHAR(20) PRIMARY KEY,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS agg_content_metrics (
+    content_id VARCHAR(20) PRIMARY KEY,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS agg_daily_dimension (
+    watch_date DATE NOT NULL,
+    device_type VARCHAR(50) NOT NULL,
+    quality_level VARCHAR(20) NOT NULL,
+    session_count BIGINT NOT NULL DEFAULT 0,
+    duration_sum BIGINT NOT NULL DEFAULT 0,
+    duration_sumsq BIGINT NOT NULL DEFAULT 0,
+    completion_sum NUMERIC NOT NULL DEFAULT 0,
+    completion_sumsq NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (watch_date, device_type, quality_level)
+);
+
+-- Means and sample variances from the running sums
+CREATE OR REPLACE VIEW user_metrics AS
+SELECT 
+	user_id,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_user_metrics;
+
+CREATE OR REPLACE VIEW content_metrics AS
+SELECT 
+	content_id,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_content_metrics;
+
+CREATE OR REPLACE VIEW daily_dimension_metrics AS
+SELECT 
+	watch_date,
+	device_type,
+	quality_level,
+	session_count,
+	duration_sum::numeric / NULLIF(session_count, 0) AS avg_watch_duration,
+	(duration_sumsq - duration_sum::numeric * duration_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_watch_duration,
+	completion_sum / NULLIF(session_count, 0) AS avg_completion_percentage,
+	(completion_sumsq - completion_sum * completion_sum / NULLIF(session_count, 0))
+		/ NULLIF(session_count - 1, 0) AS var_completion_percentage
+FROM agg_daily_dimension;
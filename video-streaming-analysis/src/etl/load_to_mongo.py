@@ -1,18 +1,32 @@
 import os
+import sys
 import json
 import pandas as pd
-from pymongo import MongoClient
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+sys.path.insert(0, BASE_DIR)
+
+from db import mongo_client, mongo_db
+from telemetry import LoadTelemetry, write_summary
+
 USERS_CSV = os.path.join(BASE_DIR, 'users.csv')
 SESSIONS_CSV = os.path.join(BASE_DIR, 'viewing_sessions.csv')
 CONTENT_JSON = os.path.join(BASE_DIR, 'content.json')
+TELEMETRY_JSON = os.path.join(BASE_DIR, 'load_to_mongo_telemetry.json')
+
+# Documents per insert_many batch
+BATCH_SIZE = 10_000
 
-MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017')
-DB_NAME = os.getenv('MONGO_DB', 'video_streaming_platform')
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
+def insert_batches(collection, records):
+    """insert_many in fixed-size batches, timing each one"""
+    telemetry = LoadTelemetry(collection.name, total_rows=len(records),
+                              ping=lambda: mongo_client().admin.command('ping'), language='en')
+    for start in range(0, len(records), BATCH_SIZE):
+        batch = records[start:start + BATCH_SIZE]
+        with telemetry.batch(len(batch)):
+            collection.insert_many(batch)
+    telemetry.finish()
 
 
 def load_users():
@@ -21,8 +35,8 @@ def load_users():
     # Use user_id as _id for idempotency
     for r in records:
         r['_id'] = r['user_id']
-    db.users.delete_many({})
-    db.users.insert_many(records)
+    mongo_db().users.delete_many({})
+    insert_batches(mongo_db().users, records)
 
 
 def load_content():
@@ -32,8 +46,8 @@ def load_content():
     for m in movies:
         m['_id'] = m['content_id']
         m['content_type'] = 'movie'
-    db.content.delete_many({})
-    db.content.insert_many(movies)
+    mongo_db().content.delete_many({})
+    insert_batches(mongo_db().content, movies)
 
 
 def load_viewing_sessions():
@@ -41,14 +55,15 @@ def load_viewing_sessions():
     records = df.to_dict(orient='records')
     for r in records:
         r['_id'] = r['session_id']
-    db.viewing_sessions.delete_many({})
-    db.viewing_sessions.insert_many(records)
+    mongo_db().viewing_sessions.delete_many({})
+    insert_batches(mongo_db().viewing_sessions, records)
 
 
 def main():
     load_users()
     load_content()
     load_viewing_sessions()
+    write_summary(TELEMETRY_JSON, target='mongo')
     print('ETL to MongoDB completed successfully.')
 
 
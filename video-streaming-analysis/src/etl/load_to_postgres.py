@@ -1,46 +1,187 @@
 import os
+import io
+import sys
+import csv
 import json
+import time
+import argparse
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from sqlalchemy.types import Integer, String, Date, Float, JSON
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
+sys.path.insert(0, BASE_DIR)
+
+from content_genres import sync_content_genres
+from db import sqlalchemy_engine
+from metric_tables import add_session_batch
+from migrate import migrate
+from partitions import ensure_partitions, months_of
+from table_maintenance import is_partitioned, refresh_materialized_views
+from telemetry import LoadTelemetry, estimate_csv_rows, write_summary
+
 USERS_CSV = os.path.join(BASE_DIR, 'users.csv')
 SESSIONS_CSV = os.path.join(BASE_DIR, 'viewing_sessions.csv')
 CONTENT_JSON = os.path.join(BASE_DIR, 'content.json')
-SCHEMA_SQL = os.path.join(BASE_DIR, 'video-streaming-analysis/database/sql/schema.sql')
+TELEMETRY_JSON = os.path.join(BASE_DIR, 'load_to_postgres_telemetry.json')
+
+# Rows per batch sent by to_sql, and rows per CSV chunk read into memory
+CHUNK_SIZE = 10_000
+READ_CHUNK_SIZE = 200_000
+LOAD_METHODS = ['copy', 'insert']
+
+
+def _ping():
+    with sqlalchemy_engine().connect() as conn:
+        conn.execute(text('SELECT 1'))
+
+
+def timed_insert(telemetry):
+    """to_sql insertion method that times each batch (same INSERT as pandas' default)"""
+    def insert(table, conn, keys, data_iter):
+        rows = [dict(zip(keys, row)) for row in data_iter]
+        with telemetry.batch(len(rows)):
+            result = conn.execute(table.table.insert(), rows)
+        return result.rowcount
+    return insert
+
+
+def _copy_value(value, is_integer):
+    """One CSV field for COPY: JSON for lists/dicts, empty (NULL) for missing values"""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    if value is None or (isinstance(value, float) and value != value):
+        return ''
+    # Integer columns with missing values arrive as floats (2019.0), which COPY rejects
+    if is_integer and isinstance(value, float):
+        return int(value)
+    return value
+
 
-PG_HOST = os.getenv('PG_HOST', 'localhost')
-PG_PORT = int(os.getenv('PG_PORT', '5432'))
-PG_DB = os.getenv('PG_DB', 'video_streaming_platform')
-PG_USER = os.getenv('PG_USER', 'postgres')
-PG_PASSWORD = os.getenv('PG_PASSWORD', 'postgres')
+def copy_insert(telemetry=None):
+    """to_sql insertion method that streams each chunk through psycopg2 COPY ... FROM STDIN"""
+    def insert(table, conn, keys, data_iter):
+        integer = [isinstance(table.table.columns[k].type, Integer) for k in keys]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        rows = 0
+        for row in data_iter:
+            writer.writerow([_copy_value(v, i) for v, i in zip(row, integer)])
+            rows += 1
+        nbytes = buffer.tell()
+        buffer.seek(0)
 
-engine = create_engine(f'postgresql+psycopg2://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}')
+        name = f'{table.schema}.{table.name}' if table.schema else table.name
+        columns = ', '.join(f'"{k}"' for k in keys)
+        started = time.perf_counter()
+        with conn.connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {name} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        if telemetry is not None:
+            telemetry.record_batch(rows, nbytes, time.perf_counter() - started)
+        return rows
+    return insert
+
+
+def insertion_method(method, telemetry):
+    return copy_insert(telemetry) if method == 'copy' else timed_insert(telemetry)
+
+
+USER_DTYPES = {
+    'user_id': String(20),
+    'age': Integer(),
+    'country': String(100),
+    'subscription_type': String(50),
+    'registration_date': Date(),
+    'total_watch_time_hours': Float(),
+}
+
+CONTENT_DTYPES = {
+    'content_id': String(20),
+    'title': String(255),
+    'genre': JSON(),
+    'content_type': String(20),
+    'duration_minutes': Integer(),
+    'release_year': Integer(),
+    'rating': Float(),
+    'views_count': Integer(),
+    'production_budget': Integer(),
+    'seasons': Integer(),
+    'episodes_per_season': JSON(),
+    'avg_episode_duration': Integer(),
+}
+
+SESSION_DTYPES = {
+    'session_id': String(20),
+    'user_id': String(20),
+    'content_id': String(20),
+    'watch_date': Date(),
+    'watch_duration_minutes': Integer(),
+    'completion_percentage': Float(),
+    'device_type': String(50),
+    'quality_level': String(20),
+}
 
 
 def ensure_schema():
-    with engine.begin() as conn:
-        with open(SCHEMA_SQL, 'r', encoding='utf-8') as f:
-            conn.execute(text(f.read()))
+    """Apply pending migrations; when the schema is current this is a single read"""
+    conn = sqlalchemy_engine().raw_connection()
+    try:
+        for migration in migrate(conn):
+            print(f'Applied migration {migration.version:04d}_{migration.name}')
+    finally:
+        conn.close()
+
+
+def add_partitions(table, dates):
+    """Create the monthly partitions a chunk needs before to_sql writes it"""
+    conn = sqlalchemy_engine().raw_connection()
+    try:
+        cursor = conn.cursor()
+        if is_partitioned(cursor, table):
+            ensure_partitions(cursor, table, months_of(pd.to_datetime(dates, errors='coerce')))
+        conn.commit()
+    finally:
+        conn.close()
 
 
-def load_users():
-    df = pd.read_csv(USERS_CSV)
+def write_frame(df, table, dtype, method, telemetry, conn=None):
+    """to_sql into `table`; with `conn` (a connection in a transaction) the write joins it uncommitted"""
     df.to_sql(
-        'users', engine, if_exists='append', index=False,
-        dtype={
-            'user_id': String(20),
-            'age': Integer(),
-            'country': String(100),
-            'subscription_type': String(50),
-            'registration_date': Date(),
-            'total_watch_time_hours': Float(),
-        }
+        table, sqlalchemy_engine() if conn is None else conn, if_exists='append', index=False,
+        chunksize=CHUNK_SIZE, method=insertion_method(method, telemetry),
+        dtype=dtype
     )
 
 
-def load_content():
+def add_aggregates(conn, sessions):
+    """Add a loaded chunk of sessions to the aggregate tables, in the chunk's transaction"""
+    cursor = conn.connection.cursor()
+    add_session_batch(cursor, sessions.assign(watch_date=pd.to_datetime(sessions['watch_date'])))
+    cursor.close()
+
+
+def load_csv(csv_file, table, dtype, method='copy', partition_column=None, after_write=None):
+    """Load a CSV chunk by chunk, so memory stays bounded by READ_CHUNK_SIZE rows
+
+    Each chunk commits on its own, together with whatever `after_write(conn, chunk)`
+    writes on the same connection.
+    """
+    telemetry = LoadTelemetry(table, total_rows=estimate_csv_rows(csv_file), ping=_ping, language='en')
+    for chunk in pd.read_csv(csv_file, chunksize=READ_CHUNK_SIZE):
+        if partition_column:
+            add_partitions(table, chunk[partition_column])
+        with sqlalchemy_engine().begin() as conn:
+            write_frame(chunk, table, dtype, method, telemetry, conn)
+            if after_write is not None:
+                after_write(conn, chunk)
+    telemetry.finish()
+
+
+def load_users(method='copy'):
+    load_csv(USERS_CSV, 'users', USER_DTYPES, method)
+
+
+def content_frame():
     with open(CONTENT_JSON, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
@@ -82,48 +223,97 @@ def load_content():
             'avg_episode_duration': s.get('avg_episode_duration'),
         })
     
-    df = pd.DataFrame.from_records(records)
-    df.to_sql(
-        'content', engine, if_exists='append', index=False,
-        dtype={
-            'content_id': String(20),
-            'title': String(255),
-            'genre': JSON(),
-            'content_type': String(20),
-            'duration_minutes': Integer(),
-            'release_year': Integer(),
-            'rating': Float(),
-            'views_count': Integer(),
-            'production_budget': Integer(),
-            'seasons': Integer(),
-            'episodes_per_season': JSON(),
-            'avg_episode_duration': Integer(),
-        }
-    )
+    return pd.DataFrame.from_records(records)
 
 
-def load_viewing_sessions():
-    df = pd.read_csv(SESSIONS_CSV)
-    df.to_sql(
-        'viewing_sessions', engine, if_exists='append', index=False,
-        dtype={
-            'session_id': String(20),
-            'user_id': String(20),
-            'content_id': String(20),
-            'watch_date': Date(),
-            'watch_duration_minutes': Integer(),
-            'completion_percentage': Float(),
-            'device_type': String(50),
-            'quality_level': String(20),
-        }
-    )
+def load_content(method='copy'):
+    df = content_frame()
+    telemetry = LoadTelemetry('content', total_rows=len(df), ping=_ping, language='en')
+    # The bridge rows commit with the content they are derived from
+    with sqlalchemy_engine().begin() as conn:
+        write_frame(df, 'content', CONTENT_DTYPES, method, telemetry, conn)
+        added, removed = sync_genres(conn)
+    telemetry.finish()
+    print(f"content_genre: {added} pairs added, {removed} removed")
+
+
+def sync_genres(conn):
+    """Derive the content_genre bridge rows from the content written on `conn`"""
+    cursor = conn.connection.cursor()
+    added, removed = sync_content_genres(cursor)
+    cursor.close()
+    return added, removed
+
+
+def load_viewing_sessions(method='copy'):
+    load_csv(SESSIONS_CSV, 'viewing_sessions', SESSION_DTYPES, method, partition_column='watch_date',
+             after_write=add_aggregates)
+
+
+def refresh_summaries():
+    """Refresh the materialized summary views (CONCURRENTLY once populated)"""
+    conn = sqlalchemy_engine().raw_connection()
+    try:
+        for name, seconds, concurrently in refresh_materialized_views(conn):
+            print(f"Refreshed {name}{' concurrently' if concurrently else ''} in {seconds:.2f}s")
+    finally:
+        conn.close()
+
+
+def benchmark(rows=100_000):
+    """Load the same sample with each method into scratch copies of the tables and compare rows/s"""
+    frames = [
+        ('content', content_frame(), CONTENT_DTYPES),
+        ('viewing_sessions', pd.read_csv(SESSIONS_CSV, nrows=rows), SESSION_DTYPES),
+    ]
+    engine = sqlalchemy_engine()
+    results = {}
+    try:
+        for table, df, dtype in frames:
+            scratch = f'bench_{table}'
+            # LIKE copies columns and types but no keys, so the sample loads on its own
+            with engine.begin() as conn:
+                conn.execute(text(f'DROP TABLE IF EXISTS {scratch}'))
+                conn.execute(text(f'CREATE TABLE {scratch} (LIKE {table})'))
+            results[table] = {}
+            for method in LOAD_METHODS:
+                with engine.begin() as conn:
+                    conn.execute(text(f'TRUNCATE {scratch}'))
+                telemetry = LoadTelemetry(f'{scratch} ({method})', total_rows=len(df), language='en')
+                write_frame(df, scratch, dtype, method, telemetry)
+                results[table][method] = telemetry.finish()['rows_per_second']
+            speedup = results[table]['copy'] / results[table]['insert']
+            results[table]['speedup'] = speedup
+            print(f"{table}: copy {results[table]['copy']:,.0f} rows/s, "
+                  f"insert {results[table]['insert']:,.0f} rows/s, speedup {speedup:.1f}x")
+    finally:
+        with engine.begin() as conn:
+            for table, _, _ in frames:
+                conn.execute(text(f'DROP TABLE IF EXISTS bench_{table}'))
+    return results
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Load the data into PostgreSQL with pandas.to_sql')
+    parser.add_argument('--method', choices=LOAD_METHODS, default='copy',
+                        help='to_sql insertion method: chunked COPY or INSERT (default: copy)')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare copy and insert on scratch tables instead of loading the data')
+    parser.add_argument('--benchmark-rows', type=int, default=100_000,
+                        help='Sessions in the benchmark sample (default: 100000)')
+    args = parser.parse_args()
+
     ensure_schema()
-    load_users()
-    load_content()
-    load_viewing_sessions()
+    if args.benchmark:
+        results = benchmark(args.benchmark_rows)
+        write_summary(TELEMETRY_JSON, target='postgres', benchmark=results)
+        return
+
+    load_users(args.method)
+    load_content(args.method)
+    load_viewing_sessions(args.method)
+    refresh_summaries()
+    write_summary(TELEMETRY_JSON, target='postgres', method=args.method)
     print('ETL to PostgreSQL completed successfully.')
 
 
@@ -1,27 +1,52 @@
 import os
+import sys
 import pandas as pd
 import streamlit as st
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..'))
 USERS_CSV = os.path.join(BASE_DIR, 'users.csv')
 SESSIONS_CSV = os.path.join(BASE_DIR, 'viewing_sessions.csv')
+ROLLUP_DIR = os.path.join(BASE_DIR, 'rollups')
+
+sys.path.insert(0, BASE_DIR)
+from rollups import load_rollup
 
 st.set_page_config(page_title='Streaming Performance Dashboard', layout='wide')
 
+ROLLUP_FILE = os.path.join(ROLLUP_DIR, 'sessions_daily.csv')
+
+def file_mtimes():
+	"""Modification times of the rollup and its sources (None when missing); also the cache key"""
+	return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in (ROLLUP_FILE, USERS_CSV, SESSIONS_CSV))
+
 @st.cache_data
-def load_data():
+def load_data(mtimes):
 	users = pd.read_csv(USERS_CSV)
+	# Prefer the analyzer's daily rollup over scanning every session, unless the CSVs are newer
+	rollup_mtime, source_mtimes = mtimes[0], [m for m in mtimes[1:] if m is not None]
+	if rollup_mtime is not None and rollup_mtime >= max(source_mtimes, default=0):
+		return users, load_rollup('daily', ROLLUP_DIR)
 	sessions = pd.read_csv(SESSIONS_CSV)
-	return users, sessions
+	engagement = sessions.merge(users[['user_id','subscription_type','country']], on='user_id', how='left')
+	engagement['duration_sq'] = engagement['watch_duration_minutes'] ** 2
+	engagement['completion_sq'] = engagement['completion_percentage'] ** 2
+	rollup = engagement.groupby(['subscription_type','country','device_type','quality_level'], dropna=False).agg(
+		session_count=('session_id','nunique'),
+		duration_sum=('watch_duration_minutes','sum'),
+		duration_sumsq=('duration_sq','sum'),
+		completion_sum=('completion_percentage','sum'),
+		completion_sumsq=('completion_sq','sum')
+	).reset_index()
+	return users, rollup
 
-users, sessions = load_data()
+users, rollup = load_data(file_mtimes())
 
 st.title('Video Streaming Platform Performance')
 
 num_users = users['user_id'].nunique()
-num_sessions = sessions['session_id'].nunique()
+num_sessions = rollup['session_count'].sum()
 total_watch_hours = users['total_watch_time_hours'].sum()
-avg_session_minutes = sessions['watch_duration_minutes'].mean()
+avg_session_minutes = rollup['duration_sum'].sum() / num_sessions
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -34,22 +59,22 @@ with col4:
 	st.metric('Avg Session Minutes', str(round(float(avg_session_minutes), 1)))
 
 st.subheader('Engagement by Subscription Type')
-engagement = sessions.merge(users[['user_id','subscription_type','country']], on='user_id', how='left')
-agg = engagement.groupby('subscription_type').agg(
-	sessions=('session_id','nunique'),
-	avg_completion=('completion_percentage','mean'),
-	avg_minutes=('watch_duration_minutes','mean')
-).reset_index()
+by_subscription = rollup.groupby('subscription_type', observed=True)[['session_count','duration_sum','completion_sum']].sum()
+agg = pd.DataFrame({
+	'sessions': by_subscription['session_count'],
+	'avg_completion': by_subscription['completion_sum'] / by_subscription['session_count'],
+	'avg_minutes': by_subscription['duration_sum'] / by_subscription['session_count']
+}).reset_index()
 st.dataframe(agg)
 
 st.subheader('Sessions by Country')
-sessions_by_country = engagement.groupby('country').size().sort_values(ascending=False).head(20)
+sessions_by_country = rollup.groupby('country', observed=True)['session_count'].sum().sort_values(ascending=False).head(20)
 st.bar_chart(sessions_by_country)
 
 st.subheader('Quality Level Distribution')
-quality_counts = sessions['quality_level'].value_counts()
+quality_counts = rollup.groupby('quality_level', observed=True)['session_count'].sum().sort_values(ascending=False)
 st.bar_chart(quality_counts)
 
 st.subheader('Device Type Breakdown')
-device_counts = sessions['device_type'].value_counts()
+device_counts = rollup.groupby('device_type', observed=True)['session_count'].sum().sort_values(ascending=False)
 st.bar_chart(device_counts)